@@ -1,9 +1,50 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import hashlib
-import inspect
-
-from gameApp import run_query
+import json
+import queue
+import time
+import unicodedata
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from mysql.connector import Error
+
+from dataAccess import (
+    cache_stats,
+    create_user,
+    db_overview,
+    deactivate_user,
+    delete_user,
+    keyset_page,
+    POPULARITY_CONFIG,
+    QUERY_STATS,
+    audit_row,
+    click_event,
+    perf_report,
+    pool_stats,
+    refresh_game_popularity,
+    reset_perf,
+    run_query,
+    search_event,
+    search_term,
+    slow_queries,
+    StreamingQuery,
+    title_search_parts,
+    update_user,
+    write_audit_rows,
+    write_search_events,
+)
+from batchWriter import BatchWriter
+from facetIndex import FACET_INDEX, FACETS
+from salesCube import ALL, UNRATED, cube_slice, genre_share_by_region, trend_by_year
+from sessions import SESSIONS, AuthError
+
+try:
+    from analyticsEngine import ANALYTICS
+except ImportError:
+    # pandas / numpy are optional for the GUI; without them the drill-down is hidden
+    ANALYTICS = None
 
 
 SCHEMA = {
@@ -31,60 +72,89 @@ SCHEMA = {
 }
 
 
-class DB:
-    def __init__(self, fn):
-        self.fn = fn
-        self.sig = inspect.signature(fn)
-        self.params = list(self.sig.parameters.keys())
-        self.has_fetch = "fetch" in self.sig.parameters
-        self.has_commit = "commit" in self.sig.parameters
-
-    def _call_once(self, sql: str, params=(), fetch=True):
-        # Single-argument 
-        if len(self.params) == 1:
-            return self.fn(sql)
-
-        # Keyword-style
-        if self.has_fetch or self.has_commit:
-            kwargs = {}
-            if self.has_fetch:
-                kwargs["fetch"] = fetch
-            if self.has_commit:
-                kwargs["commit"] = (not fetch)
-            return self.fn(sql, params, **kwargs)
-
-        if len(self.params) >= 3:
-            try:
-                return self.fn(sql, params, fetch)
-            except TypeError:
-                pass
-
-        # Fallback
-        return self.fn(sql, params)
+class BackgroundDB:
+    """
+    Runs database calls on a small thread pool so the Tk event loop never
+    waits on MySQL. Tk is not thread-safe, so workers only put finished
+    futures on a queue; the main loop drains it with after() and calls the
+    on_done / on_error callbacks there.
 
-    def call(self, sql: str, params=(), fetch=True):
-        sql = (sql or "").strip()
-        if params is None:
-            params = ()
+    Calls submitted with the same key supersede each other: a queued call is
+    cancelled outright, and a call already running has its result dropped.
+    """
 
+    def __init__(self, root, workers=4, poll_ms=30, on_busy=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gamesearch-db")
+        self.done = queue.Queue()
+        self.generation = {}
+        self.inflight = {}
+        self.busy = 0
+        self._after_id = root.after(poll_ms, self._drain)
+
+    def submit(self, fn, *args, key=None, on_done=None, on_error=None, **kwargs):
+        gen = None
+        if key is not None:
+            gen = self.generation.get(key, 0) + 1
+            self.generation[key] = gen
+            prev = self.inflight.get(key)
+            if prev is not None:
+                prev.cancel()
+
+        future = self.executor.submit(fn, *args, **kwargs)
+        if key is not None:
+            self.inflight[key] = future
+        self._busy(+1)
+        future.add_done_callback(lambda f: self.done.put((key, gen, f, on_done, on_error)))
+        return future
+
+    def cancel(self, key):
+        """Drop whatever is pending or running under key."""
+        self.generation[key] = self.generation.get(key, 0) + 1
+        prev = self.inflight.pop(key, None)
+        if prev is not None:
+            prev.cancel()
+
+    def _busy(self, delta):
+        self.busy += delta
+        if self.on_busy:
+            self.on_busy(self.busy)
+
+    def _drain(self):
         try:
-            return self._call_once(sql, params=params, fetch=fetch)
-        except Exception as e1:
-            if "%s" in sql:
+            while True:
                 try:
-                    return self._call_once(sql.replace("%s", "?"), params=params, fetch=fetch)
-                except Exception:
-                    raise e1
-            raise
-
-    def select(self, sql: str, params=()):
-        return self.call(sql, params=params, fetch=True) or []
-
-    def exec(self, sql: str, params=()):
-        return self.call(sql, params=params, fetch=False)
-
-
-DBX = DB(run_query)
+                    key, gen, future, on_done, on_error = self.done.get_nowait()
+                except queue.Empty:
+                    break
+                self._busy(-1)
+                if key is not None:
+                    if self.inflight.get(key) is future:
+                        del self.inflight[key]
+                    if self.generation.get(key) != gen:
+                        continue
+                if future.cancelled():
+                    continue
+                exc = future.exception()
+                try:
+                    if exc is not None:
+                        if on_error:
+                            on_error(exc)
+                    elif on_done:
+                        on_done(future.result())
+                except Exception as e:
+                    # A broken callback must not stop delivery of every later result
+                    self.root.report_callback_exception(type(e), e, e.__traceback__)
+        finally:
+            self._after_id = self.root.after(self.poll_ms, self._drain)
+
+    def shutdown(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
 class LoginWindow(tk.Tk):
     """
@@ -98,8 +168,8 @@ class LoginWindow(tk.Tk):
         self.geometry("400x220")
         self.resizable(False, False)
 
-        self.current_user_id = None
-        self.current_username = None
+        self.session = None
+        self.bg = BackgroundDB(self, workers=1)
 
         frame = ttk.Frame(self, padding=16)
         frame.pack(fill="both", expand=True)
@@ -123,20 +193,20 @@ class LoginWindow(tk.Tk):
         btns = ttk.Frame(frame)
         btns.grid(row=4, column=0, columnspan=2, pady=(12, 0))
 
-        ttk.Button(btns, text="Login", command=self.do_login).pack(side="left", padx=6)
-        ttk.Button(btns, text="Create Account", command=self.do_create).pack(side="left", padx=6)
+        self.login_btn = ttk.Button(btns, text="Login", command=self.do_login)
+        self.login_btn.pack(side="left", padx=6)
+        self.create_btn = ttk.Button(btns, text="Create Account", command=self.do_create)
+        self.create_btn.pack(side="left", padx=6)
         ttk.Button(btns, text="Quit", command=self.destroy).pack(side="left", padx=6)
 
-    def _one(self, rows):
-        """
-        Helper: get first value of first row, works for list-of-tuples or list-of-dicts.
-        """
-        if not rows:
-            return None
-        r0 = rows[0]
-        if isinstance(r0, dict):
-            return list(r0.values())[0]
-        return r0[0]
+    def destroy(self):
+        self.bg.shutdown()
+        super().destroy()
+
+    def _busy(self, busy):
+        state = "disabled" if busy else "normal"
+        self.login_btn.configure(state=state)
+        self.create_btn.configure(state=state)
 
     def do_login(self):
         uname = self.e_user.get().strip()
@@ -145,27 +215,16 @@ class LoginWindow(tk.Tk):
             messagebox.showerror("Missing", "Enter username and password.")
             return
 
-        try:
-            # Look up user_id by username
-            rows_uid = DBX.select("SELECT user_id FROM app_user WHERE username=%s", (uname,))
-            uid = self._one(rows_uid)
-            if uid is None:
-                messagebox.showerror("Login failed", "No such user.")
-                return
+        def done(session):
+            self.session = session
+            self.destroy()
 
-            # Look up stored password hash
-            rows_hash = DBX.select("SELECT password_hash FROM app_user WHERE user_id=%s", (uid,))
-            stored = self._one(rows_hash)
-            if not stored or stored != sha256(pw):
-                messagebox.showerror("Login failed", "Incorrect password.")
-                return
+        def failed(e):
+            self._busy(False)
+            messagebox.showerror("Login failed" if isinstance(e, AuthError) else "Login error", str(e))
 
-            # Success
-            self.current_user_id = uid
-            self.current_username = uname
-            self.destroy()
-        except Exception as e:
-            messagebox.showerror("Login error", str(e))
+        self._busy(True)
+        self.bg.submit(SESSIONS.login, uname, sha256(pw), on_done=done, on_error=failed)
 
     def do_create(self):
         uname = self.e_user.get().strip()
@@ -176,63 +235,236 @@ class LoginWindow(tk.Tk):
             messagebox.showerror("Missing", "Username, email, and password are required.")
             return
 
-        try:
-            # Try to insert
-            DBX.exec(
-                "INSERT INTO app_user (username, email, password_hash) VALUES (%s, %s, %s)",
-                (uname, email, sha256(pw)),
-            )
+        def work():
+            uid = create_user(uname, email, sha256(pw))
+            return SESSIONS.issue(uid, uname)
 
-            # Get new user_id
-            rows_uid = DBX.select("SELECT user_id FROM app_user WHERE username=%s", (uname,))
-            uid = self._one(rows_uid)
-
-            self.current_user_id = uid
-            self.current_username = uname
+        def done(session):
+            self.session = session
             messagebox.showinfo("Account created", "Account created and logged in.")
             self.destroy()
-        except Exception as e:
+
+        def failed(e):
+            self._busy(False)
             messagebox.showerror("Create failed", str(e))
 
+        self._busy(True)
+        self.bg.submit(work, on_done=done, on_error=failed)
+
 
 def sha256(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
 def _normalize_result(result):
-    """Normalize various possible run_query return styles into (cols, rows)."""
+    """
+    Normalize various possible run_query return styles into (cols, rows, as_tuple).
+    rows is the caller's own sequence (never copied); as_tuple converts a
+    single row for display, so only rows that reach the screen are converted.
+    """
     if result is None:
-        return ["info"], [("No result returned.",)]
+        return ["info"], [("No result returned.",)], tuple
 
     # (cols, rows) where cols is a list, rows is list-of-rows
     if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], (list, tuple)):
-        cols = list(result[0])
-        rows = [tuple(r) for r in list(result[1])]
-        return cols, rows
+        return list(result[0]), result[1], tuple
 
     # Empty list
     if isinstance(result, list) and not result:
-        return ["info"], [("No rows returned.",)]
+        return ["info"], [("No rows returned.",)], tuple
 
     # List of dicts
     if isinstance(result, list) and result and isinstance(result[0], dict):
         cols = list(result[0].keys())
-        rows = [tuple(r.get(c) for c in cols) for r in result]
-        return cols, rows
+        return cols, result, lambda r: tuple(r.get(c) for c in cols)
 
     # List of lists/tuples
     if isinstance(result, list) and result and isinstance(result[0], (list, tuple)):
-        rows = [tuple(r) for r in result]
-        cols = [f"col{i+1}" for i in range(len(rows[0]))]
-        return cols, rows
+        cols = [f"col{i+1}" for i in range(len(result[0]))]
+        return cols, result, tuple
 
     # Fallback
-    return ["info"], [(str(result),)]
+    return ["info"], [(str(result),)], tuple
+
+
+GRID_MAX_ROWS = 200_000
+GRID_FETCH_BATCH = 500
+
+
+class ResultGrid(ttk.Treeview):
+    """
+    Treeview that only holds the rows currently on screen. The full result
+    stays in its original list (or arrives batch by batch via append_rows
+    from a streaming producer), and the vertical scrollbar is driven by the
+    grid's own offset instead of Tk's item list. Appended rows stop at
+    max_rows so memory stays bounded whatever the result size.
+
+    A streaming producer registered with on_demand(callback) is told how
+    many rows the viewport needs (two screens past the current offset)
+    every time it moves, so it only fetches ahead of the user's scrolling.
+    """
+
+    def __init__(self, parent, vsb, max_rows=GRID_MAX_ROWS, **kwargs):
+        super().__init__(parent, show="headings", **kwargs)
+        self.vsb = vsb
+        self.max_rows = max_rows
+
+        self._cols = []
+        self._rows = []
+        self._as_tuple = tuple
+        self._capped = False
+        self._offset = 0
+        self._page = 20
+        self._selected = None
+        self._select_cb = None
+        self._demand_cb = None
+
+        vsb.configure(command=self._on_scrollbar)
+        self.bind("<Configure>", self._on_resize)
+        self.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.bind("<MouseWheel>", lambda e: self.scroll_rows(-1 if e.delta > 0 else 1, "units"))
+        self.bind("<Button-4>", lambda e: self.scroll_rows(-1, "units"))
+        self.bind("<Button-5>", lambda e: self.scroll_rows(1, "units"))
+        self.bind("<Prior>", lambda e: self.scroll_rows(-1, "pages"))
+        self.bind("<Next>", lambda e: self.scroll_rows(1, "pages"))
+        self.bind("<Up>", self._on_key_up)
+        self.bind("<Down>", self._on_key_down)
+
+    # Data
+    def show(self, result):
+        """Display a run_query-style result (list of dicts / tuples, or (cols, rows))."""
+        cols, rows, as_tuple = _normalize_result(result)
+        self._reset(cols, rows, as_tuple)
+
+    def begin(self, cols):
+        """Start an empty result that a producer fills with append_rows()."""
+        self._reset(list(cols), [], tuple)
+
+    def append_rows(self, batch):
+        """Add rows delivered by a producer (used by the progressive SQL console)."""
+        room = self.max_rows - len(self._rows)
+        if room <= 0:
+            self._capped = True
+            return False
+        if len(batch) > room:
+            batch = batch[:room]
+            self._capped = True
+        self._rows.extend(batch)
+        self._refresh()
+        return not self._capped
+
+    def on_demand(self, callback):
+        """callback(rows) runs whenever the viewport needs the first `rows` rows loaded."""
+        self._demand_cb = callback
+
+    def row_count(self):
+        return len(self._rows)
+
+    def capped(self):
+        return self._capped
+
+    def _reset(self, cols, rows, as_tuple):
+        self._cols = cols
+        self._rows = rows
+        self._as_tuple = as_tuple
+        self._capped = False
+        self._offset = 0
+        self._selected = None
+        self._apply_columns()
+        self._refresh()
+
+    def _apply_columns(self):
+        super().delete(*super().get_children())
+        self["columns"] = self._cols
+        for c in self._cols:
+            self.heading(c, text=c)
+            self.column(c, width=170, anchor="w")
+
+    # Viewport
+    def _on_resize(self, event):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        page = max(1, (event.height - rowheight) // rowheight)
+        if page != self._page:
+            self._page = page
+            self._refresh()
+
+    def _visible(self, index):
+        return self._offset <= index < self._offset + self._page
+
+    def scroll_rows(self, amount, what="units"):
+        step = self._page if what == "pages" else 3
+        self._scroll_to(self._offset + amount * step)
+        return "break"
+
+    def _scroll_to(self, offset):
+        last = max(0, len(self._rows) - self._page)
+        self._offset = max(0, min(int(offset), last))
+        self._refresh()
+
+    def _on_scrollbar(self, action, value, what=None):
+        if action == "moveto":
+            total = len(self._rows)
+            self._scroll_to(float(value) * total)
+        elif action == "scroll":
+            self.scroll_rows(int(value), what)
+
+    def _refresh(self):
+        visible = self._rows[self._offset:self._offset + self._page]
+
+        super().delete(*super().get_children())
+        for i, row in enumerate(visible, start=self._offset):
+            super().insert("", "end", iid=str(i), values=self._as_tuple(row))
+        if self._selected is not None and self._visible(self._selected):
+            self.selection_set(str(self._selected))
+
+        total = len(self._rows)
+        if total == 0:
+            self.vsb.set(0.0, 1.0)
+        else:
+            self.vsb.set(self._offset / total, min(1.0, (self._offset + len(visible)) / total))
+        if self._demand_cb is not None:
+            self._demand_cb(self._offset + 2 * self._page)
+
+    # Selection
+    def on_select(self, callback):
+        """callback(event) runs when the user's selection changes; scrolling does not count."""
+        self._select_cb = callback
+
+    def _on_tree_select(self, event):
+        sel = super().selection()
+        if sel:
+            self._selected = int(sel[0])
+        elif self._selected is not None and not self._visible(self._selected):
+            # The selected row just scrolled out of view; it is still selected
+            return
+        else:
+            self._selected = None
+        if self._select_cb:
+            self._select_cb(event)
+
+    def _on_key_up(self, _event):
+        if self._selected is not None and self._selected == self._offset and self._offset > 0:
+            self._selected -= 1
+            self._scroll_to(self._offset - 1)
+            return "break"
+        return None
+
+    def _on_key_down(self, _event):
+        if self._selected is not None and self._selected == self._offset + self._page - 1:
+            if self._selected + 1 < len(self._rows):
+                self._selected += 1
+                self._scroll_to(self._offset + 1)
+            return "break"
+        return None
 
 
 def render(tree: ttk.Treeview, result):
+    if isinstance(tree, ResultGrid):
+        tree.show(result)
+        return
+
     tree.delete(*tree.get_children())
-    cols, rows = _normalize_result(result)
+    cols, rows, as_tuple = _normalize_result(result)
 
     tree["columns"] = cols
     for c in cols:
@@ -240,17 +472,17 @@ def render(tree: ttk.Treeview, result):
         tree.column(c, width=170, anchor="w")
 
     for r in rows:
-        tree.insert("", "end", values=r)
+        tree.insert("", "end", values=as_tuple(r))
 
 
 def make_tree(parent):
     wrap = ttk.Frame(parent)
     wrap.pack(fill="both", expand=True)
 
-    tree = ttk.Treeview(wrap, show="headings")
-    vsb = ttk.Scrollbar(wrap, orient="vertical", command=tree.yview)
+    vsb = ttk.Scrollbar(wrap, orient="vertical")
+    tree = ResultGrid(wrap, vsb)
     hsb = ttk.Scrollbar(wrap, orient="horizontal", command=tree.xview)
-    tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+    tree.configure(xscrollcommand=hsb.set)
 
     tree.grid(row=0, column=0, sticky="nsew")
     vsb.grid(row=0, column=1, sticky="ns")
@@ -271,11 +503,351 @@ def count_rows(result) -> int:
     return 1
 
 
+SEARCH_PAGE_SIZE = 200
+USERS_PAGE_SIZE = 300
+
+AUDIT_WRITER_CONFIG = {
+    "max_queue": 5_000,
+    "batch_size": 100,
+    "flush_interval": 2.0,
+}
+
+TELEMETRY_WRITER_CONFIG = {
+    "max_queue": 2_000,
+    "batch_size": 50,
+    "flush_interval": 5.0,
+}
+
+POPULARITY_REFRESH_MS = 10 * 60 * 1000
+
+CONSOLE_CONFIG = {
+    "max_rows": 100_000,
+    "timeout_s": 30,
+    "batch_size": GRID_FETCH_BATCH,
+    "poll_ms": 100,
+    # A stream paused this long waiting for the user to scroll is stopped,
+    # freeing its pooled connection
+    "idle_s": 300,
+}
+
+# In-memory drill-down (analyticsEngine): double-clicking a row filters on
+# it and moves on to the next dimension
+DRILL_DIMENSIONS = ("genre", "platform", "release_year", "publisher", "region", "title")
+DRILL_MEASURES = ("global", "na", "eu", "jp", "other")
+DRILL_NEXT = {"region": "genre", "genre": "platform", "platform": "release_year",
+              "release_year": "publisher", "publisher": "title"}
+DRILL_TOP = 200
+
+# Cube views (salesCube): the genre picker's "all" entry
+CUBE_ALL_LABEL = "(all genres)"
+
+# Quiet period after the last keystroke before the Search tab queries
+SEARCH_DEBOUNCE_MS = 250
+# Live results left on screen this long count as a search in the telemetry
+SEARCH_SETTLE_MS = 2000
+
+# Facet values listed per facet under the Search tab filters
+FACET_SUMMARY_TOP = 6
+FACET_LABELS = {"platform": "Platform", "genre": "Genre", "release_year": "Year", "esrb": "ESRB"}
+
+
+def popularity_sql():
+    """Click-through popularity of the current game row (0 if it was never shown)."""
+    g = SCHEMA["games"]
+    return (
+        f"COALESCE((SELECT p.score FROM app_game_popularity p "
+        f"WHERE p.sales_game_id = {g['table']}.{g['id']}), 0)"
+    )
+
+
+def search_ranking(title):
+    """
+    Ranking columns of a title search as [(alias, expr, params)], in sort
+    order: exact/prefix tier, then click-through popularity, then FULLTEXT
+    relevance, so the most-clicked matches lead within each tier.
+    """
+    g = SCHEMA["games"]
+    _, _, tier_sql, tier_params, rel_sql, rel_params = title_search_parts(title, column=g["title"])
+    return [
+        ("search_tier", tier_sql, tier_params),
+        ("popularity", popularity_sql(), []),
+        ("relevance", rel_sql, rel_params),
+    ]
+
+
+def search_keys(title=None):
+    """Keyset sort keys for the Search tab, as (expr, params, descending)."""
+    g = SCHEMA["games"]
+    keys = [(g["title"], [], False), (g["id"], [], False)]
+    if title:
+        keys[:0] = [(expr, params, True) for _, expr, params in search_ranking(title)]
+    return keys
+
+
+def search_row_key(row, title=None):
+    key = (row["title"], row["game_id"])
+    if title:
+        return (row["search_tier"], row["popularity"], row["relevance"]) + key
+    return key
+
+
+def esrb_filter_sql(esrb):
+    """WHERE fragment for the Search tab's ESRB filter (UNRATED = no linked rating)."""
+    g = SCHEMA["games"]
+    linked = (
+        f"SELECT 1 FROM app_game_link l JOIN bg_esrb_game e ON e.esrb_game_id = l.esrb_game_id "
+        f"WHERE l.sales_game_id = {g['table']}.{g['id']}"
+    )
+    if esrb.casefold() == UNRATED:
+        return f"NOT EXISTS ({linked} AND e.esrb IS NOT NULL)", []
+    return f"EXISTS ({linked} AND e.esrb = %s)", [esrb]
+
+
+def build_search_query(title=None, platform=None, genre=None, release_year=None, esrb=None,
+                       limit=SEARCH_PAGE_SIZE, after=None, backward=False):
+    """
+    Return (sql, params) for one page of the Search tab's filter combination.
+    after is the search_row_key of the row the page starts past; backward
+    walks toward the first page (rows come back in reverse order).
+    """
+    g = SCHEMA["games"]
+    where = [f"{g['title']} IS NOT NULL"]
+    params = []
+    select_rank = ""
+    select_params = []
+
+    if title:
+        where_sql, where_params, *_ = title_search_parts(title, column=g["title"])
+        where.append(where_sql)
+        params.extend(where_params)
+        for alias, expr, expr_params in search_ranking(title):
+            select_rank += f",\n        {expr} AS {alias}"
+            select_params.extend(expr_params)
+
+    if platform:
+        where.append(f"{g['platform']} = %s")
+        params.append(platform)
+
+    if genre:
+        where.append(f"{g['genre']} = %s")
+        params.append(genre)
+
+    if release_year is not None:
+        where.append(f"{g['release_year']} = %s")
+        params.append(release_year)
+
+    if esrb:
+        esrb_sql, esrb_params = esrb_filter_sql(esrb)
+        where.append(esrb_sql)
+        params.extend(esrb_params)
+
+    seek_sql, seek_params, order_sql, order_params = keyset_page(search_keys(title), after, backward)
+    if seek_sql:
+        where.append(seek_sql)
+        params.extend(seek_params)
+
+    sql = f"""
+    SELECT
+        {g['id']} AS game_id,
+        {g['title']} AS title,
+        {g['platform']} AS platform,
+        {g['genre']} AS genre,
+        {g['publisher']} AS publisher,
+        {g['developer']} AS developer,
+        {g['release_year']} AS release_year,
+        {g['source']} AS source{select_rank}
+    FROM {g['table']}
+    WHERE {" AND ".join(where)}
+    ORDER BY {order_sql}
+    LIMIT %s
+    """
+    return sql, tuple(select_params + params + order_params + [limit])
+
+
+def _fold(value):
+    """
+    Case- and accent-insensitive form, like the server's utf8mb4_0900_ai_ci
+    (accents stripped the way linkGames.normalize_title does it).
+    """
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.split()).casefold()
+
+
+def refine_search_rows(old_args, rows, new_args):
+    """
+    Answer a Search tab query from the complete result of an earlier, broader
+    one. Works when every filter set before is unchanged and the old title
+    term is contained in the new one (FULLTEXT phrase matches only narrow as
+    the phrase grows). Returns the rows in server order, or None if the new
+    query has to go to the database.
+    """
+    for f in ("platform", "genre", "release_year"):
+        old = old_args[f]
+        if old not in ("", None) and _fold(old) != _fold(new_args[f]):
+            return None
+    # Rows carry no rating, so any ESRB change goes to the database
+    if _fold(old_args.get("esrb")) != _fold(new_args.get("esrb")):
+        return None
+
+    old_term = _fold(search_term(old_args["title"]))
+    new_term = _fold(search_term(new_args["title"]))
+    if old_term:
+        # One-character terms use a prefix LIKE, which is not a superset
+        if len(old_term.replace(" ", "")) < 2 or old_term not in new_term:
+            return None
+    elif new_term:
+        return None
+    # Letters NFKD cannot reduce to ASCII (ø, CJK...) may compare differently
+    # under the collation, so those results go to the database
+    if not new_term.isascii() or any(not _fold(r["title"]).isascii() for r in rows):
+        return None
+
+    def keep(row):
+        for f in ("platform", "genre"):
+            if new_args[f] and _fold(row[f]) != _fold(new_args[f]):
+                return False
+        if new_args["release_year"] is not None and row["release_year"] != new_args["release_year"]:
+            return False
+        return not new_term or new_term in _fold(row["title"])
+
+    out = [r for r in rows if keep(r)]
+    if new_term == old_term:
+        return out
+
+    # Re-rank like search_ranking: the tier is recomputed for the new term;
+    # popularity and the FULLTEXT relevance reported for the old term carry over.
+    ranked = []
+    for r in out:
+        title = _fold(r["title"])
+        tier = (title == new_term) * 100 + title.startswith(new_term) * 10
+        ranked.append(dict(r, search_tier=tier))
+    ranked.sort(key=lambda r: (-r["search_tier"], -r["popularity"], -r["relevance"],
+                               _fold(r["title"]), r["game_id"]))
+    return ranked
+
+
+def users_row_key(row):
+    return (row["user_id"],)
+
+
+def build_users_query(limit=USERS_PAGE_SIZE, after=None, backward=False):
+    """Return (sql, params) for one page of the Users tab, newest first."""
+    u = SCHEMA["user"]
+    seek_sql, seek_params, order_sql, _ = keyset_page([(u["id"], [], True)], after, backward)
+    sql = f"""
+    SELECT
+        {u['id']} AS user_id,
+        {u['username']} AS username,
+        {u['email']} AS email,
+        {u['active']} AS is_active,
+        {u['created']} AS created_at,
+        {u['updated']} AS updated_at
+    FROM {u['table']}
+    {"WHERE " + seek_sql if seek_sql else ""}
+    ORDER BY {order_sql}
+    LIMIT %s
+    """
+    return sql, tuple(seek_params + [limit])
+
+
+class KeysetPager:
+    """
+    Page state for a keyset-paginated view. Pages are fetched with one extra
+    row, which only says whether another page exists in that direction; the
+    keys of the first and last rows on screen seed the next seek, so page 500
+    costs the same as page 1.
+    """
+
+    def __init__(self, page_size, key_of):
+        self.page_size = page_size
+        self.key_of = key_of
+        self.reset()
+
+    def reset(self):
+        self.page = 0
+        self.first_key = None
+        self.last_key = None
+        self.has_prev = False
+        self.has_next = False
+
+    def request(self, direction):
+        """Return (after, backward) for direction "first", "next" or "prev"."""
+        if direction == "next":
+            return self.last_key, False
+        if direction == "prev":
+            return self.first_key, True
+        return None, False
+
+    def accept(self, rows, direction):
+        """
+        Take the page_size + 1 rows fetched for `direction` and return the
+        rows to show in display order, or None when that direction ran out
+        (rows were deleted since the last page was read).
+        """
+        rows = list(rows or [])
+        more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if not rows and direction != "first":
+            if direction == "next":
+                self.has_next = False
+            else:
+                self.has_prev = False
+            return None
+
+        if direction == "prev":
+            rows.reverse()
+            self.page = self.page - 1 if more else 1
+            self.has_prev = more
+            self.has_next = True
+        else:
+            self.page = self.page + 1 if direction == "next" else 1
+            self.has_prev = direction == "next"
+            self.has_next = more
+
+        if rows:
+            self.first_key = self.key_of(rows[0])
+            self.last_key = self.key_of(rows[-1])
+        return rows
+
+
+TOP_SALES_SQL = """
+SELECT
+    g.sales_game_id,
+    g.title,
+    g.platform,
+    s.global_sales_millions
+FROM bg_sales_summary AS s
+JOIN bg_sales_game AS g
+  ON g.sales_game_id = s.sales_game_id
+ORDER BY s.global_sales_millions DESC
+LIMIT %s
+"""
+
+# Join ESRB and sales through the integer ids in app_game_link
+SALES_BY_ESRB_SQL = """
+SELECT
+    e.esrb AS esrb_rating,
+    COUNT(*) AS num_games,
+    SUM(s.global_sales_millions) AS total_sales_millions
+FROM bg_esrb_game AS e
+JOIN app_game_link AS l
+  ON l.esrb_game_id = e.esrb_game_id
+JOIN bg_sales_summary AS s
+  ON s.sales_game_id = l.sales_game_id
+GROUP BY e.esrb
+ORDER BY total_sales_millions DESC;
+"""
+
+
 class App(tk.Tk):
-    def __init__(self, current_user_id=None, current_username=None):
+    def __init__(self, session=None):
         super().__init__()
-        self.current_user_id = current_user_id
-        self.current_username = current_username
+        # Token of the logged-in user's app_session row; see current_session
+        self.session_token = session.token if session else None
 
         self.title("GameSearch DB App (Checkpoint 2)")
         self.geometry("1200x700")
@@ -283,10 +855,6 @@ class App(tk.Tk):
         self.geometry("1200x700")
         self.minsize(1000, 600)
 
-        # Current logged-in user 
-        self.current_user_id = None
-        self.current_username = None
-
         self.selected_game_id = None
         self.selected_user_id = None
 
@@ -299,15 +867,24 @@ class App(tk.Tk):
         auth = ttk.Frame(header)
         auth.pack(side="right")
 
-        self.auth_label = tk.StringVar(value="Not logged in")
+        self.auth_label = tk.StringVar(value=f"Logged in as: {session.username}" if session else "Not logged in")
         ttk.Label(auth, textvariable=self.auth_label).pack(side="right", padx=4)
         ttk.Button(auth, text="Logout", command=self.logout).pack(side="right", padx=4)
         ttk.Button(auth, text="Login", command=self.show_login_dialog).pack(side="right", padx=4)
         ttk.Button(auth, text="DB Check", command=self.db_check).pack(side="right", padx=4)
 
-        # Status line
+        # Status line + busy indicator for background queries
+        status_bar = ttk.Frame(self)
+        status_bar.pack(fill="x", padx=12)
         self.status = tk.StringVar(value="Ready.")
-        ttk.Label(self, textvariable=self.status).pack(anchor="w", padx=12)
+        ttk.Label(status_bar, textvariable=self.status).pack(side="left")
+        self.busy_bar = ttk.Progressbar(status_bar, mode="indeterminate", length=120)
+        self.busy_label = tk.StringVar(value="")
+        ttk.Label(status_bar, textvariable=self.busy_label).pack(side="right")
+
+        self.bg = BackgroundDB(self, on_busy=self._show_busy)
+        self.audit_writer = BatchWriter(write_audit_rows, name="audit", **AUDIT_WRITER_CONFIG)
+        self.telemetry_writer = BatchWriter(write_search_events, name="search-telemetry", **TELEMETRY_WRITER_CONFIG)
 
         # Tabs
         nb = ttk.Notebook(self)
@@ -317,26 +894,84 @@ class App(tk.Tk):
         self.tab_users = ttk.Frame(nb, padding=10)
         self.tab_analytics = ttk.Frame(nb, padding=10)
         self.tab_console = ttk.Frame(nb, padding=10)
+        self.tab_perf = ttk.Frame(nb, padding=10)
 
         nb.add(self.tab_search, text="Search (bg_sales_game)")
         nb.add(self.tab_users, text="Users (CRUD app_user)")
         nb.add(self.tab_analytics, text="Analytics (SQL views)")
         nb.add(self.tab_console, text="SQL Console (SELECT/WITH)")
+        nb.add(self.tab_perf, text="Perf")
 
         self._build_search()
         self._build_users()
         self._build_analytics()
         self._build_console()
+        self._build_perf()
 
         self.load_users()
+        self._refresh_popularity()
+
+    def _refresh_popularity(self):
+        """
+        Ask for an app_game_popularity rebuild now and every
+        POPULARITY_REFRESH_MS. refresh_game_popularity skips it unless this
+        client wins the named lock and the last rebuild is min_interval old.
+        """
+        self.bg.submit(
+            refresh_game_popularity, key="popularity",
+            on_error=lambda e: self._set(f"Popularity refresh failed: {e}"),
+            **POPULARITY_CONFIG,
+        )
+        self.after(POPULARITY_REFRESH_MS, self._refresh_popularity)
 
     def _set(self, msg: str):
         self.status.set(msg)
 
+    def _show_busy(self, n):
+        if n > 0:
+            self.busy_label.set(f"{n} quer{'y' if n == 1 else 'ies'} running")
+            if not self.busy_bar.winfo_ismapped():
+                self.busy_bar.pack(side="right", padx=6)
+                self.busy_bar.start(12)
+        else:
+            self.busy_label.set("")
+            self.busy_bar.stop()
+            self.busy_bar.pack_forget()
+
+    def destroy(self):
+        if self.console_query is not None and self.console_query.finished is None:
+            self.console_query.cancel()
+        self.bg.shutdown()
+        self.console_bg.shutdown()
+        self.audit_writer.close()
+        self.telemetry_writer.close()
+        SESSIONS.logout(self.session_token)
+        SESSIONS.stop()
+        super().destroy()
+
     # Login / access control
+    @property
+    def current_session(self):
+        """The live session, checked against the in-memory session cache."""
+        return SESSIONS.validate(self.session_token)
+
+    @property
+    def current_user_id(self):
+        session = self.current_session
+        return session.user_id if session else None
+
+    @property
+    def current_username(self):
+        session = self.current_session
+        return session.username if session else None
+
     def require_login(self, action_desc: str) -> bool:
         """Show an error and return False if no user is logged in."""
-        if self.current_user_id is None:
+        if self.current_session is None:
+            if self.session_token:
+                # Expired or revoked since login
+                self.session_token = None
+                self.auth_label.set("Not logged in")
             messagebox.showerror("Login required", f"You must log in to {action_desc}.")
             return False
         return True
@@ -362,45 +997,22 @@ class App(tk.Tk):
                 messagebox.showerror("Missing", "Username and password are required.")
                 return
 
-            sql = """
-            SELECT user_id, username, password_hash, is_active
-            FROM app_user
-            WHERE username = %s
-            LIMIT 1
-            """
-            try:
-                rows = DBX.select(sql, (username,))
-            except Exception as e:
-                messagebox.showerror("Login failed", str(e))
-                return
-
-            if not rows:
-                messagebox.showerror("Login failed", "User not found.")
-                return
-
-            row0 = rows[0]
-            if isinstance(row0, dict):
-                user_id = row0.get("user_id")
-                db_username = row0.get("username")
-                pw_hash = row0.get("password_hash")
-                is_active = row0.get("is_active")
-            else:
-                user_id, db_username, pw_hash, is_active = row0[0], row0[1], row0[2], row0[3]
-
-            if not is_active:
-                messagebox.showerror("Login failed", "This account is inactive.")
-                return
-
-            if sha256(pw) != pw_hash:
-                messagebox.showerror("Login failed", "Incorrect password.")
-                return
-
-            self.current_user_id = user_id
-            self.current_username = db_username
-            self.auth_label.set(f"Logged in as: {db_username}")
-            self._set(f"Logged in as {db_username}.")
-            self.audit("login", "app_user", db_username, "User login from GUI")
-            dlg.destroy()
+            def done(session):
+                # Logging in as someone else ends the previous session
+                SESSIONS.logout(self.session_token)
+                self.session_token = session.token
+                db_username = session.username
+                self.auth_label.set(f"Logged in as: {db_username}")
+                self._set(f"Logged in as {db_username}.")
+                self.audit("login", "app_user", db_username, "User login from GUI")
+                if dlg.winfo_exists():
+                    dlg.destroy()
+
+            self._set("Logging in...")
+            self.bg.submit(
+                SESSIONS.login, username, sha256(pw), on_done=done,
+                on_error=lambda e: messagebox.showerror("Login failed", str(e)),
+            )
 
         btns = ttk.Frame(dlg)
         btns.grid(row=2, column=0, columnspan=2, pady=(8, 8), padx=8, sticky="e")
@@ -414,30 +1026,37 @@ class App(tk.Tk):
             messagebox.showinfo("Logout", "No user is currently logged in.")
             return
         self.audit("logout", "app_user", self.current_username, "User logout from GUI")
-        self.current_user_id = None
-        self.current_username = None
+        # Write this user's queued events now, without blocking the UI
+        self.audit_writer.flush(wait=False)
+        SESSIONS.logout(self.session_token)
+        self.session_token = None
         self.auth_label.set("Not logged in")
         self._set("Logged out.")
 
     def audit(self, action_type, entity_type, entity_id, details=None):
-        """Write a row into app_audit_log. Swallows errors so GUI never crashes."""
-        try:
-            DBX.exec(
-                """
-                INSERT INTO app_audit_log (user_id, action_type, entity_type, entity_id, details)
-                VALUES (%s, %s, %s, %s, %s)
-                """,
-                (
-                    self.current_user_id,
-                    action_type,
-                    entity_type,
-                    str(entity_id) if entity_id is not None else None,
-                    details,
-                ),
-            )
-        except Exception:
-            # If audit table or FK fails, ignore silently 
-            pass
+        """
+        Queue a row for app_audit_log; the audit writer inserts it in a batch
+        off the UI thread. Drops and failed batches show up in DB Check.
+        """
+        self.audit_writer.submit(audit_row(self.current_user_id, action_type, entity_type, entity_id, details))
+
+    # Paging controls shared by the Search and Users tabs
+    def _pager_controls(self, parent, move):
+        bar = ttk.Frame(parent)
+        bar.pack(fill="x", pady=(0, 6))
+        prev_btn = ttk.Button(bar, text="< Previous", state="disabled", command=lambda: move("prev"))
+        prev_btn.pack(side="left")
+        label = tk.StringVar(value="")
+        ttk.Label(bar, textvariable=label).pack(side="left", padx=10)
+        next_btn = ttk.Button(bar, text="Next >", state="disabled", command=lambda: move("next"))
+        next_btn.pack(side="left")
+        return prev_btn, label, next_btn
+
+    def _update_pager(self, nav, pager):
+        prev_btn, label, next_btn = nav
+        prev_btn.configure(state="normal" if pager.has_prev else "disabled")
+        next_btn.configure(state="normal" if pager.has_next else "disabled")
+        label.set(f"Page {pager.page}" if pager.page else "")
 
     # Search tab
     def _build_search(self):
@@ -446,100 +1065,207 @@ class App(tk.Tk):
         box = ttk.LabelFrame(self.tab_search, text="Filters", padding=10)
         box.pack(fill="x")
 
-        ttk.Label(box, text="Title contains:").grid(row=0, column=0, sticky="w")
+        ttk.Label(box, text="Title search:").grid(row=0, column=0, sticky="w")
         self.f_title = ttk.Entry(box, width=34)
         self.f_title.grid(row=0, column=1, padx=8, pady=2, sticky="w")
 
+        # Facet filters: dropdowns list the values that still have matches
+        # (FACET_INDEX), and typing a value by hand still works
         ttk.Label(box, text="Platform:").grid(row=0, column=2, sticky="w")
-        self.f_platform = ttk.Entry(box, width=22)
+        self.f_platform = ttk.Combobox(box, width=20)
         self.f_platform.grid(row=0, column=3, padx=8, pady=2, sticky="w")
 
         ttk.Label(box, text="Genre:").grid(row=0, column=4, sticky="w")
-        self.f_genre = ttk.Entry(box, width=22)
+        self.f_genre = ttk.Combobox(box, width=18)
         self.f_genre.grid(row=0, column=5, padx=8, pady=2, sticky="w")
 
         ttk.Label(box, text="Release year:").grid(row=0, column=6, sticky="w")
-        self.f_year = ttk.Entry(box, width=10)
+        self.f_year = ttk.Combobox(box, width=8)
         self.f_year.grid(row=0, column=7, padx=8, pady=2, sticky="w")
 
-        ttk.Button(box, text="Search", command=self.search).grid(row=0, column=8, padx=8)
-        ttk.Button(box, text="Clear", command=self.clear_search).grid(row=0, column=9, padx=(0, 8))
+        ttk.Label(box, text="ESRB:").grid(row=0, column=8, sticky="w")
+        self.f_esrb = ttk.Combobox(box, width=10)
+        self.f_esrb.grid(row=0, column=9, padx=8, pady=2, sticky="w")
+
+        ttk.Button(box, text="Search", command=self.search).grid(row=0, column=10, padx=8)
+
+        # Search as you type: each keystroke restarts the debounce timer
+        self._live_after = None
+        self.search_cache = None
+        self.facet_boxes = {
+            "platform": self.f_platform, "genre": self.f_genre, "release_year": self.f_year, "esrb": self.f_esrb,
+        }
+        for entry in (self.f_title, *self.facet_boxes.values()):
+            entry.bind("<KeyRelease>", self._on_filter_key)
+            entry.bind("<Return>", lambda _e: self.search())
+        for box_ in self.facet_boxes.values():
+            box_.bind("<<ComboboxSelected>>", self._on_filter_key)
+        ttk.Button(box, text="Clear", command=self.clear_search).grid(row=0, column=11, padx=(0, 8))
+
+        self.facet_summary = tk.StringVar(value="")
+        ttk.Label(box, textvariable=self.facet_summary, justify="left").grid(
+            row=1, column=0, columnspan=12, sticky="w", pady=(6, 0)
+        )
 
         out = ttk.LabelFrame(self.tab_search, text="Results (click a row to select game)", padding=10)
         out.pack(fill="both", expand=True, pady=(10, 0))
 
+        self.search_pager = KeysetPager(SEARCH_PAGE_SIZE, search_row_key)
+        self.search_args = None
+        self.search_ref = None
+        self.search_clicks = set()
+        self._log_after = None
+        self.search_nav = self._pager_controls(out, self._search_page)
+
         self.search_tree = make_tree(out)
-        self.search_tree.bind("<<TreeviewSelect>>", self._pick_game)
+        self.search_tree.on_select(self._pick_game)
+        self.search_tree.bind("<Double-1>", self._activate_game)
+        self.search_tree.bind("<Return>", self._activate_game)
 
         self.selected_game_lbl = tk.StringVar(value="Selected game_id: (none)")
         ttk.Label(self.tab_search, textvariable=self.selected_game_lbl).pack(anchor="w", pady=(8, 0))
 
         self._set(f"Tip: Searching from {g['table']}")
+        self._refresh_facets({})
 
     def clear_search(self):
         self.f_title.delete(0, tk.END)
-        self.f_platform.delete(0, tk.END)
-        self.f_genre.delete(0, tk.END)
-        self.f_year.delete(0, tk.END)
+        for box in self.facet_boxes.values():
+            box.delete(0, tk.END)
         self.selected_game_id = None
         self.selected_game_lbl.set("Selected game_id: (none)")
+        self.search_args = None
+        self.search_cache = None
+        self._cancel_live_search()
+        self.bg.cancel("search")
+        self.search_pager.reset()
+        self._update_pager(self.search_nav, self.search_pager)
         render(self.search_tree, [])
+        self._refresh_facets({})
         self._set("Cleared search.")
 
-    def search(self):
-        g = SCHEMA["games"]
-        where = [f"{g['title']} IS NOT NULL"]
-        params = []
-
+    def _read_search_args(self, live=False):
         title = self.f_title.get().strip()
-        if title:
-            where.append(f"{g['title']} LIKE %s")
-            params.append(f"%{title}%")
-
+        if not search_term(title):
+            # Only FULLTEXT operators (e.g. "+-*"): no title filter
+            title = ""
         plat = self.f_platform.get().strip()
-        if plat:
-            where.append(f"{g['platform']} = %s")
-            params.append(plat)
-
         genre = self.f_genre.get().strip()
-        if genre:
-            where.append(f"{g['genre']} = %s")
-            params.append(genre)
+        esrb = self.f_esrb.get().strip()
 
         year = self.f_year.get().strip()
+        year_int = None
         if year:
+            if live and not (len(year) == 4 and year.isdigit()):
+                # Still typing the year; wait for all four digits
+                return None
             try:
                 year_int = int(year)
-                where.append(f"{g['release_year']} = %s")
-                params.append(year_int)
             except ValueError:
                 messagebox.showerror("Bad year", "Release year must be a whole number (e.g., 2011).")
+                return None
+
+        return {"title": title, "platform": plat, "genre": genre, "release_year": year_int, "esrb": esrb}
+
+    def search(self):
+        self._cancel_live_search()
+        args = self._read_search_args()
+        if args is not None:
+            self._start_search(args, refine=False)
+
+    def _on_filter_key(self, _event=None):
+        self._cancel_live_search()
+        self._live_after = self.after(SEARCH_DEBOUNCE_MS, self._live_search)
+
+    def _cancel_live_search(self):
+        if self._live_after is not None:
+            self.after_cancel(self._live_after)
+            self._live_after = None
+        if self._log_after is not None:
+            self.after_cancel(self._log_after[0])
+            self._log_after = None
+
+    def _live_search(self):
+        self._live_after = None
+        args = self._read_search_args(live=True)
+        # Keys that do not change the filters (arrows, shift...) do not re-query
+        if args is None or args == self.search_args:
+            return
+        self._start_search(args, refine=True)
+
+    def _start_search(self, args, refine):
+        self.search_args = args
+        self._refresh_facets(args)
+        self.search_pager.key_of = lambda row: search_row_key(row, args["title"])
+
+        if refine and self.search_cache is not None:
+            rows = refine_search_rows(*self.search_cache, args)
+            if rows is not None:
+                # Answered from the last complete result; drop any query still running
+                self.bg.cancel("search")
+                page = self.search_pager.accept(rows, "first")
+                self._update_pager(self.search_nav, self.search_pager)
+                render(self.search_tree, page)
+                self._set(f"Search complete: {count_rows(page)} rows (refined locally).")
                 return
 
-        sql = f"""
-        SELECT
-            {g['id']} AS game_id,
-            {g['title']} AS title,
-            {g['platform']} AS platform,
-            {g['genre']} AS genre,
-            {g['publisher']} AS publisher,
-            {g['developer']} AS developer,
-            {g['release_year']} AS release_year,
-            {g['source']} AS source
-        FROM {g['table']}
-        WHERE {" AND ".join(where)}
-        ORDER BY {g['title']} ASC
-        LIMIT 200
-        """
-        try:
-            self._set("Searching...")
-            rows = DBX.select(sql, tuple(params))
-            render(self.search_tree, rows)
-            self._set(f"Search complete: {count_rows(rows)} rows.")
-        except Exception as e:
+        self._search_page("first", commit=not refine)
+
+    def _search_page(self, direction, commit=True):
+        if self.search_args is None:
+            return
+        args = self.search_args
+        after, backward = self.search_pager.request(direction)
+        sql, params = build_search_query(
+            **args, limit=SEARCH_PAGE_SIZE + 1, after=after, backward=backward
+        )
+
+        def done(rows):
+            page = self.search_pager.accept(rows, direction)
+            self._update_pager(self.search_nav, self.search_pager)
+            if page is None:
+                self._set("No more results in that direction.")
+                return
+            if direction == "first" and not self.search_pager.has_next:
+                # The whole result fits on one page: later keystrokes that only
+                # narrow it are filtered from this copy instead of re-queried
+                self.search_cache = (args, page)
+            render(self.search_tree, page)
+            if commit:
+                self._log_search(args, page)
+            else:
+                self._log_when_settled(args, page)
+            self._set(f"Search complete: page {self.search_pager.page}, {count_rows(page)} rows.")
+
+        def failed(e):
             self._set("Search failed.")
             messagebox.showerror("Search failed", f"{e}\n\nSQL:\n{sql}\n\nParams:\n{params}")
 
+        self._set("Searching...")
+        # A new search or page supersedes any search still in flight
+        self.bg.submit(run_query, sql, params, key="search", on_done=done, on_error=failed)
+
+    # Facet counts: computed from FACET_INDEX bitmaps in the background
+    def _refresh_facets(self, args):
+        filters = {f: args.get(f) for f in FACETS}
+        self.bg.submit(
+            FACET_INDEX.counts, args.get("title") or None, key="facets", **filters,
+            on_done=self._show_facets,
+            on_error=lambda e: self.facet_summary.set(f"Facet counts unavailable: {e}"),
+        )
+
+    def _show_facets(self, result):
+        lines = [f"{result['total']} matching games."]
+        for facet, counts in result["facets"].items():
+            values = [v for v, _ in counts]
+            if facet == "release_year":
+                values.sort()
+            self.facet_boxes[facet].configure(values=values)
+            top = ", ".join(f"{v} ({n})" for v, n in counts[:FACET_SUMMARY_TOP])
+            more = f", +{len(counts) - FACET_SUMMARY_TOP} more" if len(counts) > FACET_SUMMARY_TOP else ""
+            lines.append(f"{FACET_LABELS[facet]}: {top or '(none)'}{more}")
+        self.facet_summary.set("\n".join(lines))
+
     def _pick_game(self, _=None):
         sel = self.search_tree.selection()
         if not sel:
@@ -551,6 +1277,48 @@ class App(tk.Tk):
         self.selected_game_lbl.set(f"Selected game_id: {self.selected_game_id}")
         self._set(f"Selected game_id={self.selected_game_id}")
 
+    def _activate_game(self, event):
+        # Only an explicit double-click / Enter on a row counts as a click;
+        # moving the selection with the arrow keys does not
+        if event.type == tk.EventType.ButtonPress and self.search_tree.identify_region(event.x, event.y) != "cell":
+            return
+        self._log_click(self.selected_game_id)
+
+    # Search telemetry: queued for the telemetry writer, never awaited.
+    # Only committed searches are logged: Enter / Search / paging, or a live
+    # query whose results stayed up for SEARCH_SETTLE_MS. Results refined
+    # locally from the last query are not new searches.
+    def _log_when_settled(self, args, page):
+        after_id = self.after(SEARCH_SETTLE_MS, self._flush_search_log)
+        self._log_after = (after_id, args, page)
+
+    def _flush_search_log(self):
+        if self._log_after is None:
+            return
+        after_id, args, page = self._log_after
+        self._log_after = None
+        self.after_cancel(after_id)
+        self._log_search(args, page)
+
+    def _log_search(self, args, page):
+        # Paging on from live results settles them first
+        self._flush_search_log()
+        self.search_ref = uuid.uuid4().hex
+        self.search_clicks = set()
+        offset = (self.search_pager.page - 1) * SEARCH_PAGE_SIZE
+        results = [(row["game_id"], offset + i + 1) for i, row in enumerate(page)]
+        self.telemetry_writer.submit(search_event(
+            self.search_ref, self.current_user_id, args["title"], args["platform"], args["genre"], results,
+        ))
+
+    def _log_click(self, game_id):
+        # A click on live results settles them
+        self._flush_search_log()
+        if game_id is None or self.search_ref is None or game_id in self.search_clicks:
+            return
+        self.search_clicks.add(game_id)
+        self.telemetry_writer.submit(click_event(self.search_ref, game_id))
+
     # Users tab (CRUD)
     def _build_users(self):
         u = SCHEMA["user"]
@@ -589,8 +1357,11 @@ class App(tk.Tk):
         out = ttk.LabelFrame(self.tab_users, text="Users (click a row to load into form)", padding=10)
         out.pack(fill="both", expand=True)
 
+        self.users_pager = KeysetPager(USERS_PAGE_SIZE, users_row_key)
+        self.users_nav = self._pager_controls(out, self._users_page)
+
         self.user_tree = make_tree(out)
-        self.user_tree.bind("<<TreeviewSelect>>", self._pick_user)
+        self.user_tree.on_select(self._pick_user)
 
         hint = (
             "Demo tip: Login as admin, then Create -> Update -> Delete (or deactivate) a user, "
@@ -609,25 +1380,25 @@ class App(tk.Tk):
         self._set("Cleared user form.")
 
     def load_users(self):
-        u = SCHEMA["user"]
-        sql = f"""
-        SELECT
-            {u['id']} AS user_id,
-            {u['username']} AS username,
-            {u['email']} AS email,
-            {u['active']} AS is_active,
-            {u['created']} AS created_at,
-            {u['updated']} AS updated_at
-        FROM {u['table']}
-        ORDER BY {u['id']} DESC
-        LIMIT 300
-        """
-        try:
-            rows = DBX.select(sql)
-            render(self.user_tree, rows)
-            self._set("Users loaded.")
-        except Exception as e:
-            messagebox.showerror("Load users failed", str(e))
+        self._users_page("first")
+
+    def _users_page(self, direction):
+        after, backward = self.users_pager.request(direction)
+        sql, params = build_users_query(limit=USERS_PAGE_SIZE + 1, after=after, backward=backward)
+
+        def done(rows):
+            page = self.users_pager.accept(rows, direction)
+            self._update_pager(self.users_nav, self.users_pager)
+            if page is None:
+                self._set("No more users in that direction.")
+                return
+            render(self.user_tree, page)
+            self._set(f"Users loaded: page {self.users_pager.page}.")
+
+        self.bg.submit(
+            run_query, sql, params, key="users", on_done=done,
+            on_error=lambda e: messagebox.showerror("Load users failed", str(e)),
+        )
 
     def _pick_user(self, _=None):
         sel = self.user_tree.selection()
@@ -656,7 +1427,6 @@ class App(tk.Tk):
         Note: For demo simplicity this does NOT require login,
         so you can bootstrap accounts. Update/Delete do require login.
         """
-        u = SCHEMA["user"]
         username = self.nu.get().strip()
         email = self.ne.get().strip().lower()
         pw = self.np.get()
@@ -665,18 +1435,18 @@ class App(tk.Tk):
             messagebox.showerror("Missing", "Username, email, and password are required.")
             return
 
-        sql = f"INSERT INTO {u['table']} ({u['username']}, {u['email']}, {u['pw']}) VALUES (%s, %s, %s)"
-        try:
-            DBX.exec(sql, (username, email, sha256(pw)))
+        def done(_):
             self._set("User created.")
             self.audit("create", "app_user", username, f"Created user {username}")
             self.np.delete(0, tk.END)
             self.load_users()
-        except Exception as e:
-            messagebox.showerror("Create failed", str(e))
+
+        self.bg.submit(
+            create_user, username, email, sha256(pw), on_done=done,
+            on_error=lambda e: messagebox.showerror("Create failed", str(e)),
+        )
 
     def update_user(self):
-        u = SCHEMA["user"]
         if not self.selected_user_id:
             messagebox.showerror("No selection", "Select a user row first.")
             return
@@ -693,32 +1463,23 @@ class App(tk.Tk):
             messagebox.showerror("Missing", "Username and email are required.")
             return
 
-        try:
-            if pw:
-                sql = f"""
-                UPDATE {u['table']}
-                SET {u['username']}=%s, {u['email']}=%s, {u['pw']}=%s, {u['active']}=%s
-                WHERE {u['id']}=%s
-                """
-                params = (username, email, sha256(pw), is_active, self.selected_user_id)
-            else:
-                sql = f"""
-                UPDATE {u['table']}
-                SET {u['username']}=%s, {u['email']}=%s, {u['active']}=%s
-                WHERE {u['id']}=%s
-                """
-                params = (username, email, is_active, self.selected_user_id)
-
-            DBX.exec(sql, params)
+        user_id = self.selected_user_id
+
+        def done(_):
             self._set("User updated.")
-            self.audit("update", "app_user", username, f"Updated user_id={self.selected_user_id}")
+            self.audit("update", "app_user", username, f"Updated user_id={user_id}")
+            if not is_active:
+                SESSIONS.revoke_user(user_id)
             self.np.delete(0, tk.END)
             self.load_users()
-        except Exception as e:
-            messagebox.showerror("Update failed", str(e))
+
+        self.bg.submit(
+            update_user, user_id, username, email, is_active, sha256(pw) if pw else None,
+            on_done=done,
+            on_error=lambda e: messagebox.showerror("Update failed", str(e)),
+        )
 
     def delete_user(self):
-        u = SCHEMA["user"]
         if not self.selected_user_id:
             messagebox.showerror("No selection", "Select a user row first.")
             return
@@ -730,26 +1491,34 @@ class App(tk.Tk):
             return
 
         username = self.nu.get().strip() or self.selected_user_id
+        user_id = self.selected_user_id
 
-        try:
-            DBX.exec(f"DELETE FROM {u['table']} WHERE {u['id']}=%s", (self.selected_user_id,))
-            self._set("User deleted.")
-            self.audit("delete", "app_user", username, f"Deleted user_id={self.selected_user_id}")
-            self.clear_user_form()
-            self.load_users()
-            return
-        except Exception:
+        def work():
             try:
-                DBX.exec(
-                    f"UPDATE {u['table']} SET {u['active']}=0 WHERE {u['id']}=%s",
-                    (self.selected_user_id,),
-                )
-                self.active_var.set(0)
+                delete_user(user_id)
+                return "deleted"
+            except Error:
+                # Rows that reference the user block a hard delete
+                deactivate_user(user_id)
+                return "deactivated"
+
+        def done(outcome):
+            SESSIONS.revoke_user(user_id)
+            if outcome == "deleted":
+                self._set("User deleted.")
+                self.audit("delete", "app_user", username, f"Deleted user_id={user_id}")
+                self.clear_user_form()
+            else:
+                if self.selected_user_id == user_id:
+                    self.active_var.set(0)
                 self._set("User deactivated (FK prevented hard delete).")
-                self.audit("deactivate", "app_user", username, f"Deactivated user_id={self.selected_user_id}")
-                self.load_users()
-            except Exception as e2:
-                messagebox.showerror("Delete failed", str(e2))
+                self.audit("deactivate", "app_user", username, f"Deactivated user_id={user_id}")
+            self.load_users()
+
+        self.bg.submit(
+            work, on_done=done,
+            on_error=lambda e: messagebox.showerror("Delete failed", str(e)),
+        )
 
 
     # Analytics tab
@@ -771,17 +1540,54 @@ class App(tk.Tk):
         ).grid(row=1, column=0, columnspan=2, sticky="w", pady=(6, 2))
         ttk.Button(top, text="Run", command=self.analytics_sales_by_esrb).grid(row=1, column=2, padx=4, pady=2)
 
+        # In-memory drill-down over bg_sales_game / bg_sales_record
+        self.drill_view = None
+        self.drill_filters = {}
+        if ANALYTICS is not None:
+            drill = ttk.Frame(top)
+            drill.grid(row=2, column=0, columnspan=3, sticky="w", pady=(6, 2))
+            ttk.Label(drill, text="Drill-down (in memory) by:").pack(side="left")
+            self.drill_dim = ttk.Combobox(drill, width=12, state="readonly", values=DRILL_DIMENSIONS)
+            self.drill_dim.set("genre")
+            self.drill_dim.pack(side="left", padx=(4, 8))
+            ttk.Label(drill, text="sales:").pack(side="left")
+            self.drill_measure = ttk.Combobox(drill, width=8, state="readonly", values=DRILL_MEASURES)
+            self.drill_measure.set("global")
+            self.drill_measure.pack(side="left", padx=(4, 8))
+            ttk.Button(drill, text="Run", command=self.analytics_drill).pack(side="left", padx=4)
+            ttk.Button(drill, text="Clear filters", command=self.clear_drill).pack(side="left", padx=4)
+            self.drill_path = tk.StringVar(value="Filters: (none) - double-click a row to drill in")
+            ttk.Label(top, textvariable=self.drill_path).grid(row=3, column=0, columnspan=3, sticky="w")
+
+        # Lookups on the pre-aggregated bg_sales_cube
+        cube = ttk.Frame(top)
+        cube.grid(row=4, column=0, columnspan=3, sticky="w", pady=(6, 2))
+        ttk.Label(cube, text="Sales cube:").pack(side="left")
+        self.cube_genre = ttk.Combobox(cube, width=18, state="readonly", values=(CUBE_ALL_LABEL,))
+        self.cube_genre.set(CUBE_ALL_LABEL)
+        self.cube_genre.pack(side="left", padx=(4, 4))
+        ttk.Button(cube, text="Trend by year", command=self.analytics_trend_by_year).pack(side="left", padx=4)
+        ttk.Button(cube, text="Genre share by region", command=self.analytics_genre_share).pack(side="left", padx=4)
+        self.bg.submit(
+            cube_slice, ("genre",), key="cube_genres",
+            on_done=lambda rows: self.cube_genre.configure(
+                values=(CUBE_ALL_LABEL,) + tuple(r["genre"] for r in rows)
+            ),
+            on_error=lambda e: None,
+        )
 
         out = ttk.LabelFrame(self.tab_analytics, text="Analytics results", padding=10)
         out.pack(fill="both", expand=True, pady=(10, 0))
         self.analytics_tree = make_tree(out)
+        self.analytics_tree.bind("<Double-1>", self._drill_into)
 
         ttk.Label(
             self.tab_analytics,
             text=(
                 "These views demonstrate analytical SQL over Kaggle data + app tables.\n"
-                "- Top N by SUM(sales_millions)\n"
-                "- Sales grouped by ESRB rating via title match\n"
+                "- Top N by global sales (pre-aggregated in bg_sales_summary)\n"
+                "- Sales grouped by ESRB rating via app_game_link\n"
+                "- Trend by year and genre share by region, read from the bg_sales_cube rollup\n"
                 "- Top rated games from app_game_review joined to bg_meta_game"
             ),
         ).pack(anchor="w", pady=(6, 0))
@@ -799,47 +1605,102 @@ class App(tk.Tk):
             messagebox.showerror("Bad N", "Top N must be a positive whole number.")
             return
 
-        sql = """
-        SELECT
-            g.sales_game_id,
-            g.title,
-            g.platform,
-            SUM(r.sales_millions) AS total_sales_millions
-        FROM bg_sales_game AS g
-        JOIN bg_sales_record AS r
-          ON g.sales_game_id = r.sales_game_id
-        GROUP BY g.sales_game_id, g.title, g.platform
-        ORDER BY total_sales_millions DESC
-        LIMIT %s
-        """
-        try:
-            rows = DBX.select(sql, (n,))
+        def done(rows):
+            self.drill_view = None
             render(self.analytics_tree, rows)
             self._set(f"Top {n} games by global sales: {count_rows(rows)} rows.")
-        except Exception as e:
-            messagebox.showerror("Analytics error", str(e))
+
+        self.bg.submit(
+            run_query, TOP_SALES_SQL, (n,), cache=True, key="analytics", on_done=done,
+            on_error=lambda e: messagebox.showerror("Analytics error", str(e)),
+        )
 
     def analytics_sales_by_esrb(self):
-        # Join ESRB and sales directly by title 
-        sql = """
-        SELECT
-            e.esrb AS esrb_rating,
-            COUNT(DISTINCT g.sales_game_id) AS num_games,
-            SUM(r.sales_millions) AS total_sales_millions
-        FROM bg_esrb_game AS e
-        JOIN bg_sales_game AS g
-          ON e.title = g.title
-        JOIN bg_sales_record AS r
-          ON r.sales_game_id = g.sales_game_id
-        GROUP BY e.esrb
-        ORDER BY total_sales_millions DESC;
-        """
-        try:
-            rows = DBX.select(sql)
+        def done(rows):
+            self.drill_view = None
             render(self.analytics_tree, rows)
             self._set(f"Sales by ESRB rating: {count_rows(rows)} rows.")
-        except Exception as e:
-            messagebox.showerror("Analytics error", str(e))
+
+        self.bg.submit(
+            run_query, SALES_BY_ESRB_SQL, cache=True, key="analytics", on_done=done,
+            on_error=lambda e: messagebox.showerror("Analytics error", str(e)),
+        )
+
+    def analytics_trend_by_year(self):
+        genre = self.cube_genre.get()
+        genre = None if genre in ("", CUBE_ALL_LABEL, ALL) else genre
+
+        def done(rows):
+            self.drill_view = None
+            render(self.analytics_tree, rows)
+            self._set(f"Sales by release year ({genre or 'all genres'}): {count_rows(rows)} rows.")
+
+        self.bg.submit(
+            trend_by_year, genre=genre, key="analytics", on_done=done,
+            on_error=lambda e: messagebox.showerror("Analytics error", str(e)),
+        )
+
+    def analytics_genre_share(self):
+        def done(rows):
+            self.drill_view = None
+            render(self.analytics_tree, rows)
+            self._set(f"Genre share of regional sales: {count_rows(rows)} rows.")
+
+        self.bg.submit(
+            genre_share_by_region, key="analytics", on_done=done,
+            on_error=lambda e: messagebox.showerror("Analytics error", str(e)),
+        )
+
+    def analytics_drill(self):
+        dim = self.drill_dim.get()
+        measure = self.drill_measure.get()
+        filters = dict(self.drill_filters)
+
+        def work():
+            # The first call loads the frame from MySQL; later ones stay in memory
+            t0 = time.perf_counter()
+            if dim == "title":
+                rows = ANALYTICS.top_n(DRILL_TOP, measure, filters=filters)
+            else:
+                rows = ANALYTICS.group_by(dim, measure, filters=filters, top=DRILL_TOP)
+            return rows, time.perf_counter() - t0
+
+        def done(result):
+            rows, seconds = result
+            self.drill_view = dim
+            render(self.analytics_tree, rows)
+            self._set(f"Drill-down by {dim}: {len(rows)} rows in {1000 * seconds:.1f} ms.")
+
+        self.bg.submit(
+            work, key="analytics", on_done=done,
+            on_error=lambda e: messagebox.showerror("Analytics error", str(e)),
+        )
+
+    def _drill_into(self, _=None):
+        dim = self.drill_view
+        if dim not in DRILL_NEXT:
+            return
+        sel = self.analytics_tree.selection()
+        if not sel:
+            return
+        cols = list(self.analytics_tree["columns"])
+        vals = self.analytics_tree.item(sel[0]).get("values") or []
+        if dim not in cols or len(vals) <= cols.index(dim):
+            return
+        value = vals[cols.index(dim)]
+        self.drill_filters[dim] = int(float(value)) if dim == "release_year" else str(value)
+        self.drill_dim.set(DRILL_NEXT[dim])
+        self._show_drill_path()
+        self.analytics_drill()
+
+    def clear_drill(self):
+        self.drill_filters = {}
+        self._show_drill_path()
+        self.analytics_drill()
+
+    def _show_drill_path(self):
+        path = " > ".join(f"{k}={v}" for k, v in self.drill_filters.items()) or "(none)"
+        self.drill_path.set(f"Filters: {path} - double-click a row to drill in")
 
     
     # Console tab
@@ -860,13 +1721,34 @@ class App(tk.Tk):
         btns = ttk.Frame(self.tab_console)
         btns.pack(fill="x")
 
+        self.console_cancel_btn = ttk.Button(btns, text="Cancel", state="disabled", command=self.cancel_select)
+        self.console_cancel_btn.pack(side="right", padx=(6, 0))
         ttk.Button(btns, text="Run SELECT", command=self.run_select).pack(side="right")
         ttk.Button(btns, text="Load Users Verify", command=self.load_verify_users_query).pack(side="left")
 
+        ttk.Label(btns, text="Row cap:").pack(side="left", padx=(16, 4))
+        self.console_cap = ttk.Entry(btns, width=10)
+        self.console_cap.insert(0, str(CONSOLE_CONFIG["max_rows"]))
+        self.console_cap.pack(side="left")
+        ttk.Label(btns, text="Timeout (s):").pack(side="left", padx=(12, 4))
+        self.console_timeout = ttk.Entry(btns, width=6)
+        self.console_timeout.insert(0, str(CONSOLE_CONFIG["timeout_s"]))
+        self.console_timeout.pack(side="left")
+
+        self.console_stats = tk.StringVar(value="")
+        ttk.Label(btns, textvariable=self.console_stats).pack(side="left", padx=16)
+
         out = ttk.LabelFrame(self.tab_console, text="Results", padding=10)
         out.pack(fill="both", expand=True, pady=(10, 0))
         self.console_tree = make_tree(out)
 
+        # Worker threads queue batches here; _poll_console renders them on the Tk loop.
+        # A paused console stream holds its worker, so it gets a thread of its own
+        self.console_bg = BackgroundDB(self, workers=1)
+        self.console_query = None
+        self.console_batches = queue.Queue()
+        self.after(CONSOLE_CONFIG["poll_ms"], self._poll_console)
+
     def load_verify_users_query(self):
         self.sql_text.delete("1.0", tk.END)
         self.sql_text.insert(
@@ -889,37 +1771,232 @@ class App(tk.Tk):
             return
 
         try:
-            rows = DBX.select(sql)
-            render(self.console_tree, rows)
-            self._set(f"Console ran: {count_rows(rows)} rows.")
-        except Exception as e:
+            max_rows = int(self.console_cap.get().strip() or CONSOLE_CONFIG["max_rows"])
+            timeout_s = float(self.console_timeout.get().strip() or 0)
+        except ValueError:
+            messagebox.showerror("Bad limits", "Row cap and timeout must be numbers.")
+            return
+
+        self.cancel_select()
+        sq = StreamingQuery(
+            sql,
+            batch_size=CONSOLE_CONFIG["batch_size"],
+            max_rows=min(max(max_rows, 1), self.console_tree.max_rows),
+            timeout_ms=int(max(timeout_s, 0) * 1000),
+            demand=True,
+            idle_timeout_s=CONSOLE_CONFIG["idle_s"],
+        )
+        self.console_query = sq
+        # Fetch one batch up front, then only as the grid scrolls toward the end
+        sq.want(CONSOLE_CONFIG["batch_size"])
+        self.console_tree.on_demand(lambda rows: sq.want(rows + CONSOLE_CONFIG["batch_size"]))
+
+        def on_batch(cols, rows):
+            # Worker thread: hand the batch over to the Tk loop
+            self.console_batches.put((sq, cols, rows))
+
+        def failed(e):
+            self._console_finished(sq)
             messagebox.showerror("SQL error", str(e))
 
-    # DB check helper
-    def db_check(self):
+        self.console_cancel_btn.configure(state="normal")
+        self.console_stats.set("")
+        self._set("Running query...")
+        self.console_bg.submit(
+            sq.run, on_batch, key="console",
+            on_done=lambda _: self._console_finished(sq), on_error=failed,
+        )
+
+    def cancel_select(self):
+        sq = self.console_query
+        if sq is None or sq.finished is not None:
+            return
+        self._set("Cancelling query...")
+        # KILL QUERY needs its own connection, so keep it off the Tk thread
+        self.bg.submit(sq.cancel)
+
+    def _render_console_batches(self):
+        while True:
+            try:
+                sq, cols, rows = self.console_batches.get_nowait()
+            except queue.Empty:
+                return
+            if sq is not self.console_query:
+                continue  # left over from a replaced query
+            if rows:
+                self.console_tree.append_rows(rows)
+            else:
+                self.console_tree.begin(cols)
+
+    def _poll_console(self):
+        self._render_console_batches()
+        sq = self.console_query
+        if sq is not None and sq.started is not None and sq.finished is None:
+            more = " - scroll for more" if sq.waiting else ""
+            self.console_stats.set(self._console_rate(sq) + more)
+        self.after(CONSOLE_CONFIG["poll_ms"], self._poll_console)
+
+    @staticmethod
+    def _console_rate(sq):
+        return f"{sq.rows:,} rows in {sq.elapsed():.2f} s ({sq.rate():,.0f} rows/s)"
+
+    def _console_finished(self, sq):
+        if sq is not self.console_query:
+            return
+        self._render_console_batches()
+        self.console_cancel_btn.configure(state="disabled")
+        self.console_stats.set(self._console_rate(sq))
+        notes = {
+            "capped": " Stopped at the row cap.",
+            "cancelled": " Cancelled.",
+            "timeout": " Stopped by the server timeout.",
+            "idle": " Stopped after waiting too long for a scroll.",
+        }
+        self._set(f"Console ran: {sq.rows:,} rows.{notes.get(sq.status, '')}")
+
+    # Perf tab: reads QUERY_STATS in memory, never queries MySQL itself
+    def _build_perf(self):
+        top = ttk.Frame(self.tab_perf)
+        top.pack(fill="x")
+
+        ttk.Button(top, text="Refresh", command=self.refresh_perf).pack(side="left")
+        ttk.Button(top, text="Reset", command=self.reset_perf).pack(side="left", padx=(6, 0))
+
+        ttk.Label(top, text="Sort by:").pack(side="left", padx=(16, 4))
+        self.perf_sort = ttk.Combobox(
+            top, width=12, state="readonly",
+            values=["total_ms", "p95_ms", "p99_ms", "max_ms", "avg_ms", "calls", "rows", "errors"],
+        )
+        self.perf_sort.set("total_ms")
+        self.perf_sort.pack(side="left")
+        self.perf_sort.bind("<<ComboboxSelected>>", lambda e: self.refresh_perf())
+
+        ttk.Label(top, text="Slow (ms):").pack(side="left", padx=(16, 4))
+        self.perf_slow_ms = ttk.Entry(top, width=7)
+        self.perf_slow_ms.insert(0, f"{QUERY_STATS.slow_ms:g}")
+        self.perf_slow_ms.pack(side="left")
+        self.perf_slow_ms.bind("<Return>", lambda e: self.refresh_perf())
+
+        self.perf_explain = tk.BooleanVar(value=QUERY_STATS.explain_slow)
+        ttk.Checkbutton(
+            top, text="Capture EXPLAIN for slow queries", variable=self.perf_explain,
+            command=lambda: setattr(QUERY_STATS, "explain_slow", self.perf_explain.get()),
+        ).pack(side="left", padx=(16, 0))
+
+        self.perf_since = tk.StringVar(value="")
+        ttk.Label(top, textvariable=self.perf_since).pack(side="right")
+
+        panes = ttk.Panedwindow(self.tab_perf, orient="vertical")
+        panes.pack(fill="both", expand=True, pady=(10, 0))
+
+        by_fp = ttk.LabelFrame(panes, text="Queries by fingerprint (click for histogram / plan)", padding=6)
+        slow = ttk.LabelFrame(panes, text="Slow query log (newest first)", padding=6)
+        detail = ttk.LabelFrame(panes, text="Details", padding=6)
+        panes.add(by_fp, weight=3)
+        panes.add(slow, weight=2)
+        panes.add(detail, weight=2)
+
+        self.perf_tree = make_tree(by_fp)
+        self.perf_tree.on_select(self._pick_perf_query)
+        self.slow_tree = make_tree(slow)
+        self.slow_tree.on_select(self._pick_slow_query)
+        self.perf_detail = tk.Text(detail, height=8, wrap="none")
+        self.perf_detail.pack(fill="both", expand=True)
+
+        self.perf_slow = []
+        self.refresh_perf()
+
+    def refresh_perf(self):
         try:
-            db = DBX.select("SELECT DATABASE() AS db")
-            n_users = DBX.select("SELECT COUNT(*) AS n FROM app_user")
-            n_games = DBX.select("SELECT COUNT(*) AS n FROM bg_sales_game")
-
-            def one(rows):
-                if not rows:
-                    return None
-                r0 = rows[0]
-                if isinstance(r0, dict):
-                    return list(r0.values())[0]
-                return r0[0]
+            QUERY_STATS.slow_ms = float(self.perf_slow_ms.get().strip())
+        except ValueError:
+            messagebox.showerror("Bad threshold", "Slow threshold must be a number of milliseconds.")
+            return
+
+        rows = perf_report(sort=self.perf_sort.get())
+        cols = ["fingerprint", "calls", "cache_hits", "errors", "total_ms", "avg_ms", "p50_ms", "p95_ms",
+                "p99_ms", "max_ms", "connect_ms", "execute_ms", "fetch_ms", "rows", "explained", "sql"]
+        self.perf_tree.show((cols, [tuple(r[c] for c in cols) for r in rows]))
+
+        self.perf_slow = slow_queries()
+        slow_cols = ["#", "at", "fingerprint", "total_ms", "connect_ms", "execute_ms", "fetch_ms", "rows", "sql"]
+        self.slow_tree.show((
+            slow_cols,
+            [(i,) + tuple(e[c] for c in slow_cols[1:]) for i, e in enumerate(self.perf_slow)],
+        ))
+        self.perf_since.set(f"Since {QUERY_STATS.since:%Y-%m-%d %H:%M:%S}")
+        self._set(f"Perf: {len(rows)} query shapes, {len(self.perf_slow)} slow calls logged.")
+
+    def reset_perf(self):
+        reset_perf()
+        self._show_perf_detail("")
+        self.refresh_perf()
+
+    def _show_perf_detail(self, text):
+        self.perf_detail.delete("1.0", tk.END)
+        self.perf_detail.insert("1.0", text)
+
+    def _pick_perf_query(self, _=None):
+        sel = self.perf_tree.selection()
+        if not sel:
+            return
+        vals = self.perf_tree.item(sel[0]).get("values") or []
+        if not vals:
+            return
+        fp_id = str(vals[0])
+        lines = [f"{label:>10}  {n}" for label, n in QUERY_STATS.histogram(fp_id)]
+        plan = QUERY_STATS.explain_for(fp_id)
+        text = "Latency histogram:\n" + "\n".join(lines)
+        if plan is not None:
+            text += "\n\nEXPLAIN FORMAT=JSON (last slow call):\n" + json.dumps(plan, indent=2, default=str)
+        self._show_perf_detail(text)
+
+    def _pick_slow_query(self, _=None):
+        sel = self.slow_tree.selection()
+        if not sel:
+            return
+        vals = self.slow_tree.item(sel[0]).get("values") or []
+        if not vals or int(vals[0]) >= len(self.perf_slow):
+            return
+        entry = self.perf_slow[int(vals[0])]
+        text = f"{entry['sql']}\n\nparams: {', '.join(entry['params']) or '(none)'}"
+        if entry["error"]:
+            text += f"\nerror: {entry['error']}"
+        if entry["explain"] is not None:
+            text += "\n\nEXPLAIN FORMAT=JSON:\n" + json.dumps(entry["explain"], indent=2, default=str)
+        self._show_perf_detail(text)
 
+    # DB check helper
+    def db_check(self):
+        def done(result):
+            db, n_users, n_games = result
+            pool = pool_stats()
+            cache = cache_stats()
+            sessions = SESSIONS.snapshot()
+            audit = self.audit_writer.snapshot()
             msg = (
-                f"DATABASE(): {one(db)}\n"
-                f"app_user rows: {one(n_users)}\n"
-                f"bg_sales_game rows: {one(n_games)}\n\n"
-                f"run_query supports fetch kw: {DBX.has_fetch}\n"
-                f"run_query supports commit kw: {DBX.has_commit}\n"
+                f"DATABASE(): {db}\n"
+                f"app_user rows: {n_users}\n"
+                f"bg_sales_game rows: {n_games}\n\n"
+                f"Pool: {pool['open']} open / {pool['idle']} idle, "
+                f"{pool['checkouts']} checkouts, {pool['waits']} waits, "
+                f"{pool['connects']} connects (avg {pool['avg_connect_ms']} ms)\n"
+                f"Prepared statements: {pool['statements']} cached, "
+                f"{pool['prepares']} prepares / {pool['statement_reuses']} reuses\n"
+                f"Sessions: {sessions['live']} live, {sessions['memory_hits']} memory hits / "
+                f"{sessions['db_lookups']} DB lookups, {sessions['pending_revocations']} revocations queued\n"
+                f"Audit log: {audit['written']} written in {audit['batches']} batches, {audit['queued']} queued, "
+                f"{audit['dropped']} dropped, {audit['lost']} lost"
+                f"{' (last error: ' + audit['last_error'] + ')' if audit['last_error'] else ''}\n"
+                f"Cache: {cache['entries']} entries, {cache['hits']} hits / {cache['misses']} misses, "
+                f"{cache['invalidated']} invalidated\n"
             )
             messagebox.showinfo("DB Check", msg)
-        except Exception as e:
-            messagebox.showerror("DB Check failed", str(e))
+
+        self.bg.submit(
+            db_overview, key="db_check", on_done=done,
+            on_error=lambda e: messagebox.showerror("DB Check failed", str(e)),
+        )
 
 
 if __name__ == "__main__":
@@ -927,9 +2004,8 @@ if __name__ == "__main__":
     login = LoginWindow()
     login.mainloop()
 
-    if getattr(login, "current_user_id", None):
-        app = App(
-            current_user_id=login.current_user_id,
-            current_username=login.current_username,
-        )
-        app.mainloop()
\ No newline at end of file
+    if login.session is not None:
+        app = App(session=login.session)
+        app.mainloop()
+    else:
+        SESSIONS.stop()
\ No newline at end of file
@@ -0,0 +1,257 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dataAccess import data_version, stream_query
+
+
+ANALYTICS_CONFIG = {
+    "check_interval": 30.0,
+    "batch_size": 50_000,
+}
+
+# Region keys, matched like the bg_sales_summary columns in gameApp.py
+REGIONS = {
+    "na": ("na_sales", "north_america"),
+    "eu": ("eu_sales", "europe"),
+    "jp": ("jp_sales", "japan"),
+    "other": ("other_sales", "other"),
+}
+REGION_OF = {name: key for key, names in REGIONS.items() for name in names}
+
+DIMENSIONS = ("genre", "platform", "publisher", "release_year", "region", "title")
+MEASURES = ("global", "na", "eu", "jp", "other")
+AGGREGATES = {"sum": "sum", "avg": "mean", "max": "max"}
+CATEGORICAL = ("platform", "genre", "publisher")
+
+
+def _frame(sql, columns, batch_size):
+    """Read a SELECT batch by batch into one DataFrame."""
+    parts = [
+        pd.DataFrame.from_records(batch, columns=columns)
+        for _, batch in stream_query(sql, batch_size=batch_size)
+        if batch
+    ]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=columns)
+
+
+def build_games_frame(games, records):
+    """
+    One row per sales game with categorical dimensions and float sales
+    columns (na, eu, jp, other, global). global follows bg_sales_summary:
+    the Global_Sales record if there is one, else the sum of all records.
+    """
+    games = games.copy()
+    for col in CATEGORICAL:
+        games[col] = games[col].astype("category")
+    games["release_year"] = pd.to_numeric(games["release_year"], errors="coerce")
+    games = games.set_index("sales_game_id")
+
+    region = records["region"].astype(str).str.lower()
+    sales = pd.to_numeric(records["sales_millions"], errors="coerce").fillna(0.0).astype(float)
+    ids = records["sales_game_id"]
+
+    key = region.map(REGION_OF)
+    regional = (
+        pd.DataFrame({"id": ids, "key": key, "sales": sales})
+        .dropna(subset=["key"])
+        .groupby(["id", "key"])["sales"].sum()
+        .unstack(fill_value=0.0)
+    )
+    is_global = region.str.contains("global", regex=False).to_numpy()
+    total = sales.groupby(ids).sum()
+    glob = sales[is_global].groupby(ids[is_global]).max()
+
+    for col in REGIONS:
+        series = regional[col] if col in regional else pd.Series(dtype=float)
+        games[col] = series.reindex(games.index).fillna(0.0).to_numpy(dtype=float)
+    games["global"] = glob.reindex(games.index).fillna(total.reindex(games.index)).fillna(0.0).to_numpy(dtype=float)
+    return games.reset_index()
+
+
+class SalesAnalytics:
+    """
+    bg_sales_game + bg_sales_record held in memory as a pandas frame with
+    categorical platform / genre / publisher, so group-by, top-N and filter
+    queries run as vectorized kernels instead of SQL round trips.
+
+    Every query first checks app_data_version (at most once per
+    check_interval seconds) and reloads when loadDB.py or synthData.py
+    has bumped it. Queries are safe from several threads; a reload
+    builds a new frame and swaps it in.
+    """
+
+    def __init__(self, check_interval=30.0, batch_size=50_000):
+        self.check_interval = check_interval
+        self.batch_size = batch_size
+        self._games = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "load_seconds": 0.0, "rows": 0, "queries": 0, "version": None}
+
+    # Loading
+    def load(self):
+        t0 = time.perf_counter()
+        version = data_version("sales")
+        games = _frame(
+            "SELECT sales_game_id, title, platform, genre, publisher, release_year FROM bg_sales_game",
+            ["sales_game_id", "title", "platform", "genre", "publisher", "release_year"],
+            self.batch_size,
+        )
+        records = _frame(
+            "SELECT sales_game_id, region, sales_millions FROM bg_sales_record",
+            ["sales_game_id", "region", "sales_millions"],
+            self.batch_size,
+        )
+        frame = build_games_frame(games, records)
+        self._games = frame
+        self._version = version
+        self._checked_at = time.monotonic()
+        self.stats["loads"] += 1
+        self.stats["load_seconds"] = round(time.perf_counter() - t0, 3)
+        self.stats["rows"] = len(frame)
+        self.stats["version"] = version
+        return frame
+
+    def refresh(self, force=False):
+        """Reload if the data version moved (checked at most every check_interval). Returns True on reload."""
+        with self._lock:
+            if self._games is None or force:
+                self.load()
+                return True
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return False
+            self._checked_at = time.monotonic()
+            if data_version("sales") == self._version:
+                return False
+            self.load()
+            return True
+
+    def frame(self):
+        self.refresh()
+        self.stats["queries"] += 1
+        return self._games
+
+    # Queries
+    @staticmethod
+    def _mask(games, filters):
+        """
+        Boolean mask for {dim: value | [values] | (lo, hi) for release_year |
+        substring for title}. region picks sales columns rather than rows, so
+        group_by and top_n apply it.
+        """
+        mask = np.ones(len(games), dtype=bool)
+        for dim, want in (filters or {}).items():
+            if want is None or dim == "region":
+                continue
+            col = games[dim]
+            if dim == "release_year":
+                years = col.to_numpy(dtype=float)
+                if isinstance(want, tuple):
+                    lo, hi = want
+                    mask &= (years >= (lo if lo is not None else -np.inf)) & (years <= (hi if hi is not None else np.inf))
+                else:
+                    mask &= np.isin(years, np.atleast_1d(want).astype(float))
+            elif dim == "title":
+                mask &= col.str.contains(str(want), case=False, regex=False, na=False).to_numpy()
+            else:
+                values = want if isinstance(want, (list, set)) else [want]
+                codes = col.cat.categories.get_indexer(list(values))
+                mask &= np.isin(col.cat.codes.to_numpy(), codes[codes >= 0])
+        return mask
+
+    def filter(self, filters=None):
+        games = self.frame()
+        return games[self._mask(games, filters)]
+
+    @staticmethod
+    def _regions(filters):
+        """The regions named by filters={"region": ...}, or None."""
+        regions = (filters or {}).get("region")
+        if not regions:
+            return None
+        return [regions] if isinstance(regions, str) else list(regions)
+
+    def group_by(self, dims, measure="global", agg="sum", filters=None, top=None):
+        """
+        Aggregate `measure` over `dims` (any of DIMENSIONS) and return a
+        list of dicts, largest first: the dims, num_games and the value.
+        Grouping by region spreads each game over its regional columns
+        instead of using measure. A region filter without region in dims
+        replaces measure with the sum of the selected regions' columns.
+        Whenever regions are involved, only games with sales there count,
+        for num_games and the aggregate alike.
+        """
+        dims = [dims] if isinstance(dims, str) else list(dims)
+        games = self.filter(filters)
+        regions = self._regions(filters)
+
+        if "region" in dims:
+            other = [d for d in dims if d != "region"]
+            data = games.melt(id_vars=other, value_vars=regions or list(REGIONS),
+                              var_name="region", value_name="sales")
+            data = data[data["sales"] > 0]
+            data["region"] = data["region"].astype("category")
+            prefix = ""
+        elif regions:
+            sales = games[regions].sum(axis=1)
+            data = games.assign(sales=sales)[sales > 0]
+            prefix = "_".join(regions) + "_"
+        else:
+            data = games.assign(sales=games[measure])
+            prefix = f"{measure}_"
+        value_col = f"{prefix}sales_millions" if agg == "sum" else f"{agg}_{prefix}sales_millions"
+
+        grouped = data.groupby(dims, observed=True, sort=False).agg(
+            num_games=("sales", "size"), value=("sales", AGGREGATES[agg]),
+        )
+        grouped = grouped.sort_values("value", ascending=False)
+        if top:
+            grouped = grouped.head(top)
+        out = grouped.reset_index().rename(columns={"value": value_col})
+        out[value_col] = out[value_col].round(3)
+        return _records(out)
+
+    def top_n(self, n=10, measure="global", filters=None):
+        """Top n games by measure, or by the selected regions' sales when filters has a region."""
+        games = self.filter(filters)
+        regions = self._regions(filters)
+        if regions:
+            measure = "_".join(regions)
+            games = games.assign(**{measure: games[regions].sum(axis=1)})
+            games = games[games[measure] > 0]
+        top = games.nlargest(n, measure)
+        cols = ["sales_game_id", "title", "platform", "release_year", "genre", "publisher", measure]
+        out = top[cols].rename(columns={measure: f"{measure}_sales_millions"})
+        return _records(out)
+
+    def values(self, dim):
+        """Distinct values of a categorical dimension, for pickers."""
+        games = self.frame()
+        if dim == "release_year":
+            return sorted(int(y) for y in games[dim].dropna().unique())
+        if dim == "region":
+            return list(REGIONS)
+        return sorted(str(v) for v in games[dim].cat.categories)
+
+    def snapshot(self):
+        return dict(self.stats)
+
+
+def _records(frame):
+    """DataFrame -> list of plain dicts (numpy scalars and NaN converted) for print_table / the GUI grid."""
+    out = []
+    for row in frame.astype(object).where(frame.notna(), None).to_dict("records"):
+        clean = {}
+        for k, v in row.items():
+            if isinstance(v, float) and k == "release_year":
+                v = int(v)
+            clean[k] = v.item() if isinstance(v, np.generic) else v
+        out.append(clean)
+    return out
+
+
+ANALYTICS = SalesAnalytics(**ANALYTICS_CONFIG)
@@ -0,0 +1,148 @@
+import queue
+import threading
+import time
+
+from mysql.connector import Error
+
+
+class BatchWriter:
+    """
+    Buffers rows in a bounded queue and hands them to flush_fn(rows) in
+    batches from a background thread, so callers never wait on MySQL.
+
+    A batch is written once batch_size rows are queued or flush_interval
+    seconds after its first row arrived, whichever comes first. When the
+    queue is full, submit() drops the row and counts it instead of blocking
+    (backpressure is visible in snapshot()). A batch that hits a MySQL error
+    is retried up to max_retries times before it is counted as lost; any
+    other exception from flush_fn loses the batch at once. Either way the
+    writer keeps running.
+    """
+
+    def __init__(self, flush_fn, name="writer", max_queue=10_000, batch_size=200,
+                 flush_interval=2.0, max_retries=3):
+        self.flush_fn = flush_fn
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._flush_now = threading.Event()
+        self._stopping = threading.Event()
+        self._idle = threading.Condition()
+        self._pending = 0
+        self.stats = {
+            "submitted": 0,
+            "written": 0,
+            "dropped": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "lost": 0,
+            "high_water": 0,
+            "last_error": None,
+        }
+        self._thread = threading.Thread(target=self._run, name=f"gamesearch-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, row):
+        """Queue one row; returns False (and counts a drop) if the queue is full or closed."""
+        if self._stopping.is_set():
+            with self._idle:
+                self.stats["dropped"] += 1
+            return False
+        with self._idle:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self.stats["dropped"] += 1
+                return False
+            self._pending += 1
+            self.stats["submitted"] += 1
+            self.stats["high_water"] = max(self.stats["high_water"], self._queue.qsize())
+        return True
+
+    def flush(self, wait=True, timeout=5.0):
+        """Write whatever is queued now. With wait=True, block until it is written (or timeout)."""
+        self._flush_now.set()
+        if not wait:
+            return True
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        """Flush pending rows and stop the writer thread."""
+        flushed = self.flush(wait=True, timeout=timeout)
+        self._stopping.set()
+        self._flush_now.set()
+        self._thread.join(timeout=1.0)
+        return flushed
+
+    def _take_batch(self):
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            if self._flush_now.is_set():
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, 0.05)))
+            except queue.Empty:
+                pass
+        return batch
+
+    def _write(self, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.flush_fn(batch)
+                return True
+            except Exception as e:
+                # Anything escaping here would end the thread and strand _pending
+                with self._idle:
+                    self.stats["failed_batches"] += 1
+                    self.stats["last_error"] = f"{type(e).__name__}: {e}"
+                if not isinstance(e, Error) or self._stopping.is_set():
+                    # Only database errors are worth retrying
+                    break
+                time.sleep(min(0.5 * 2 ** attempt, 5.0))
+        return False
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                ok = self._write(batch)
+                with self._idle:
+                    self._pending -= len(batch)
+                    if ok:
+                        self.stats["written"] += len(batch)
+                        self.stats["batches"] += 1
+                    else:
+                        self.stats["lost"] += len(batch)
+                    self._idle.notify_all()
+            if self._queue.empty():
+                self._flush_now.clear()
+                if self._stopping.is_set():
+                    return
+
+    def snapshot(self):
+        with self._idle:
+            snap = dict(self.stats)
+            snap["queued"] = self._pending
+        return snap
@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from mysql.connector import Error
+
+from dataAccess import fetch_rows, fetch_value
+from explainCheck import shipped_queries
+from gameApp import print_table
+
+
+REPORT_DIR = "benchmarks"
+
+# Row counts recorded with every report, so runs at different scales are not compared by mistake
+COUNTED_TABLES = [
+    "bg_sales_game", "bg_sales_record", "bg_esrb_game", "bg_meta_game", "app_game_link",
+    "app_user", "app_game_review", "app_review_vote", "app_favorite_item",
+]
+
+# A query regresses when its median is this much slower than the baseline
+# and also slower by more than NOISE_FLOOR_MS (sub-millisecond jitter is ignored)
+REGRESSION_THRESHOLD = 0.25
+NOISE_FLOOR_MS = 1.0
+
+
+def _percentile(sorted_ms, p):
+    if not sorted_ms:
+        return 0.0
+    i = min(len(sorted_ms) - 1, max(0, round(p / 100 * (len(sorted_ms) - 1))))
+    return sorted_ms[i]
+
+
+def time_query(sql, params, repeat=5, warmup=1):
+    """Run sql warmup + repeat times (never from QUERY_CACHE) and summarize the timed runs in ms."""
+    for _ in range(warmup):
+        fetch_rows(sql, params)
+    samples = []
+    rows = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        rows = len(fetch_rows(sql, params))
+        samples.append(1000 * (time.perf_counter() - t0))
+    samples.sort()
+    return {
+        "rows": rows,
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p95_ms": round(_percentile(samples, 95), 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def table_counts():
+    return {t: fetch_value(f"SELECT COUNT(*) FROM {t}") for t in COUNTED_TABLES}
+
+
+def run_benchmark(repeat=5, warmup=1, only=None, log=print):
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "mysql_version": fetch_value("SELECT VERSION()"),
+        "python_version": platform.python_version(),
+        "repeat": repeat,
+        "warmup": warmup,
+        "tables": table_counts(),
+        "queries": {},
+    }
+    for name, sql, params, _ in shipped_queries():
+        if only and only not in name:
+            continue
+        try:
+            result = time_query(sql, params, repeat, warmup)
+        except Error as e:
+            result = {"error": str(e)}
+        report["queries"][name] = result
+        log(f"  {name}: {result.get('median_ms', 'ERROR')} ms")
+    return report
+
+
+def compare(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """Rows for print_table plus the number of regressed queries."""
+    rows = []
+    regressions = 0
+    for name, cur in report["queries"].items():
+        base = baseline.get("queries", {}).get(name)
+        if not base or "median_ms" not in base or "median_ms" not in cur:
+            continue
+        ratio = cur["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+        slower = ratio > 1 + threshold and cur["median_ms"] - base["median_ms"] > NOISE_FLOOR_MS
+        regressions += slower
+        rows.append({
+            "query": name,
+            "baseline_ms": base["median_ms"],
+            "now_ms": cur["median_ms"],
+            "ratio": round(ratio, 2),
+            "status": "REGRESSED" if slower else "ok",
+        })
+    rows.sort(key=lambda r: r["ratio"], reverse=True)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every shipped query and write a JSON report.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per query (default 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per query first (default 1)")
+    parser.add_argument("--label", default="run", help="name stored in the report and its file name")
+    parser.add_argument("--only", default=None, help="only queries whose name contains this text")
+    parser.add_argument("--out", default=None, help=f"report path (default {REPORT_DIR}/<label>-<time>.json)")
+    parser.add_argument("--compare", default=None, help="baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help=f"allowed median slowdown before a query counts as regressed (default {REGRESSION_THRESHOLD})")
+    args = parser.parse_args()
+
+    print("Timing shipped queries...")
+    try:
+        report = run_benchmark(args.repeat, args.warmup, args.only)
+    except Error as e:
+        print(f"[DB ERROR] {e}")
+        sys.exit(1)
+    report["label"] = args.label
+
+    out = args.out or os.path.join(REPORT_DIR, f"{args.label}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print("\nTables: " + ", ".join(f"{t}={n}" for t, n in report["tables"].items()))
+    print(f"Report written to {out}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("tables") != report["tables"]:
+            print("\nNote: table sizes differ from the baseline; timings are not like for like.")
+        rows, regressions = compare(report, baseline, args.threshold)
+        print(f"\nCompared with {args.compare}:\n")
+        print_table(rows, max_width=60)
+        if regressions:
+            print(f"\n{regressions} queries regressed by more than {args.threshold:.0%}.")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1168 @@
+import json
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import mysql.connector
+from mysql.connector import Error, IntegrityError
+
+from queryStats import QueryStats
+
+DB_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 3306,
+    "user": "root",
+    "password": "Alonso04.",
+    "database": "gamesearch_db",
+}
+
+
+def get_connection():
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG)
+        if not conn.is_connected():
+            raise RuntimeError("Failed to connect to MySQL (is the server running?)")
+        return conn
+    except Error as e:
+        print(f"[ERROR] Could not connect to MySQL: {e}")
+        sys.exit(1)
+
+
+POOL_CONFIG = {
+    "max_size": 8,
+    "acquire_timeout": 10.0,
+    "max_idle": 300.0,
+    "max_lifetime": 3600.0,
+    "max_statements": 64,
+}
+
+
+class PoolTimeout(Error):
+    pass
+
+
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections shared by every run_query caller.
+    Idle connections are health-checked before reuse and recycled once they
+    sit idle (or live) longer than the configured limits.
+
+    Each connection also keeps up to max_statements server-side prepared
+    statements (LRU), so a hot query is parsed once per connection.
+    """
+
+    def __init__(self, factory, max_size=8, acquire_timeout=10.0, max_idle=300.0, max_lifetime=3600.0,
+                 max_statements=64):
+        self.factory = factory
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.max_statements = max_statements
+
+        self._idle = deque()
+        self._born = {}
+        self._statements = {}
+        self._open = 0
+        self._cond = threading.Condition()
+        self.stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0,
+            "connects": 0,
+            "connect_seconds": 0.0,
+            "recycled": 0,
+            "failed_health_checks": 0,
+            "discarded": 0,
+            "prepares": 0,
+            "statement_reuses": 0,
+        }
+
+    def _connect(self):
+        t0 = time.perf_counter()
+        conn = self.factory()
+        elapsed = time.perf_counter() - t0
+        with self._cond:
+            self.stats["connects"] += 1
+            self.stats["connect_seconds"] += elapsed
+            self._born[id(conn)] = time.monotonic()
+        return conn
+
+    def _close_quietly(self, conn):
+        self._born.pop(id(conn), None)
+        self._statements.pop(id(conn), None)
+        try:
+            conn.close()
+        except Error:
+            pass
+
+    def _healthy(self, conn, idle_since):
+        now = time.monotonic()
+        if now - self._born.get(id(conn), now) > self.max_lifetime or now - idle_since > self.max_idle:
+            with self._cond:
+                self.stats["recycled"] += 1
+            return False
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error:
+            with self._cond:
+                self.stats["failed_health_checks"] += 1
+            return False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        waited = False
+        t0 = time.perf_counter()
+        while True:
+            with self._cond:
+                while not self._idle and self._open >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"Timed out after {self.acquire_timeout}s waiting for a database connection"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                else:
+                    conn, idle_since = None, None
+                    self._open += 1
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except BaseException:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                self._checkout(waited, t0)
+                return conn
+
+            # Health check happens outside the lock so a slow ping never
+            # stalls other threads waiting on the pool.
+            if self._healthy(conn, idle_since):
+                self._checkout(waited, t0)
+                return conn
+            with self._cond:
+                self._open -= 1
+                self._close_quietly(conn)
+
+    def _checkout(self, waited, t0):
+        with self._cond:
+            self.stats["checkouts"] += 1
+            if waited:
+                self.stats["waits"] += 1
+                self.stats["wait_seconds"] += time.perf_counter() - t0
+
+    def statement(self, conn, sql):
+        """
+        Return (cursor, sql) for a prepared statement on conn. Only the thread
+        holding conn calls this. The connector re-prepares whenever execute()
+        gets a different string object, so callers must execute the returned
+        sql, not their own (equal) copy.
+        """
+        cache = self._statements.setdefault(id(conn), OrderedDict())
+        entry = cache.get(sql)
+        if entry is not None:
+            cache.move_to_end(sql)
+            with self._cond:
+                self.stats["statement_reuses"] += 1
+            return entry
+
+        entry = (conn.cursor(prepared=True), sql)
+        cache[sql] = entry
+        with self._cond:
+            self.stats["prepares"] += 1
+        while len(cache) > self.max_statements:
+            _, (old, _) = cache.popitem(last=False)
+            self._close_cursor(old)
+        return entry
+
+    def forget_statement(self, conn, sql):
+        """Drop a prepared statement whose last execution failed."""
+        entry = self._statements.get(id(conn), {}).pop(sql, None)
+        if entry is not None:
+            self._close_cursor(entry[0])
+
+    @staticmethod
+    def _close_cursor(cur):
+        try:
+            cur.close()
+        except Error:
+            pass
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool, or close it if it is broken."""
+        with self._cond:
+            if discard or not conn.is_connected():
+                self.stats["discarded"] += 1
+                self._open -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._open -= 1
+                self._close_quietly(conn)
+
+    def snapshot(self):
+        with self._cond:
+            snap = dict(self.stats)
+            snap["open"] = self._open
+            snap["idle"] = len(self._idle)
+            snap["in_use"] = self._open - len(self._idle)
+            snap["statements"] = sum(len(c) for c in self._statements.values())
+        snap["avg_connect_ms"] = (
+            round(1000 * snap["connect_seconds"] / snap["connects"], 2) if snap["connects"] else 0.0
+        )
+        return snap
+
+
+POOL = ConnectionPool(get_connection, **POOL_CONFIG)
+
+
+def pool_stats():
+    return POOL.snapshot()
+
+
+CACHE_CONFIG = {
+    "max_entries": 256,
+    "max_bytes": 32 * 1024 * 1024,
+    "default_ttl": 300.0,
+}
+
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+`?(\w+)`?", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    return _WHITESPACE.sub(" ", sql or "").strip().rstrip(";").strip()
+
+
+def referenced_tables(sql):
+    return {name.lower() for name in _TABLE_REF.findall(sql or "")}
+
+
+def _estimate_size(rows):
+    """Rough in-memory size of a result set, sampled from the first rows."""
+    if not rows:
+        return sys.getsizeof(rows)
+    sample = rows[:50]
+    per_row = sum(
+        sys.getsizeof(r) + sum(sys.getsizeof(v) for v in (r.values() if isinstance(r, dict) else r))
+        for r in sample
+    ) / len(sample)
+    return int(sys.getsizeof(rows) + per_row * len(rows))
+
+
+class QueryCache:
+    """
+    LRU + TTL cache of SELECT results keyed by (normalized SQL, params).
+    Entries remember the tables they read, so a write to one table only
+    evicts the results that depend on it. Cached row lists are shared, so
+    callers must not mutate them. With enabled False every cache=True read
+    goes to MySQL (load tests measuring the database itself).
+    """
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024, default_ttl=300.0):
+        self.enabled = True
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0, "invalidated": 0}
+
+    @staticmethod
+    def key(query, params, shape="dict"):
+        return normalize_sql(query), tuple(params or ()), shape
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            expires_at, _, _, rows = entry
+            if time.monotonic() >= expires_at:
+                self._drop(key)
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return rows
+
+    def put(self, key, rows, ttl=None):
+        size = _estimate_size(rows)
+        if size > self.max_bytes:
+            return
+        tables = referenced_tables(key[0])
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires_at, tables, size, rows)
+            self._bytes += size
+            for t in tables:
+                self._by_table.setdefault(t, set()).add(key)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.stats["evicted"] += 1
+
+    def _drop(self, key):
+        _, tables, size, _ = self._entries.pop(key)
+        self._bytes -= size
+        for t in tables:
+            keys = self._by_table.get(t)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[t]
+
+    def invalidate(self, *tables):
+        """Drop every cached result that reads any of the given tables."""
+        removed = 0
+        with self._lock:
+            for t in tables:
+                for key in list(self._by_table.get(t.lower(), ())):
+                    if key in self._entries:
+                        self._drop(key)
+                        removed += 1
+            self.stats["invalidated"] += removed
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self.stats["invalidated"] += len(self._entries)
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def snapshot(self):
+        with self._lock:
+            snap = dict(self.stats)
+            snap["entries"] = len(self._entries)
+            snap["bytes"] = self._bytes
+        return snap
+
+
+QUERY_CACHE = QueryCache(**CACHE_CONFIG)
+
+
+def cache_stats():
+    return QUERY_CACHE.snapshot()
+
+
+def invalidate_cache(*tables):
+    """Evict cached results for the given tables, or everything when called with none."""
+    if not tables:
+        QUERY_CACHE.clear()
+        return
+    QUERY_CACHE.invalidate(*tables)
+
+
+PERF_CONFIG = {
+    "enabled": True,
+    "slow_ms": 250.0,
+    "explain_slow": False,
+    "explain_interval": 300.0,
+    "slow_log_size": 200,
+    "slow_log_file": None,
+}
+
+QUERY_STATS = QueryStats(**PERF_CONFIG)
+
+_EXPLAINABLE = re.compile(r"^\s*(?:select|with|insert|update|delete|replace)\b", re.IGNORECASE)
+
+
+def perf_report(sort="total_ms", limit=None):
+    """Per-fingerprint timings (connect / execute / fetch, percentiles, rows), heaviest first."""
+    return QUERY_STATS.report(sort=sort, limit=limit)
+
+
+def slow_queries(limit=None):
+    return QUERY_STATS.slow_log(limit)
+
+
+def reset_perf():
+    QUERY_STATS.reset()
+
+
+def explain_query(query, params=None, conn=None):
+    """
+    Return the EXPLAIN FORMAT=JSON plan of a statement as a dict. Uses conn
+    when given (the caller still owns it), otherwise a pooled connection.
+    """
+    own = conn is None
+    if own:
+        conn = POOL.acquire()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("EXPLAIN FORMAT=JSON " + query.strip().rstrip(";"), tuple(params or ()))
+            row = cur.fetchone()
+        conn.commit()
+        return json.loads(row[0]) if row else None
+    except (Error, ValueError) as e:
+        return {"error": str(e)}
+    finally:
+        if own:
+            POOL.release(conn)
+
+
+def _observe(conn, query, params, connect_s, execute_s, fetch_s, rows, error=None):
+    """Feed one statement's timings to QUERY_STATS and log it if it was slow."""
+    if not QUERY_STATS.record(query, connect_s, execute_s, fetch_s, rows, error):
+        return
+    explain = None
+    if conn is not None and error is None and _EXPLAINABLE.match(query) and QUERY_STATS.wants_explain(query):
+        explain = explain_query(query, params, conn)
+    QUERY_STATS.log_slow(query, params, connect_s, execute_s, fetch_s, rows, explain, error)
+
+
+def _execute(conn, query, params, dictionary=False):
+    """
+    Execute on conn and return the cursor. Statements with parameters go
+    through the connection's prepared statement cache; the rest (DDL,
+    console input, parameterless reads) use the text protocol.
+    """
+    if params:
+        cur, stmt = POOL.statement(conn, query)
+        try:
+            cur.execute(stmt, tuple(params))
+        except Error:
+            POOL.forget_statement(conn, query)
+            raise
+        return cur
+    cur = conn.cursor(dictionary=dictionary)
+    cur.execute(query)
+    return cur
+
+
+def _run(query, params, fetch, shape, cache, ttl):
+    key = None
+    if fetch and cache and QUERY_CACHE.enabled:
+        key = QueryCache.key(query, params, shape)
+        rows = QUERY_CACHE.get(key)
+        if rows is not None:
+            QUERY_STATS.record_cache_hit(query)
+            return rows
+
+    t0 = time.perf_counter()
+    conn = POOL.acquire()
+    t_conn = time.perf_counter()
+    t_exec = None
+    n_rows = 0
+    error = None
+    broken = False
+    try:
+        cur = _execute(conn, query, params, dictionary=shape == "dict")
+        t_exec = time.perf_counter()
+        try:
+            if fetch:
+                rows = cur.fetchall()
+                if params and shape == "dict":
+                    cols = cur.column_names
+                    rows = [dict(zip(cols, r)) for r in rows]
+                n_rows = len(rows)
+                # Close the implicit read transaction so a pooled connection
+                # never serves stale snapshots to the next caller.
+                conn.commit()
+                if key is not None:
+                    QUERY_CACHE.put(key, rows, ttl)
+                return rows
+            last_id = cur.lastrowid
+            n_rows = cur.rowcount if cur.rowcount and cur.rowcount > 0 else 0
+            conn.commit()
+            QUERY_CACHE.invalidate(*referenced_tables(query))
+            return last_id
+        finally:
+            if not params:
+                cur.close()
+    except Error as e:
+        error = str(e)
+        try:
+            conn.rollback()
+        except Error:
+            broken = True
+        raise
+    finally:
+        if QUERY_STATS.enabled:
+            t_end = time.perf_counter()
+            t_exec = t_exec or t_end
+            _observe(None if broken else conn, query, params,
+                     t_conn - t0, t_exec - t_conn, t_end - t_exec, n_rows, error)
+        POOL.release(conn, discard=broken)
+
+
+def run_query(query, params=None, fetch=True, cache=False, ttl=None):
+    """
+    Run one statement on a pooled connection and return a list of dicts
+    (None for writes). With cache=True a SELECT result is served from /
+    stored in QUERY_CACHE (ttl overrides CACHE_CONFIG["default_ttl"]).
+    Writes evict cached results for every table the statement touches.
+    """
+    result = _run(query, params, fetch, "dict", cache, ttl)
+    return result if fetch else None
+
+
+def fetch_rows(query, params=None, cache=False, ttl=None):
+    """Like run_query for a SELECT, but rows come back as plain tuples."""
+    return _run(query, params, True, "tuple", cache, ttl)
+
+
+def fetch_one(query, params=None):
+    rows = fetch_rows(query, params)
+    return rows[0] if rows else None
+
+
+def fetch_value(query, params=None):
+    row = fetch_one(query, params)
+    return row[0] if row else None
+
+
+def execute(query, params=None):
+    """Run a write and return the new AUTO_INCREMENT id (0 when none)."""
+    return _run(query, params, False, "tuple", False, None)
+
+
+def stream_query(query, params=None, batch_size=500):
+    """
+    Generator over a SELECT on an unbuffered cursor. The first item is
+    (columns, first_batch); every later item is (columns, batch) of row
+    tuples. The pooled connection is held until the generator is exhausted
+    or closed; closing early discards the connection rather than draining
+    the rest of the result.
+    """
+    t0 = time.perf_counter()
+    conn = POOL.acquire()
+    connect_s = time.perf_counter() - t0
+    execute_s = fetch_s = 0.0
+    n_rows = 0
+    finished = False
+    try:
+        with conn.cursor(buffered=False) as cur:
+            t0 = time.perf_counter()
+            cur.execute(query, params or ())
+            t1 = time.perf_counter()
+            execute_s = t1 - t0
+            cols = [d[0] for d in cur.description or ()]
+            batch = cur.fetchmany(batch_size) if cur.description else []
+            fetch_s += time.perf_counter() - t1
+            n_rows += len(batch)
+            yield cols, batch
+            while batch:
+                t1 = time.perf_counter()
+                batch = cur.fetchmany(batch_size)
+                fetch_s += time.perf_counter() - t1
+                n_rows += len(batch)
+                if batch:
+                    yield cols, batch
+            conn.commit()
+            finished = True
+    finally:
+        # fetch time covers fetchmany only, not the time the consumer held each batch
+        _observe(None, query, params, connect_s, execute_s, fetch_s, n_rows)
+        POOL.release(conn, discard=not finished)
+
+
+ER_QUERY_INTERRUPTED = 1317
+ER_QUERY_TIMEOUT = 3024
+
+
+class StreamingQuery:
+    """
+    One ad-hoc SELECT streamed from an unbuffered cursor in fetchmany
+    batches. run() blocks, so call it on a worker thread; on_batch(cols,
+    rows) gets each batch as it arrives (first with no rows, to announce the
+    columns). Only the current batch is ever held here.
+
+    max_rows stops the stream early. timeout_ms becomes the session's
+    MAX_EXECUTION_TIME, so the server aborts a runaway SELECT itself.
+    cancel() can be called from any other thread; it sends KILL QUERY from a
+    second pooled connection. status ends as "done", "capped", "cancelled",
+    "timeout" or "idle"; any other error is raised from run().
+
+    With demand=True the stream only fetches while the reader has asked for
+    more rows (want()); in between, the unread rows stay on the server and
+    the connection stays checked out. Paused time counts toward timeout_ms.
+    A stream left paused for idle_timeout_s is stopped ("idle"), and the
+    session's net_write_timeout is raised past that so the server does not
+    drop the connection first.
+    """
+
+    def __init__(self, query, params=None, batch_size=500, max_rows=None, timeout_ms=None,
+                 demand=False, idle_timeout_s=None):
+        self.query = query
+        self.params = params
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.timeout_ms = timeout_ms
+        self.idle_timeout_s = idle_timeout_s
+
+        self.rows = 0
+        self.status = "pending"
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._conn_id = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self.waiting = False
+        self._wanted = 0 if demand else None
+        self._demand = threading.Condition()
+
+    def want(self, rows):
+        """Let a demand-driven stream fetch until it has read at least `rows` rows."""
+        with self._demand:
+            if self._wanted is not None and rows > self._wanted:
+                self._wanted = rows
+                self._demand.notify_all()
+
+    def _wait_for_demand(self):
+        """Block until more rows are wanted or the query is cancelled; False if it sat idle too long."""
+        with self._demand:
+            if self._wanted is None or self.rows < self._wanted:
+                return True
+            self.waiting = True
+            try:
+                return self._demand.wait_for(
+                    lambda: self._cancelled.is_set() or self.rows < self._wanted,
+                    timeout=self.idle_timeout_s,
+                )
+            finally:
+                self.waiting = False
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def rate(self):
+        elapsed = self.elapsed()
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def run(self, on_batch):
+        t0 = time.perf_counter()
+        conn = POOL.acquire()
+        reusable = False
+        self.started = time.perf_counter()
+        self.status = "running"
+        connect_s = self.started - t0
+        execute_s = fetch_s = 0.0
+        try:
+            with self._lock:
+                self._conn_id = conn.connection_id
+            cur = conn.cursor(buffered=False)
+            cur.execute("SET SESSION max_execution_time = %s", (int(self.timeout_ms or 0),))
+            if self._wanted is not None and self.idle_timeout_s:
+                cur.execute("SET SESSION net_write_timeout = %s", (int(self.idle_timeout_s) + 60,))
+            if self._cancelled.is_set():
+                self.status = "cancelled"
+                reusable = True
+                return self
+
+            t0 = time.perf_counter()
+            if self.params:
+                cur.execute(self.query, self.params)
+            else:
+                cur.execute(self.query)
+            execute_s = time.perf_counter() - t0
+            cols = [d[0] for d in cur.description or ()]
+            on_batch(cols, [])
+
+            while True:
+                n = self.batch_size
+                if self.max_rows is not None:
+                    n = min(n, self.max_rows - self.rows)
+                    if n <= 0:
+                        self.status = "capped"
+                        break
+                if not self._wait_for_demand():
+                    self.status = "idle"
+                    break
+                if self._cancelled.is_set():
+                    self.status = "cancelled"
+                    break
+                t0 = time.perf_counter()
+                batch = cur.fetchmany(n)
+                fetch_s += time.perf_counter() - t0
+                if not batch:
+                    self.status = "done"
+                    reusable = True
+                    break
+                self.rows += len(batch)
+                on_batch(cols, batch)
+                if len(batch) < n:
+                    # A short batch means the cursor already read the end of the result
+                    self.status = "done"
+                    reusable = True
+                    break
+
+            if not reusable:
+                # Rows are still coming; stop the server instead of draining them
+                self._kill()
+            return self
+        except Error as e:
+            if e.errno == ER_QUERY_INTERRUPTED and self._cancelled.is_set():
+                self.status = "cancelled"
+                return self
+            if e.errno == ER_QUERY_TIMEOUT:
+                self.status = "timeout"
+                self.error = str(e)
+                return self
+            self.status = "error"
+            self.error = str(e)
+            raise
+        finally:
+            self.finished = time.perf_counter()
+            with self._lock:
+                self._conn_id = None
+            # cancel() sets the flag before it reads _conn_id, so a KILL that
+            # may still land on this connection always shows up here
+            reusable = reusable and not self._cancelled.is_set()
+            _observe(None, self.query, self.params, connect_s, execute_s, fetch_s, self.rows,
+                     self.error if self.status == "error" else None)
+            if reusable:
+                try:
+                    cur.execute(
+                        "SET SESSION max_execution_time = 0, net_write_timeout = @@GLOBAL.net_write_timeout"
+                    )
+                    conn.commit()
+                except Error:
+                    reusable = False
+            # A connection left mid-result cannot be reused
+            POOL.release(conn, discard=not reusable)
+
+    def cancel(self):
+        """Stop the query; returns True if it was running on the server."""
+        self._cancelled.set()
+        with self._demand:
+            self._demand.notify_all()
+        return self._kill()
+
+    def _kill(self):
+        with self._lock:
+            conn_id = self._conn_id
+        if conn_id is None:
+            return False
+        killer = POOL.acquire()
+        try:
+            with killer.cursor() as cur:
+                cur.execute(f"KILL QUERY {int(conn_id)}")
+        except Error:
+            # The statement finished between the check and the KILL
+            return False
+        finally:
+            POOL.release(killer)
+        return True
+
+
+@contextmanager
+def transaction(dictionary=False, invalidates=()):
+    """
+    Yield a cursor on a pooled connection; commit on success, roll back on
+    any error. Used by multi-statement maintenance jobs (summary rebuilds,
+    game linking, bulk loads). Cached results for the tables named in
+    invalidates are evicted after the commit.
+    """
+    conn = POOL.acquire()
+    broken = False
+    try:
+        with conn.cursor(dictionary=dictionary) as cur:
+            yield cur
+        conn.commit()
+    except BaseException:
+        try:
+            conn.rollback()
+        except Error:
+            broken = True
+        raise
+    finally:
+        POOL.release(conn, discard=broken)
+    if invalidates:
+        QUERY_CACHE.invalidate(*invalidates)
+
+
+_FT_OPERATORS = re.compile(r'[+\-<>()~*"@]+')
+
+
+def _like_escape(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_term(term):
+    """The search term as title_search sees it: FULLTEXT operators dropped, whitespace collapsed."""
+    return " ".join(_FT_OPERATORS.sub(" ", term or "").split())
+
+
+def title_search_parts(term, column="g.title"):
+    """
+    Build the WHERE and ranking fragments for a title search on a column that
+    carries an ngram FULLTEXT index (see databaseFinal.sql).
+
+    Returns (where_sql, where_params, tier_sql, tier_params, relevance_sql,
+    relevance_params). The tier is 110 for an exact match, 10 for a prefix
+    match and 0 otherwise; relevance is the FULLTEXT score. Single-character
+    terms are below the ngram token size, so they fall back to an
+    index-friendly prefix LIKE with no relevance. A term with nothing left
+    once operators are dropped (e.g. "+-*") matches no rows; callers that
+    mean "no title filter" should check search_term() first.
+    """
+    cleaned = search_term(term)
+    prefix = _like_escape(cleaned) + "%"
+    tier_sql = f"(({column} = %s) * 100 + ({column} LIKE %s) * 10)"
+
+    if not cleaned:
+        return "FALSE", [], tier_sql, [cleaned, prefix], "0", []
+
+    if len(cleaned.replace(" ", "")) < 2:
+        return f"{column} LIKE %s", [prefix], tier_sql, [cleaned, prefix], "0", []
+
+    phrase = f'"{cleaned}"'
+    match_sql = f"MATCH({column}) AGAINST (%s IN BOOLEAN MODE)"
+    return match_sql, [phrase], tier_sql, [cleaned, prefix], match_sql, [phrase]
+
+
+def title_search(term, column="g.title"):
+    """
+    Like title_search_parts, with tier and relevance folded into one rank:
+    returns (where_sql, where_params, rank_sql, rank_params).
+    """
+    where_sql, where_params, tier_sql, tier_params, rel_sql, rel_params = title_search_parts(term, column)
+    return where_sql, where_params, f"({tier_sql} + {rel_sql})", tier_params + rel_params
+
+
+def keyset_page(keys, after=None, backward=False):
+    """
+    Build the seek predicate and ORDER BY for keyset pagination.
+
+    keys is a list of (expr, expr_params, descending) in sort order; the last
+    key must be unique. after is the key tuple of the boundary row (None for
+    the first page). Walking backward flips every comparison and direction,
+    so the caller reverses the rows it gets back.
+
+    Returns (where_sql, where_params, order_sql, order_params); where_sql is
+    None on the first page.
+    """
+    def seek(i):
+        expr, expr_params, desc = keys[i]
+        op = "<" if desc != backward else ">"
+        if i == len(keys) - 1:
+            return f"{expr} {op} %s", list(expr_params) + [after[i]]
+        rest_sql, rest_params = seek(i + 1)
+        sql = f"({expr} {op} %s OR ({expr} = %s AND {rest_sql}))"
+        return sql, list(expr_params) + [after[i]] + list(expr_params) + [after[i]] + rest_params
+
+    order_sql = ", ".join(
+        f"{expr} {'DESC' if desc != backward else 'ASC'}" for expr, _, desc in keys
+    )
+    order_params = [p for _, expr_params, _ in keys for p in expr_params]
+
+    if after is None:
+        return None, [], order_sql, order_params
+    where_sql, where_params = seek(0)
+    return where_sql, where_params, order_sql, order_params
+
+
+# Named queries shared by the CLI and the GUI
+
+LOGIN_SQL = """
+SELECT user_id, username, password_hash, is_active
+FROM app_user
+WHERE username = %s
+LIMIT 1
+"""
+
+
+def login_lookup(username):
+    """Return (user_id, username, password_hash, is_active) or None."""
+    return fetch_one(LOGIN_SQL, (username,))
+
+
+def create_user(username, email, password_hash):
+    """Insert an app_user row and return its user_id."""
+    q = """
+    INSERT INTO app_user (username, email, password_hash)
+    VALUES (%s, %s, %s)
+    """
+    return execute(q, (username, email, password_hash))
+
+
+def update_user(user_id, username, email, is_active, password_hash=None):
+    """Update a user; the password is left alone when password_hash is None."""
+    if password_hash is None:
+        q = """
+        UPDATE app_user
+        SET username = %s, email = %s, is_active = %s
+        WHERE user_id = %s
+        """
+        execute(q, (username, email, int(is_active), user_id))
+        return
+    q = """
+    UPDATE app_user
+    SET username = %s, email = %s, password_hash = %s, is_active = %s
+    WHERE user_id = %s
+    """
+    execute(q, (username, email, password_hash, int(is_active), user_id))
+
+
+def delete_user(user_id):
+    execute("DELETE FROM app_user WHERE user_id = %s", (user_id,))
+
+
+def deactivate_user(user_id):
+    execute("UPDATE app_user SET is_active = 0 WHERE user_id = %s", (user_id,))
+
+
+AUDIT_INSERT_SQL = """
+INSERT INTO app_audit_log (user_id, action_type, entity_type, entity_id, action_time, details)
+VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+
+def audit_row(user_id, action_type, entity_type, entity_id=None, details=None):
+    """One app_audit_log row, timestamped when the action happened rather than when it is written."""
+    return (
+        user_id,
+        action_type,
+        entity_type,
+        None if entity_id is None else str(entity_id),
+        datetime.now().replace(microsecond=0),
+        details,
+    )
+
+
+def log_audit(user_id, action_type, entity_type, entity_id=None, details=None):
+    execute(AUDIT_INSERT_SQL, audit_row(user_id, action_type, entity_type, entity_id, details))
+
+
+def _null_missing_users(rows, user_col=0):
+    """Replace user ids that no longer exist in app_user with NULL (their FKs are ON DELETE SET NULL)."""
+    user_ids = sorted({r[user_col] for r in rows if r[user_col] is not None})
+    if not user_ids:
+        return rows
+    marks = ", ".join(["%s"] * len(user_ids))
+    existing = {r[0] for r in fetch_rows(f"SELECT user_id FROM app_user WHERE user_id IN ({marks})", user_ids)}
+    out = []
+    for r in rows:
+        if r[user_col] is not None and r[user_col] not in existing:
+            r = tuple(r[:user_col]) + (None,) + tuple(r[user_col + 1:])
+        out.append(r)
+    return out
+
+
+def write_audit_rows(rows):
+    """
+    Insert audit rows as one multi-row INSERT (executemany on a text cursor
+    is rewritten into a single statement). Rows whose user was deleted in
+    the meantime are kept with user_id NULL instead of failing the batch.
+    """
+    rows = list(rows)
+    try:
+        with transaction(invalidates=("app_audit_log",)) as cur:
+            cur.executemany(AUDIT_INSERT_SQL, rows)
+        return
+    except IntegrityError:
+        rows = _null_missing_users(rows)
+    with transaction(invalidates=("app_audit_log",)) as cur:
+        cur.executemany(AUDIT_INSERT_SQL, rows)
+
+
+def db_overview():
+    """Return (database name, app_user rows, bg_sales_game rows) for the GUI's DB check."""
+    return fetch_one(
+        "SELECT DATABASE(), (SELECT COUNT(*) FROM app_user), (SELECT COUNT(*) FROM bg_sales_game)"
+    )
+
+
+# Data versions: bulk jobs that rewrite bg_* data bump a counter so
+# in-memory copies (analyticsEngine) know when to reload
+
+def data_version(name="sales"):
+    return fetch_value("SELECT version FROM app_data_version WHERE name = %s", (name,)) or 0
+
+
+def bump_data_version(name="sales"):
+    execute(
+        "INSERT INTO app_data_version (name, version) VALUES (%s, 1) "
+        "ON DUPLICATE KEY UPDATE version = version + 1",
+        (name,),
+    )
+
+
+# Search telemetry (app_search / app_search_result) and game popularity
+
+SEARCH_INSERT_SQL = """
+INSERT INTO app_search (client_ref, user_id, query_text, platform, genre, search_time)
+VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+SEARCH_RESULT_INSERT_SQL = """
+INSERT INTO app_search_result (search_id, sales_game_id, rank_order, clicked)
+VALUES (%s, %s, %s, %s)
+"""
+
+
+def search_event(client_ref, user_id, query_text, platform, genre, results):
+    """
+    A logged search for write_search_events. client_ref is a caller-made id
+    that later click events refer to; results is [(sales_game_id, rank_order)].
+    """
+    return ("search", client_ref, user_id, query_text or "", platform or None, genre or None,
+            datetime.now().replace(microsecond=0), list(results))
+
+
+def click_event(client_ref, sales_game_id):
+    return ("click", client_ref, sales_game_id)
+
+
+def write_search_events(events):
+    """
+    Flush a batch of search / click events in one transaction: searches go in
+    as one multi-row INSERT, their ids are read back by client_ref, results
+    go in as one multi-row INSERT, and clicks on searches written by earlier
+    batches become a single UPDATE.
+    """
+    searches = [e[1:] for e in events if e[0] == "search"]
+    clicks = {(e[1], e[2]) for e in events if e[0] == "click"}
+
+    search_rows = [s[:6] for s in searches]
+    try:
+        _write_search_events(searches, search_rows, clicks)
+    except IntegrityError:
+        _write_search_events(searches, _null_missing_users(search_rows, user_col=1), clicks)
+
+
+def _write_search_events(searches, search_rows, clicks):
+    clicks = set(clicks)
+    with transaction(invalidates=("app_search", "app_search_result")) as cur:
+        if searches:
+            cur.executemany(SEARCH_INSERT_SQL, search_rows)
+            refs = [s[0] for s in searches]
+            marks = ", ".join(["%s"] * len(refs))
+            cur.execute(f"SELECT client_ref, search_id FROM app_search WHERE client_ref IN ({marks})", refs)
+            ids = dict(cur.fetchall())
+
+            result_rows = []
+            for ref, *_, results in searches:
+                for sales_game_id, rank_order in results:
+                    clicked = (ref, sales_game_id) in clicks
+                    clicks.discard((ref, sales_game_id))
+                    result_rows.append((ids[ref], sales_game_id, rank_order, int(clicked)))
+            if result_rows:
+                cur.executemany(SEARCH_RESULT_INSERT_SQL, result_rows)
+
+        if clicks:
+            pairs = sorted(clicks)
+            marks = ", ".join(["(%s, %s)"] * len(pairs))
+            cur.execute(
+                f"""
+                UPDATE app_search_result r
+                JOIN app_search s ON s.search_id = r.search_id
+                SET r.clicked = 1
+                WHERE (s.client_ref, r.sales_game_id) IN ({marks})
+                """,
+                [v for pair in pairs for v in pair],
+            )
+
+
+POPULARITY_CONFIG = {
+    "window_days": 90,
+    # Shrinks the click-through rate of rarely shown games toward 0
+    "prior_impressions": 20,
+    # Every client asks on a timer; only one rebuild per interval runs
+    "min_interval": 600,
+}
+
+POPULARITY_LOCK = "app_game_popularity_refresh"
+
+
+def refresh_game_popularity(window_days=90, prior_impressions=20, min_interval=0):
+    """
+    Rebuild app_game_popularity from the search results shown (impressions)
+    and clicked in the last window_days. score is clicks / (impressions +
+    prior_impressions), so one lucky click does not outrank a steady favorite.
+
+    Guarded by a MySQL named lock and the 'popularity' row of
+    app_data_version: returns None without rebuilding if another client
+    holds the lock or the last rebuild is under min_interval seconds old,
+    else the number of games scored.
+    """
+    since = datetime.now() - timedelta(days=window_days)
+    # The lock is held on this connection until after the commit, so the
+    # next client always sees the new updated_at
+    conn = POOL.acquire()
+    broken = False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT GET_LOCK(%s, 0)", (POPULARITY_LOCK,))
+            if cur.fetchone()[0] != 1:
+                conn.rollback()
+                return None
+            try:
+                cur.execute(
+                    "SELECT TIMESTAMPDIFF(SECOND, updated_at, NOW()) "
+                    "FROM app_data_version WHERE name = 'popularity'"
+                )
+                row = cur.fetchone()
+                if row is not None and row[0] < min_interval:
+                    conn.rollback()
+                    return None
+                cur.execute("DELETE FROM app_game_popularity")
+                cur.execute(
+                    """
+                    INSERT INTO app_game_popularity (sales_game_id, impressions, clicks, ctr, score)
+                    SELECT
+                      r.sales_game_id,
+                      COUNT(*),
+                      SUM(r.clicked),
+                      SUM(r.clicked) / COUNT(*),
+                      SUM(r.clicked) / (COUNT(*) + %s)
+                    FROM app_search s
+                    JOIN app_search_result r ON r.search_id = s.search_id
+                    WHERE s.search_time >= %s
+                      AND r.sales_game_id IS NOT NULL
+                    GROUP BY r.sales_game_id
+                    """,
+                    (prior_impressions, since),
+                )
+                scored = cur.rowcount
+                cur.execute(
+                    "INSERT INTO app_data_version (name, version) VALUES ('popularity', 1) "
+                    "ON DUPLICATE KEY UPDATE version = version + 1"
+                )
+                conn.commit()
+            except BaseException:
+                try:
+                    conn.rollback()
+                except Error:
+                    broken = True
+                raise
+            finally:
+                try:
+                    cur.execute("SELECT RELEASE_LOCK(%s)", (POPULARITY_LOCK,))
+                    cur.fetchone()
+                except Error:
+                    broken = True
+    finally:
+        POOL.release(conn, discard=broken)
+    QUERY_CACHE.invalidate("app_game_popularity")
+    return scored
@@ -17,6 +17,7 @@ DROP TABLE IF EXISTS app_review_vote;
 DROP TABLE IF EXISTS app_game_review;
 DROP TABLE IF EXISTS app_favorite_item;
 DROP TABLE IF EXISTS app_favorite_list;
+DROP TABLE IF EXISTS app_game_popularity;
 DROP TABLE IF EXISTS app_search_result;
 DROP TABLE IF EXISTS app_search;
 DROP TABLE IF EXISTS app_session;
@@ -30,7 +31,10 @@ DROP TABLE IF EXISTS app_tag;
 DROP TABLE IF EXISTS app_genre;
 DROP TABLE IF EXISTS app_platform;
 DROP TABLE IF EXISTS app_game_link;
+DROP TABLE IF EXISTS app_data_version;
 
+DROP TABLE IF EXISTS bg_sales_cube;
+DROP TABLE IF EXISTS bg_sales_summary;
 DROP TABLE IF EXISTS bg_sales_record;
 DROP TABLE IF EXISTS bg_sales_game;
 DROP TABLE IF EXISTS bg_meta_game;
@@ -96,6 +100,49 @@ CREATE TABLE bg_sales_record (
   COLLATE=utf8mb4_0900_ai_ci;
 
 
+-- One row per sales game: per-region and global sales, pre-aggregated from
+-- bg_sales_record so analytics never re-run the GROUP BY.
+CREATE TABLE bg_sales_summary (
+  sales_game_id          INT NOT NULL,
+  na_sales_millions      DECIMAL(10, 3) DEFAULT NULL,
+  eu_sales_millions      DECIMAL(10, 3) DEFAULT NULL,
+  jp_sales_millions      DECIMAL(10, 3) DEFAULT NULL,
+  other_sales_millions   DECIMAL(10, 3) DEFAULT NULL,
+  global_sales_millions  DECIMAL(10, 3) NOT NULL DEFAULT 0,
+  num_records            INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (sales_game_id),
+  KEY idx_summary_global (global_sales_millions, sales_game_id),
+  CONSTRAINT fk_sales_summary_game
+    FOREIGN KEY (sales_game_id)
+    REFERENCES bg_sales_game (sales_game_id)
+    ON DELETE CASCADE
+) ENGINE=InnoDB
+  DEFAULT CHARSET=utf8mb4
+  COLLATE=utf8mb4_0900_ai_ci;
+
+-- Sales rollup cube over release_year x genre x platform x region x esrb,
+-- all 32 grouping sets; '*' marks a rolled-up dimension. Region excludes
+-- Global_Sales; esrb comes through app_game_link ('unrated' when unlinked).
+-- Rebuilt by salesCube.rebuild_sales_cube() after every load. Each index
+-- leads with four dimensions so "fix four, vary one" slices are lookups.
+CREATE TABLE bg_sales_cube (
+  release_year    VARCHAR(8)   NOT NULL,
+  genre           VARCHAR(120) NOT NULL,
+  platform        VARCHAR(100) NOT NULL,
+  region          VARCHAR(20)  NOT NULL,
+  esrb            VARCHAR(60)  NOT NULL,
+  sales_millions  DECIMAL(14, 3) NOT NULL DEFAULT 0,
+  num_games       INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (genre, platform, region, esrb, release_year),
+  KEY idx_cube_genre (release_year, platform, region, esrb, genre),
+  KEY idx_cube_platform (release_year, genre, region, esrb, platform),
+  KEY idx_cube_region (release_year, genre, platform, esrb, region),
+  KEY idx_cube_esrb (release_year, genre, platform, region, esrb)
+) ENGINE=InnoDB
+  DEFAULT CHARSET=utf8mb4
+  COLLATE=utf8mb4_0900_ai_ci;
+
+
 -- Users
 CREATE TABLE app_user (
   user_id       INT NOT NULL AUTO_INCREMENT,
@@ -151,6 +198,7 @@ CREATE TABLE app_session (
   PRIMARY KEY (session_id),
   UNIQUE KEY uq_session_token (token),
   KEY idx_session_user (user_id),
+  KEY idx_session_expires (expires_at),
   CONSTRAINT fk_session_user
     FOREIGN KEY (user_id)
     REFERENCES app_user (user_id)
@@ -200,6 +248,7 @@ CREATE TABLE app_audit_log (
 -- Search 
 CREATE TABLE app_search (
   search_id     INT NOT NULL AUTO_INCREMENT,
+  client_ref    CHAR(32) DEFAULT NULL,
   user_id       INT DEFAULT NULL,
   query_text    VARCHAR(255) NOT NULL,
   platform      VARCHAR(100) DEFAULT NULL,
@@ -208,6 +257,7 @@ CREATE TABLE app_search (
   min_meta      INT DEFAULT NULL,
   search_time   DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (search_id),
+  UNIQUE KEY uq_search_client_ref (client_ref),
   KEY idx_search_user (user_id),
   KEY idx_search_time (search_time),
   CONSTRAINT fk_search_user
@@ -228,7 +278,7 @@ CREATE TABLE app_search_result (
   clicked          TINYINT(1) NOT NULL DEFAULT 0,
   rank_order       INT DEFAULT NULL,
   PRIMARY KEY (search_result_id),
-  KEY idx_sr_search (search_id),
+  KEY idx_sr_search (search_id, sales_game_id),
   KEY idx_sr_meta (meta_game_id),
   KEY idx_sr_sales (sales_game_id),
   KEY idx_sr_esrb (esrb_game_id),
@@ -252,6 +302,26 @@ CREATE TABLE app_search_result (
   DEFAULT CHARSET=utf8mb4
   COLLATE=utf8mb4_0900_ai_ci;
 
+-- Click-through popularity per game, rebuilt from app_search_result by
+-- refresh_game_popularity() in dataAccess.py; the Search tab ranks title
+-- matches by score.
+CREATE TABLE app_game_popularity (
+  sales_game_id  INT NOT NULL,
+  impressions    INT NOT NULL DEFAULT 0,
+  clicks         INT NOT NULL DEFAULT 0,
+  ctr            DOUBLE NOT NULL DEFAULT 0,
+  score          DOUBLE NOT NULL DEFAULT 0,
+  refreshed_at   DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (sales_game_id),
+  KEY idx_popularity_score (score),
+  CONSTRAINT fk_popularity_sales
+    FOREIGN KEY (sales_game_id)
+    REFERENCES bg_sales_game (sales_game_id)
+    ON DELETE CASCADE
+) ENGINE=InnoDB
+  DEFAULT CHARSET=utf8mb4
+  COLLATE=utf8mb4_0900_ai_ci;
+
 -- Favorite list 
 CREATE TABLE app_favorite_list (
   favorite_list_id INT NOT NULL AUTO_INCREMENT,
@@ -403,7 +473,8 @@ CREATE TABLE app_game_tag (
   DEFAULT CHARSET=utf8mb4
   COLLATE=utf8mb4_0900_ai_ci;
 
--- Game link 
+-- Game link: one row per sales game (plus ESRB/Metacritic titles with no
+-- sales match), filled by linkGames.py from normalized titles
 CREATE TABLE app_game_link (
   game_link_id  INT NOT NULL AUTO_INCREMENT,
   normalized_title VARCHAR(250) NOT NULL,
@@ -412,10 +483,10 @@ CREATE TABLE app_game_link (
   esrb_game_id   INT DEFAULT NULL,
   created_at     DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
   PRIMARY KEY (game_link_id),
-  UNIQUE KEY uq_norm_title (normalized_title),
+  KEY idx_norm_title (normalized_title),
   KEY idx_link_meta (meta_game_id),
-  KEY idx_link_sales (sales_game_id),
-  KEY idx_link_esrb (esrb_game_id),
+  UNIQUE KEY uq_link_sales (sales_game_id),
+  KEY idx_link_esrb (esrb_game_id, sales_game_id),
   CONSTRAINT fk_link_meta
     FOREIGN KEY (meta_game_id)
     REFERENCES bg_meta_game (meta_game_id)
@@ -432,6 +503,22 @@ CREATE TABLE app_game_link (
   DEFAULT CHARSET=utf8mb4
   COLLATE=utf8mb4_0900_ai_ci;
 
+-- Data versions: loadDB.py and synthData.py bump 'sales' after rewriting
+-- the bg_sales_* tables, and linkGames.build_links bumps 'links' on every
+-- relink; analyticsEngine.py and facetIndex.py reload their in-memory
+-- copies when the numbers they depend on change. refresh_game_popularity
+-- bumps 'popularity' and reads its updated_at to rebuild at most once
+-- per interval across all clients.
+CREATE TABLE app_data_version (
+  name        VARCHAR(50) NOT NULL,
+  version     BIGINT NOT NULL DEFAULT 0,
+  updated_at  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                       ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (name)
+) ENGINE=InnoDB
+  DEFAULT CHARSET=utf8mb4
+  COLLATE=utf8mb4_0900_ai_ci;
+
 -- A saved filter preset per user 
 CREATE TABLE app_filter_preset (
   preset_id    INT NOT NULL AUTO_INCREMENT,
@@ -551,6 +638,151 @@ SET
   sales_millions = NULLIF(@sales_millions, ''),
   source         = NULLIF(@source, '');
 
+-- ============================================================
+-- Title search indexes (ngram FULLTEXT). All secondary indexes on the
+-- bg_* tables are added after the load so each is built once instead
+-- of row by row.
+-- ============================================================
+
+-- The default stopword list contains single letters ("a", "i"), and the
+-- ngram parser drops every bigram that contains a stopword, so it must be
+-- off while the indexes are created.
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+ALTER TABLE bg_sales_game ADD FULLTEXT KEY ft_sales_title (title) WITH PARSER ngram;
+ALTER TABLE bg_esrb_game  ADD FULLTEXT KEY ft_esrb_title (title) WITH PARSER ngram;
+ALTER TABLE bg_meta_game  ADD FULLTEXT KEY ft_meta_title (title) WITH PARSER ngram;
+
+SET SESSION innodb_ft_enable_stopword = ON;
+
+-- ============================================================
+-- Filter / sort indexes, one per query shape in gameApp.py and
+-- GUIApp.py (explainCheck.py fails if a shipped query stops using them)
+-- ============================================================
+
+-- Search tab: any mix of platform / genre / release_year equality filters
+-- followed by ORDER BY title, sales_game_id LIMIT n. Each equality prefix ends
+-- in title (InnoDB appends sales_game_id), so the sort is read straight off the
+-- index and the keyset seek (title, sales_game_id) > (?, ?) of a later page is
+-- a range scan that starts where the previous page ended.
+ALTER TABLE bg_sales_game
+  ADD KEY idx_sales_title (title),
+  ADD KEY idx_sales_platform_title (platform, title),
+  ADD KEY idx_sales_genre_title (genre, title),
+  ADD KEY idx_sales_year_title (release_year, title),
+  ADD KEY idx_sales_platform_genre_title (platform, genre, title),
+  ADD KEY idx_sales_platform_year_title (platform, release_year, title),
+  ADD KEY idx_sales_genre_year_title (genre, release_year, title),
+  ADD KEY idx_sales_platform_genre_year_title (platform, genre, release_year, title);
+
+-- ESRB filters (list_games_by_esrb_min_sales) and GROUP BY esrb analytics
+ALTER TABLE bg_esrb_game
+  ADD KEY idx_esrb_rating (esrb),
+  ADD KEY idx_esrb_title (title);
+
+-- ============================================================
+-- Sales summary (built once after the CSV load, then kept in sync
+-- by triggers on bg_sales_record)
+-- ============================================================
+
+INSERT INTO bg_sales_summary (
+  sales_game_id,
+  na_sales_millions,
+  eu_sales_millions,
+  jp_sales_millions,
+  other_sales_millions,
+  global_sales_millions,
+  num_records
+)
+SELECT
+  r.sales_game_id,
+  SUM(CASE WHEN LOWER(r.region) IN ('na_sales', 'north_america') THEN r.sales_millions END),
+  SUM(CASE WHEN LOWER(r.region) IN ('eu_sales', 'europe') THEN r.sales_millions END),
+  SUM(CASE WHEN LOWER(r.region) IN ('jp_sales', 'japan') THEN r.sales_millions END),
+  SUM(CASE WHEN LOWER(r.region) IN ('other_sales', 'other') THEN r.sales_millions END),
+  COALESCE(
+    MAX(CASE WHEN LOWER(r.region) LIKE '%global%' THEN r.sales_millions END),
+    SUM(r.sales_millions),
+    0
+  ),
+  COUNT(*)
+FROM bg_sales_record r
+GROUP BY r.sales_game_id;
+
+DROP PROCEDURE IF EXISTS refresh_sales_summary;
+DROP TRIGGER IF EXISTS trg_sales_record_ai;
+DROP TRIGGER IF EXISTS trg_sales_record_au;
+DROP TRIGGER IF EXISTS trg_sales_record_ad;
+
+DELIMITER $$
+
+CREATE PROCEDURE refresh_sales_summary(IN p_sales_game_id INT)
+BEGIN
+  DELETE FROM bg_sales_summary WHERE sales_game_id = p_sales_game_id;
+
+  INSERT INTO bg_sales_summary (
+    sales_game_id,
+    na_sales_millions,
+    eu_sales_millions,
+    jp_sales_millions,
+    other_sales_millions,
+    global_sales_millions,
+    num_records
+  )
+  SELECT
+    r.sales_game_id,
+    SUM(CASE WHEN LOWER(r.region) IN ('na_sales', 'north_america') THEN r.sales_millions END),
+    SUM(CASE WHEN LOWER(r.region) IN ('eu_sales', 'europe') THEN r.sales_millions END),
+    SUM(CASE WHEN LOWER(r.region) IN ('jp_sales', 'japan') THEN r.sales_millions END),
+    SUM(CASE WHEN LOWER(r.region) IN ('other_sales', 'other') THEN r.sales_millions END),
+    COALESCE(
+      MAX(CASE WHEN LOWER(r.region) LIKE '%global%' THEN r.sales_millions END),
+      SUM(r.sales_millions),
+      0
+    ),
+    COUNT(*)
+  FROM bg_sales_record r
+  WHERE r.sales_game_id = p_sales_game_id
+  GROUP BY r.sales_game_id;
+END$$
+
+-- Bulk loaders set @skip_sales_summary = 1 and rebuild the table once at
+-- the end instead of paying one refresh per inserted row.
+CREATE TRIGGER trg_sales_record_ai
+AFTER INSERT ON bg_sales_record
+FOR EACH ROW
+BEGIN
+  IF COALESCE(@skip_sales_summary, 0) = 0 THEN
+    CALL refresh_sales_summary(NEW.sales_game_id);
+  END IF;
+END$$
+
+CREATE TRIGGER trg_sales_record_au
+AFTER UPDATE ON bg_sales_record
+FOR EACH ROW
+BEGIN
+  IF COALESCE(@skip_sales_summary, 0) = 0 THEN
+    CALL refresh_sales_summary(NEW.sales_game_id);
+    IF OLD.sales_game_id <> NEW.sales_game_id THEN
+      CALL refresh_sales_summary(OLD.sales_game_id);
+    END IF;
+  END IF;
+END$$
+
+CREATE TRIGGER trg_sales_record_ad
+AFTER DELETE ON bg_sales_record
+FOR EACH ROW
+BEGIN
+  IF COALESCE(@skip_sales_summary, 0) = 0 THEN
+    CALL refresh_sales_summary(OLD.sales_game_id);
+  END IF;
+END$$
+
+DELIMITER ;
+
+-- Starting data version for analyticsEngine.py
+INSERT INTO app_data_version (name, version) VALUES ('sales', 1), ('links', 1);
+
 -- ============================================================
 -- Optional: seed roles so GUI has something to show
 -- ============================================================
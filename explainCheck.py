@@ -0,0 +1,129 @@
+import sys
+from itertools import combinations
+
+from mysql.connector import Error
+
+from dataAccess import LOGIN_SQL, run_query
+from gameApp import (
+    ESRB_AVG_SALES_SQL,
+    ESRB_MIN_SALES_SQL,
+    TOP_GLOBAL_SALES_SQL,
+    print_table,
+    title_search_query,
+)
+from GUIApp import (
+    SALES_BY_ESRB_SQL,
+    TOP_SALES_SQL,
+    build_search_query,
+    build_users_query,
+)
+from salesCube import cube_slice_query
+
+
+# Sample values that exist in the Kaggle data
+SAMPLE = {
+    "title": "mario",
+    "platform": "Wii",
+    "genre": "Sports",
+    "release_year": 2006,
+    "esrb": "E",
+}
+
+# Boundary keys for a later page: (title, game_id), or with a title term
+# (search_tier, popularity, relevance, title, game_id)
+SAMPLE_AFTER = ("Mario Kart Wii", 1000)
+SAMPLE_AFTER_RANKED = (10, 0.0, 1.0) + SAMPLE_AFTER
+
+# allow:
+#   "filesort" - ordering by a computed value (relevance, aggregate) that no index can supply
+#   "scan"     - the query aggregates every game by design
+def shipped_queries():
+    checks = [
+        ("cli.top_global_sales", TOP_GLOBAL_SALES_SQL, (10,), set()),
+        ("cli.search_game_by_name", *title_search_query(SAMPLE["title"]), {"filesort"}),
+        ("cli.average_sales_by_esrb", ESRB_AVG_SALES_SQL, (), {"filesort", "scan"}),
+        ("cli.games_by_esrb_min_sales", ESRB_MIN_SALES_SQL, (SAMPLE["esrb"], 1.0), {"filesort"}),
+        ("gui.load_users", *build_users_query(), set()),
+        ("gui.load_users[next page]", *build_users_query(after=(1000,)), set()),
+        ("gui.load_users[prev page]", *build_users_query(after=(1000,), backward=True), set()),
+        ("gui.analytics_top_sales", TOP_SALES_SQL, (10,), set()),
+        ("gui.analytics_sales_by_esrb", SALES_BY_ESRB_SQL, (), {"filesort", "scan"}),
+        ("gui.login_lookup", LOGIN_SQL, ("admin",), set()),
+        ("gui.cube_trend_by_year", *cube_slice_query(("release_year",)), set()),
+        ("gui.cube_trend_by_year[genre]", *cube_slice_query(("release_year",), genre=SAMPLE["genre"]), set()),
+        ("gui.cube_genre_share_by_region", *cube_slice_query(("genre", "region")), {"filesort"}),
+        ("cube.total[platform+esrb]", *cube_slice_query((), platform=SAMPLE["platform"], esrb=SAMPLE["esrb"]), set()),
+    ]
+
+    # Every combination of Search tab filters, with and without a title term
+    filters = ("platform", "genre", "release_year")
+    for n in range(len(filters) + 1):
+        for combo in combinations(filters, n):
+            kwargs = {f: SAMPLE[f] for f in combo}
+            label = "+".join(combo) or "none"
+            checks.append((f"gui.search[{label}]", *build_search_query(**kwargs), set()))
+            checks.append(
+                (f"gui.search[title+{label}]", *build_search_query(title=SAMPLE["title"], **kwargs), {"filesort"})
+            )
+            checks.append(
+                (f"gui.search_next[{label}]", *build_search_query(after=SAMPLE_AFTER, **kwargs), set())
+            )
+            checks.append((
+                f"gui.search_prev[{label}]",
+                *build_search_query(after=SAMPLE_AFTER, backward=True, **kwargs),
+                set(),
+            ))
+            checks.append((
+                f"gui.search_next[title+{label}]",
+                *build_search_query(title=SAMPLE["title"], after=SAMPLE_AFTER_RANKED, **kwargs),
+                {"filesort"},
+            ))
+
+    # ESRB facet filter (a correlated lookup on app_game_link per game)
+    checks.append(("gui.search[esrb]", *build_search_query(esrb=SAMPLE["esrb"]), set()))
+    checks.append(("gui.search[platform+esrb]", *build_search_query(platform=SAMPLE["platform"], esrb=SAMPLE["esrb"]), set()))
+    return checks
+
+
+def explain_problems(plan, allow):
+    problems = []
+    for row in plan:
+        table = row.get("table")
+        extra = row.get("Extra") or ""
+        if row.get("type") == "ALL" and "scan" not in allow:
+            problems.append(f"full table scan on {table}")
+        if "Using filesort" in extra and "filesort" not in allow:
+            problems.append(f"filesort on {table}")
+    return problems
+
+
+def main():
+    failed = 0
+    report = []
+    for name, sql, params, allow in shipped_queries():
+        try:
+            plan = run_query("EXPLAIN " + sql.strip(), params)
+        except Error as e:
+            failed += 1
+            report.append({"query": name, "status": "ERROR", "detail": str(e)})
+            continue
+
+        problems = explain_problems(plan, allow)
+        if problems:
+            failed += 1
+        keys = ", ".join(str(r.get("key")) for r in plan if r.get("table"))
+        report.append({
+            "query": name,
+            "status": "FAIL" if problems else "ok",
+            "detail": "; ".join(problems) or f"keys: {keys}",
+        })
+
+    print_table(report, max_width=80)
+    if failed:
+        print(f"\n{failed} shipped queries fall back to a full scan or filesort.")
+        sys.exit(1)
+    print("\nAll shipped queries use indexes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import threading
+import time
+
+from dataAccess import data_version, fetch_rows, stream_query, title_search_parts
+from salesCube import UNRATED
+
+
+FACET_CONFIG = {
+    "check_interval": 30.0,
+    "batch_size": 50_000,
+}
+
+# Search tab facets; esrb comes through app_game_link (UNRATED when unlinked)
+FACETS = ("platform", "genre", "release_year", "esrb")
+
+# The Search tab's candidate set (build_search_query skips NULL titles too)
+FACET_GAMES_SQL = """
+SELECT g.sales_game_id, g.platform, g.genre, g.release_year, e.esrb
+FROM bg_sales_game g
+LEFT JOIN app_game_link l ON l.sales_game_id = g.sales_game_id
+LEFT JOIN bg_esrb_game e ON e.esrb_game_id = l.esrb_game_id
+WHERE g.title IS NOT NULL
+"""
+
+
+def _key(value):
+    # MySQL compares these columns case- and accent-insensitively; casefold is close enough
+    return str(value).strip().casefold()
+
+
+def _bitmap(positions, size):
+    bits = bytearray((size + 7) // 8)
+    for p in positions:
+        bits[p >> 3] |= 1 << (p & 7)
+    return int.from_bytes(bits, "little")
+
+
+class FacetIndex:
+    """
+    Posting lists for the Search tab facets, held as Python int bitmaps
+    (bit i = the i-th game). Counting a facet value is one AND plus a
+    popcount, so every facet's counts for a result set come from memory
+    instead of one GROUP BY per facet. A title term costs one id lookup
+    in MySQL, cached for the last term.
+
+    Counts for a facet ignore that facet's own filter, so the dropdown
+    still lists the alternatives to the current choice. Reloads when
+    app_data_version 'sales' or 'links' moves, checked at most every
+    check_interval.
+    """
+
+    def __init__(self, check_interval=30.0, batch_size=50_000):
+        self.check_interval = check_interval
+        self.batch_size = batch_size
+        self._pos = None
+        self._all = 0
+        self._postings = {}
+        self._version = None
+        self._checked_at = 0.0
+        self._title = None
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "load_seconds": 0.0, "games": 0, "queries": 0, "version": None}
+
+    # Loading
+    @staticmethod
+    def _current_version():
+        # esrb postings come through app_game_link, which can be rebuilt
+        # without the sales tables changing
+        return data_version("sales"), data_version("links")
+
+    def load(self):
+        t0 = time.perf_counter()
+        version = self._current_version()
+        pos = {}
+        lists = {f: {} for f in FACETS}
+        for _, batch in stream_query(FACET_GAMES_SQL, batch_size=self.batch_size):
+            for game_id, platform, genre, year, esrb in batch:
+                i = pos.setdefault(game_id, len(pos))
+                row = {"platform": platform, "genre": genre, "release_year": year, "esrb": esrb or UNRATED}
+                for facet, value in row.items():
+                    if value is None or value == "":
+                        continue
+                    entry = lists[facet].setdefault(_key(value), [value, []])
+                    entry[1].append(i)
+
+        size = len(pos)
+        postings = {
+            facet: {k: (value, _bitmap(ids, size)) for k, (value, ids) in values.items()}
+            for facet, values in lists.items()
+        }
+        self._pos = pos
+        self._all = (1 << size) - 1
+        self._postings = postings
+        self._version = version
+        self._title = None
+        self._checked_at = time.monotonic()
+        self.stats["loads"] += 1
+        self.stats["load_seconds"] = round(time.perf_counter() - t0, 3)
+        self.stats["games"] = size
+        self.stats["version"] = version
+
+    def refresh(self, force=False):
+        """Reload if the data version moved (checked at most every check_interval). Returns True on reload."""
+        with self._lock:
+            if self._pos is None or force:
+                self.load()
+                return True
+            if time.monotonic() - self._checked_at < self.check_interval:
+                return False
+            self._checked_at = time.monotonic()
+            if self._current_version() == self._version:
+                return False
+            self.load()
+            return True
+
+    # Queries
+    def _title_bits(self, title):
+        cached = self._title
+        if cached is not None and cached[0] == title:
+            return cached[1]
+        where_sql, where_params, *_ = title_search_parts(title, column="title")
+        rows = fetch_rows(
+            f"SELECT sales_game_id FROM bg_sales_game WHERE title IS NOT NULL AND {where_sql}",
+            where_params,
+        )
+        pos = self._pos
+        bits = _bitmap((pos[r[0]] for r in rows if r[0] in pos), len(pos))
+        self._title = (title, bits)
+        return bits
+
+    def _filter_bits(self, facet, value):
+        entry = self._postings[facet].get(_key(value))
+        return entry[1] if entry else 0
+
+    def counts(self, title=None, **filters):
+        """
+        {"total": n, "facets": {facet: [(value, count), ...]}} for the Search
+        tab's filters, each facet's values largest count first. Values with
+        no matching game are left out.
+        """
+        self.refresh()
+        self.stats["queries"] += 1
+        chosen = {f: self._filter_bits(f, v) for f, v in filters.items() if f in FACETS and v not in (None, "")}
+        base = self._title_bits(title) if title else self._all
+
+        out = {}
+        for facet in FACETS:
+            mask = base
+            for other, bits in chosen.items():
+                if other != facet:
+                    mask &= bits
+            values = [(value, (mask & bits).bit_count()) for value, bits in self._postings[facet].values()]
+            out[facet] = sorted(((v, n) for v, n in values if n), key=lambda vn: (-vn[1], str(vn[0])))
+
+        total = base
+        for bits in chosen.values():
+            total &= bits
+        return {"total": total.bit_count(), "facets": out}
+
+    def values(self, facet):
+        """Every value of a facet, for pickers."""
+        self.refresh()
+        return sorted((value for value, _ in self._postings[facet].values()), key=str)
+
+    def snapshot(self):
+        return dict(self.stats)
+
+
+FACET_INDEX = FacetIndex(**FACET_CONFIG)
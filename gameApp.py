@@ -1,40 +1,20 @@
-import sys
+import json
 from textwrap import shorten
 
-import mysql.connector
 from mysql.connector import Error
 
-DB_CONFIG = {
-    "host": "127.0.0.1",
-    "port": 3306,
-    "user": "root",
-    "password": "Alonso04.",
-    "database": "gamesearch_db",
-}
-
-
-def get_connection():
-    try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        if not conn.is_connected():
-            raise RuntimeError("Failed to connect to MySQL (is the server running?)")
-        return conn
-    except Error as e:
-        print(f"[ERROR] Could not connect to MySQL: {e}")
-        sys.exit(1)
-
-
-def run_query(query, params=None, fetch=True):
-    conn = get_connection()
-    try:
-        with conn.cursor(dictionary=True) as cur:
-            cur.execute(query, params or ())
-            if fetch:
-                return cur.fetchall()
-            conn.commit()
-            return None
-    finally:
-        conn.close()
+from dataAccess import (
+    DB_CONFIG,
+    POOL,
+    create_user,
+    delete_user,
+    perf_report,
+    run_query,
+    search_term,
+    slow_queries,
+    title_search,
+    transaction,
+)
 
 
 def print_table(rows, max_width=40):
@@ -71,7 +51,108 @@ def _global_sales_expr():
     """
 
 
-def list_top_global_sales(limit=10):
+def _region_sales_expr(*names):
+    regions = ", ".join(f"'{n}'" for n in names)
+    return f"SUM(CASE WHEN LOWER(r.region) IN ({regions}) THEN r.sales_millions END)"
+
+
+SALES_SUMMARY_SELECT = f"""
+SELECT
+  r.sales_game_id,
+  {_region_sales_expr("na_sales", "north_america")},
+  {_region_sales_expr("eu_sales", "europe")},
+  {_region_sales_expr("jp_sales", "japan")},
+  {_region_sales_expr("other_sales", "other")},
+  COALESCE({_global_sales_expr()}, 0),
+  COUNT(*)
+FROM bg_sales_record r
+"""
+
+SALES_SUMMARY_COLUMNS = """
+  sales_game_id,
+  na_sales_millions,
+  eu_sales_millions,
+  jp_sales_millions,
+  other_sales_millions,
+  global_sales_millions,
+  num_records
+"""
+
+
+def rebuild_sales_summary(sales_game_ids=None):
+    """
+    Recompute bg_sales_summary from bg_sales_record in one transaction.
+    With sales_game_ids only those games are refreshed; otherwise the whole
+    table is rebuilt (used after bulk loads that bypass the triggers).
+    """
+    with transaction(invalidates=("bg_sales_summary",)) as cur:
+        if sales_game_ids is None:
+            cur.execute("DELETE FROM bg_sales_summary")
+            cur.execute(
+                f"INSERT INTO bg_sales_summary ({SALES_SUMMARY_COLUMNS}) "
+                f"{SALES_SUMMARY_SELECT} GROUP BY r.sales_game_id"
+            )
+            return
+
+        ids = sorted({int(i) for i in sales_game_ids})
+        for start in range(0, len(ids), 1000):
+            chunk = ids[start:start + 1000]
+            marks = ", ".join(["%s"] * len(chunk))
+            cur.execute(f"DELETE FROM bg_sales_summary WHERE sales_game_id IN ({marks})", chunk)
+            cur.execute(
+                f"INSERT INTO bg_sales_summary ({SALES_SUMMARY_COLUMNS}) "
+                f"{SALES_SUMMARY_SELECT} WHERE r.sales_game_id IN ({marks}) GROUP BY r.sales_game_id",
+                chunk,
+            )
+
+
+TOP_GLOBAL_SALES_SQL = """
+SELECT
+  g.title,
+  g.platform,
+  g.release_year,
+  g.genre,
+  g.publisher,
+  s.global_sales_millions
+FROM bg_sales_summary s
+JOIN bg_sales_game g ON g.sales_game_id = s.sales_game_id
+ORDER BY s.global_sales_millions DESC
+LIMIT %s;
+"""
+
+ESRB_AVG_SALES_SQL = """
+SELECT
+  e.esrb AS esrb,
+  COUNT(*) AS num_games,
+  ROUND(AVG(s.global_sales_millions), 2) AS avg_global_sales_millions
+FROM bg_sales_summary s
+JOIN app_game_link l ON l.sales_game_id = s.sales_game_id
+JOIN bg_esrb_game e ON e.esrb_game_id = l.esrb_game_id
+GROUP BY e.esrb
+ORDER BY avg_global_sales_millions DESC;
+"""
+
+ESRB_MIN_SALES_SQL = """
+SELECT
+  g.title,
+  g.platform,
+  g.release_year,
+  g.genre,
+  s.global_sales_millions,
+  e.esrb AS esrb
+FROM bg_esrb_game e
+JOIN app_game_link l ON l.esrb_game_id = e.esrb_game_id
+JOIN bg_sales_summary s ON s.sales_game_id = l.sales_game_id
+JOIN bg_sales_game g ON g.sales_game_id = s.sales_game_id
+WHERE e.esrb = %s
+  AND s.global_sales_millions >= %s
+ORDER BY s.global_sales_millions DESC;
+"""
+
+
+def title_search_query(term, limit=25):
+    """Return (sql, params) for the CLI title search."""
+    where_sql, where_params, rank_sql, rank_params = title_search(term)
     query = f"""
     SELECT
       g.title,
@@ -79,69 +160,39 @@ def list_top_global_sales(limit=10):
       g.release_year,
       g.genre,
       g.publisher,
-      ROUND({_global_sales_expr()}, 3) AS global_sales_millions
+      s.global_sales_millions,
+      e.esrb AS esrb
     FROM bg_sales_game g
-    JOIN bg_sales_record r ON r.sales_game_id = g.sales_game_id
-    GROUP BY g.sales_game_id, g.title, g.platform, g.release_year, g.genre, g.publisher
-    ORDER BY global_sales_millions DESC
+    JOIN bg_sales_summary s ON s.sales_game_id = g.sales_game_id
+    LEFT JOIN app_game_link l ON l.sales_game_id = g.sales_game_id
+    LEFT JOIN bg_esrb_game e ON e.esrb_game_id = l.esrb_game_id
+    WHERE {where_sql}
+    ORDER BY {rank_sql} DESC, s.global_sales_millions DESC
     LIMIT %s;
     """
-    rows = run_query(query, (limit,))
+    return query, tuple(where_params + rank_params + [limit])
+
+
+def list_top_global_sales(limit=10):
+    rows = run_query(TOP_GLOBAL_SALES_SQL, (limit,), cache=True)
     print(f"\nTop {limit} games by global sales:\n")
     print_table(rows)
 
 
 def search_game_by_name():
     term = input("Enter part of the game title: ").strip()
-    if not term:
-        print("Search term cannot be empty.")
+    if not search_term(term):
+        print("Search term cannot be empty (operators like + - * are ignored).")
         return
 
-    query = f"""
-    SELECT
-      g.title,
-      g.platform,
-      g.release_year,
-      g.genre,
-      g.publisher,
-      ROUND({_global_sales_expr()}, 3) AS global_sales_millions,
-      e.esrb AS esrb
-    FROM bg_sales_game g
-    JOIN bg_sales_record r ON r.sales_game_id = g.sales_game_id
-    LEFT JOIN bg_esrb_game e ON e.title = g.title
-    WHERE g.title LIKE %s
-    GROUP BY g.sales_game_id, g.title, g.platform, g.release_year, g.genre, g.publisher, e.esrb
-    ORDER BY global_sales_millions DESC
-    LIMIT 25;
-    """
-    rows = run_query(query, (f"%{term}%",))
+    query, params = title_search_query(term)
+    rows = run_query(query, params)
     print(f"\nSearch results for '{term}':\n")
     print_table(rows)
 
 
 def average_sales_by_esrb():
-    query = f"""
-    SELECT
-      e.esrb AS esrb,
-      COUNT(*) AS num_games,
-      ROUND(AVG(global_sales_millions), 2) AS avg_global_sales_millions
-    FROM (
-      SELECT
-        g.sales_game_id,
-        COALESCE(
-          MAX(CASE WHEN LOWER(r.region) LIKE '%global%' THEN r.sales_millions END),
-          SUM(r.sales_millions)
-        ) AS global_sales_millions
-      FROM bg_sales_game g
-      JOIN bg_sales_record r ON r.sales_game_id = g.sales_game_id
-      GROUP BY g.sales_game_id
-    ) s
-    JOIN bg_sales_game g ON g.sales_game_id = s.sales_game_id
-    JOIN bg_esrb_game e ON e.title = g.title
-    GROUP BY e.esrb
-    ORDER BY avg_global_sales_millions DESC;
-    """
-    rows = run_query(query)
+    rows = run_query(ESRB_AVG_SALES_SQL, cache=True)
     print("\nAverage global sales by ESRB (only games with ESRB + sales):\n")
     print_table(rows)
 
@@ -158,35 +209,11 @@ def list_games_by_esrb_min_sales():
         print("Invalid number for minimum sales.")
         return
 
-    query = f"""
-    SELECT
-      g.title,
-      g.platform,
-      g.release_year,
-      g.genre,
-      ROUND({_global_sales_expr()}, 3) AS global_sales_millions,
-      e.esrb AS esrb
-    FROM bg_sales_game g
-    JOIN bg_sales_record r ON r.sales_game_id = g.sales_game_id
-    JOIN bg_esrb_game e ON e.title = g.title
-    WHERE e.esrb = %s
-    GROUP BY g.sales_game_id, g.title, g.platform, g.release_year, g.genre, e.esrb
-    HAVING global_sales_millions >= %s
-    ORDER BY global_sales_millions DESC;
-    """
-    rows = run_query(query, (rating, min_sales))
+    rows = run_query(ESRB_MIN_SALES_SQL, (rating, min_sales))
     print(f"\nGames rated {rating} with global sales >= {min_sales} million:\n")
     print_table(rows)
 
 
-def create_user(username, email, password_hash):
-    q = """
-    INSERT INTO app_user (username, email, password_hash)
-    VALUES (%s, %s, %s);
-    """
-    run_query(q, (username, email, password_hash), fetch=False)
-
-
 def update_user_settings(user_id, preferred_platform=None, preferred_genre=None, show_mature=1):
     q = """
     INSERT INTO app_user_settings (user_id, preferred_platform, preferred_genre, show_mature)
@@ -199,11 +226,6 @@ def update_user_settings(user_id, preferred_platform=None, preferred_genre=None,
     run_query(q, (user_id, preferred_platform, preferred_genre, int(show_mature)), fetch=False)
 
 
-def delete_user(user_id):
-    q = "DELETE FROM app_user WHERE user_id = %s;"
-    run_query(q, (user_id,), fetch=False)
-
-
 def save_filter_preset(user_id, preset_name, platform=None, genre=None, esrb=None, min_meta=None):
     q = """
     INSERT INTO app_filter_preset (user_id, preset_name, platform, genre, esrb, min_meta)
@@ -259,6 +281,27 @@ def delete_review(review_id):
     run_query(q, (review_id,), fetch=False)
 
 
+def dump_query_perf(limit=20, path=None):
+    """Print the heaviest query fingerprints and recent slow calls; optionally save both as JSON."""
+    cols = ["fingerprint", "calls", "total_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms",
+            "connect_ms", "execute_ms", "fetch_ms", "rows", "sql"]
+    report = perf_report()
+    print(f"\nQuery timings by fingerprint (top {limit} by total time):\n")
+    print_table([{c: r[c] for c in cols} for r in report[:limit]], max_width=60)
+
+    slow = slow_queries()
+    print(f"\nSlow query log ({len(slow)} entries, newest first):\n")
+    print_table(
+        [{c: e[c] for c in ("at", "fingerprint", "total_ms", "rows", "sql")} for e in slow[:limit]],
+        max_width=60,
+    )
+
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"queries": report, "slow": slow}, f, indent=2, default=str)
+        print(f"\nSaved to {path}")
+
+
 def print_menu():
     print("\n=== Video Game Database App (CLI) ===")
     print("READ/FILTER:")
@@ -277,6 +320,8 @@ def print_menu():
     print("12) Update review")
     print("13) Delete review")
     print("14) Save filter preset")
+    print("\nDIAGNOSTICS:")
+    print("15) Dump query performance / slow log")
     print("\n0) Exit")
 
 
@@ -394,7 +439,12 @@ def main():
                 save_filter_preset(user_id, preset, plat, genre, esrb, min_meta)
                 print("Preset saved.")
 
+            elif choice == "15":
+                path = input("Save JSON to (blank to skip): ").strip() or None
+                dump_query_perf(path=path)
+
             elif choice == "0":
+                POOL.close_all()
                 print("Goodbye!")
                 break
 
@@ -0,0 +1,137 @@
+import re
+import sys
+import unicodedata
+
+from mysql.connector import Error
+
+from dataAccess import bump_data_version, run_query, transaction
+from salesCube import rebuild_sales_cube
+
+
+BATCH_SIZE = 1000
+
+PLATFORM_WORDS = [
+    "pc", "windows", "mac", "linux",
+    "ps", "ps1", "ps2", "ps3", "ps4", "ps5", "psp", "psv", "ps vita", "playstation",
+    "playstation 2", "playstation 3", "playstation 4", "playstation 5", "playstation vita",
+    "xbox", "xb", "x360", "xbox 360", "xone", "xbox one", "xbox series x", "xbox series x s",
+    "wii", "wiiu", "wii u", "ns", "switch", "nintendo switch", "ds", "nds", "3ds", "nintendo 3ds",
+    "gba", "gbc", "gamecube", "n64", "nes", "snes", "dreamcast",
+    "stadia", "ios", "android",
+]
+
+EDITION_WORDS = [
+    "game of the year", "goty", "complete", "definitive", "deluxe", "ultimate", "gold",
+    "special", "collectors", "collector s", "limited", "anniversary", "premium", "standard",
+    "digital deluxe", "enhanced", "legendary", "platinum", "greatest hits", "hd",
+]
+
+_platform_alt = "|".join(sorted((re.escape(p) for p in PLATFORM_WORDS), key=len, reverse=True))
+_edition_alt = "|".join(sorted((re.escape(e) for e in EDITION_WORDS), key=len, reverse=True))
+
+_BRACKETS = re.compile(r"[\(\[\{][^\)\]\}]*[\)\]\}]")
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_EDITION_SUFFIX = re.compile(rf"(?:\s(?:{_edition_alt}))?\sedition$|\s(?:goty|game of the year)$")
+_PLATFORM_SUFFIX = re.compile(rf"\s(?:for\s|on\s)?(?:{_platform_alt})$")
+
+
+def normalize_title(title):
+    """
+    Canonical form used to match the same game across the three Kaggle sets:
+    accents and case folded, bracketed tags and punctuation dropped, and
+    trailing platform names / "... Edition" suffixes removed.
+    """
+    if title is None:
+        return ""
+    text = unicodedata.normalize("NFKD", str(title))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace("&", " and ")
+    text = _BRACKETS.sub(" ", text)
+    text = _NON_ALNUM.sub(" ", text).strip()
+
+    # Peel suffixes repeatedly: "FIFA 14 Ultimate Edition PS4" -> "fifa 14"
+    while True:
+        stripped = _PLATFORM_SUFFIX.sub("", text).strip()
+        stripped = _EDITION_SUFFIX.sub("", stripped).strip()
+        if stripped == text or not stripped:
+            break
+        text = stripped
+    return text[:250]
+
+
+def _first_id_by_title(rows, id_col):
+    """Map normalized title -> lowest id, so duplicate titles link deterministically."""
+    out = {}
+    for r in rows:
+        norm = normalize_title(r["title"])
+        if not norm:
+            continue
+        gid = r[id_col]
+        if norm not in out or gid < out[norm]:
+            out[norm] = gid
+    return out
+
+
+def compute_links(sales_rows, esrb_rows, meta_rows):
+    """
+    Build app_game_link rows as (normalized_title, meta_game_id, sales_game_id, esrb_game_id).
+    Every sales game gets a row; ESRB/Metacritic titles with no sales match get
+    their own row so they are still reachable by id.
+    """
+    esrb_by_norm = _first_id_by_title(esrb_rows, "esrb_game_id")
+    meta_by_norm = _first_id_by_title(meta_rows, "meta_game_id")
+
+    links = []
+    seen = set()
+    for r in sales_rows:
+        norm = normalize_title(r["title"])
+        if not norm:
+            continue
+        seen.add(norm)
+        links.append((norm, meta_by_norm.get(norm), r["sales_game_id"], esrb_by_norm.get(norm)))
+
+    for norm in sorted((set(esrb_by_norm) | set(meta_by_norm)) - seen):
+        links.append((norm, meta_by_norm.get(norm), None, esrb_by_norm.get(norm)))
+    return links
+
+
+def build_links(batch_size=BATCH_SIZE):
+    """
+    Recompute app_game_link from the bg_* tables and replace it in one
+    transaction, then bump the 'links' data version.
+    """
+    sales_rows = run_query("SELECT sales_game_id, title FROM bg_sales_game ORDER BY sales_game_id")
+    esrb_rows = run_query("SELECT esrb_game_id, title FROM bg_esrb_game")
+    meta_rows = run_query("SELECT meta_game_id, title FROM bg_meta_game")
+
+    links = compute_links(sales_rows, esrb_rows, meta_rows)
+
+    insert = """
+    INSERT INTO app_game_link (normalized_title, meta_game_id, sales_game_id, esrb_game_id)
+    VALUES (%s, %s, %s, %s)
+    """
+    with transaction(invalidates=("app_game_link",)) as cur:
+        cur.execute("DELETE FROM app_game_link")
+        for start in range(0, len(links), batch_size):
+            cur.executemany(insert, links[start:start + batch_size])
+    bump_data_version("links")
+
+    matched = sum(1 for l in links if l[2] is not None and l[3] is not None)
+    return {"links": len(links), "sales_with_esrb": matched}
+
+
+def main():
+    # The cube's ESRB dimension comes through app_game_link, so a relink
+    # (and a fresh install, which runs this script) rebuilds it too
+    try:
+        stats = build_links()
+        cells = rebuild_sales_cube()
+    except Error as e:
+        print(f"[DB ERROR] {e}")
+        sys.exit(1)
+    print(f"Wrote {stats['links']} app_game_link rows ({stats['sales_with_esrb']} sales games matched to ESRB).")
+    print(f"Wrote {cells} bg_sales_cube cells.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,529 @@
+import argparse
+import hashlib
+import sys
+import time
+from decimal import Decimal
+
+from mysql.connector import Error
+
+import makeCSVs
+from dataAccess import POOL, bump_data_version, invalidate_cache
+from gameApp import rebuild_sales_summary
+from linkGames import build_links
+from salesCube import rebuild_sales_cube
+
+
+BATCH_SIZE = 5000
+
+TABLE_COLUMNS = {
+    "bg_esrb_game": ["esrb_game_id", "title", "esrb", "developer", "publisher", "release_date", "source"],
+    "bg_meta_game": [
+        "meta_game_id", "title", "platform", "meta_score", "user_score",
+        "release_date", "developer", "publisher", "genre", "source",
+    ],
+    "bg_sales_game": [
+        "sales_game_id", "title", "platform", "genre", "publisher", "developer", "release_year", "source",
+    ],
+    "bg_sales_record": ["sales_id", "sales_game_id", "region", "sales_millions", "source"],
+}
+
+# Secondary indexes from databaseFinal.sql. They are dropped before a full
+# load and rebuilt once at the end, which is much cheaper than maintaining
+# them row by row.
+SECONDARY_INDEXES = {
+    "bg_sales_game": [
+        ("idx_sales_title", "KEY idx_sales_title (title)"),
+        ("idx_sales_platform_title", "KEY idx_sales_platform_title (platform, title)"),
+        ("idx_sales_genre_title", "KEY idx_sales_genre_title (genre, title)"),
+        ("idx_sales_year_title", "KEY idx_sales_year_title (release_year, title)"),
+        ("idx_sales_platform_genre_title", "KEY idx_sales_platform_genre_title (platform, genre, title)"),
+        ("idx_sales_platform_year_title", "KEY idx_sales_platform_year_title (platform, release_year, title)"),
+        ("idx_sales_genre_year_title", "KEY idx_sales_genre_year_title (genre, release_year, title)"),
+        (
+            "idx_sales_platform_genre_year_title",
+            "KEY idx_sales_platform_genre_year_title (platform, genre, release_year, title)",
+        ),
+        ("ft_sales_title", "FULLTEXT KEY ft_sales_title (title) WITH PARSER ngram"),
+    ],
+    "bg_esrb_game": [
+        ("idx_esrb_rating", "KEY idx_esrb_rating (esrb)"),
+        ("idx_esrb_title", "KEY idx_esrb_title (title)"),
+        ("ft_esrb_title", "FULLTEXT KEY ft_esrb_title (title) WITH PARSER ngram"),
+    ],
+    "bg_meta_game": [
+        ("ft_meta_title", "FULLTEXT KEY ft_meta_title (title) WITH PARSER ngram"),
+    ],
+}
+
+# Children first so deletes never trip the foreign keys
+LOAD_ORDER_CLEAR = [
+    "app_game_popularity", "app_game_link", "bg_sales_cube", "bg_sales_summary",
+    "bg_sales_record", "bg_sales_game", "bg_esrb_game", "bg_meta_game",
+]
+
+
+def frame_rows(df):
+    """DataFrame -> list of plain Python tuples with NaN mapped to NULL."""
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+def insert_sql(table):
+    cols = TABLE_COLUMNS[table]
+    marks = ", ".join(["%s"] * len(cols))
+    return f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({marks})"
+
+
+def source_frames(chunk_rows=makeCSVs.CHUNK_ROWS):
+    """
+    Yield (table, DataFrame) in load order, straight from the Kaggle CSVs
+    through the makeCSVs transforms - nothing is written to disk.
+    """
+    cols = makeCSVs.esrb_columns(makeCSVs.read_header(makeCSVs.ESRB_IN))
+    next_id = 1
+    for chunk in makeCSVs.read_chunks(makeCSVs.ESRB_IN, chunk_rows):
+        yield "bg_esrb_game", makeCSVs.transform_esrb(chunk, cols, next_id)
+        next_id += len(chunk)
+
+    cols = makeCSVs.meta_columns(makeCSVs.read_header(makeCSVs.META_IN))
+    next_id = 1
+    for chunk in makeCSVs.read_chunks(makeCSVs.META_IN, chunk_rows):
+        yield "bg_meta_game", makeCSVs.transform_meta(chunk, cols, next_id)
+        next_id += len(chunk)
+
+    cols = makeCSVs.sales_columns(makeCSVs.read_header(makeCSVs.SALES_IN))
+    next_game_id = 1
+    next_sales_id = 1
+    for chunk in makeCSVs.read_chunks(makeCSVs.SALES_IN, chunk_rows):
+        records = makeCSVs.transform_sales_records(chunk, cols, next_game_id, next_sales_id)
+        yield "bg_sales_game", makeCSVs.transform_sales_games(chunk, cols, next_game_id)
+        yield "bg_sales_record", records
+        next_game_id += len(chunk)
+        next_sales_id += len(records)
+
+
+def existing_indexes(cur, table):
+    cur.execute(
+        """
+        SELECT DISTINCT index_name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        """,
+        (table,),
+    )
+    return {r[0] for r in cur.fetchall()}
+
+
+def drop_secondary_indexes(cur):
+    for table, indexes in SECONDARY_INDEXES.items():
+        present = existing_indexes(cur, table)
+        drops = [f"DROP INDEX {name}" for name, _ in indexes if name in present]
+        if drops:
+            cur.execute(f"ALTER TABLE {table} {', '.join(drops)}")
+
+
+def add_secondary_indexes(cur):
+    # See databaseFinal.sql: the ngram parser needs stopwords off at build time
+    cur.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+    try:
+        for table, indexes in SECONDARY_INDEXES.items():
+            present = existing_indexes(cur, table)
+            plain = [f"ADD {ddl}" for name, ddl in indexes if name not in present and "FULLTEXT" not in ddl]
+            if plain:
+                cur.execute(f"ALTER TABLE {table} {', '.join(plain)}")
+            # InnoDB builds one FULLTEXT index per ALTER
+            for name, ddl in indexes:
+                if name not in present and "FULLTEXT" in ddl:
+                    cur.execute(f"ALTER TABLE {table} ADD {ddl}")
+    finally:
+        cur.execute("SET SESSION innodb_ft_enable_stopword = ON")
+
+
+def bulk_load(batch_size=BATCH_SIZE, chunk_rows=makeCSVs.CHUNK_ROWS, rebuild_indexes=True, log=print):
+    """
+    Replace the four bg_* tables from the Kaggle CSVs in one pass.
+    Each transformed chunk is inserted with batched executemany and committed
+    as its own transaction. Afterwards the secondary indexes, bg_sales_summary
+    and app_game_link are rebuilt.
+    """
+    counts = {t: 0 for t in TABLE_COLUMNS}
+    t0 = time.perf_counter()
+
+    conn = POOL.acquire()
+    broken = False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET SESSION foreign_key_checks = 0")
+            cur.execute("SET SESSION unique_checks = 0")
+            cur.execute("SET @skip_sales_summary = 1")
+
+            if rebuild_indexes:
+                log("Dropping secondary indexes...")
+                drop_secondary_indexes(cur)
+
+            for table in LOAD_ORDER_CLEAR:
+                cur.execute(f"DELETE FROM {table}")
+            conn.commit()
+
+            for table, frame in source_frames(chunk_rows):
+                rows = frame_rows(frame)
+                sql = insert_sql(table)
+                for start in range(0, len(rows), batch_size):
+                    cur.executemany(sql, rows[start:start + batch_size])
+                conn.commit()
+                counts[table] += len(rows)
+                log(f"  {table}: {counts[table]} rows")
+
+            if rebuild_indexes:
+                log("Rebuilding secondary indexes...")
+                add_secondary_indexes(cur)
+    except BaseException:
+        try:
+            conn.rollback()
+        except Error:
+            broken = True
+        raise
+    finally:
+        if not broken:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SET SESSION foreign_key_checks = 1")
+                    cur.execute("SET SESSION unique_checks = 1")
+                    cur.execute("SET @skip_sales_summary = NULL")
+            except Error:
+                broken = True
+        POOL.release(conn, discard=broken)
+
+    invalidate_cache(*TABLE_COLUMNS)
+    log("Rebuilding bg_sales_summary...")
+    rebuild_sales_summary()
+    log("Linking games across datasets...")
+    link_stats = build_links()
+    log("Rebuilding bg_sales_cube...")
+    counts["bg_sales_cube"] = rebuild_sales_cube()
+
+    bump_data_version("sales")
+
+    counts["app_game_link"] = link_stats["links"]
+    counts["seconds"] = round(time.perf_counter() - t0, 2)
+    return counts
+
+
+def _norm_value(v):
+    """Make source values and values read back from MySQL fingerprint the same."""
+    if v is None:
+        return None
+    if isinstance(v, (float, Decimal)):
+        v = round(float(v), 3)
+        return int(v) if v.is_integer() else v
+    return v
+
+
+# Natural keys for the incremental diff. makeCSVs numbers rows by position,
+# so those ids shift as soon as a row is inserted upstream; rows are matched
+# on these columns instead (records on their game's key plus region).
+NATURAL_KEYS = {
+    "bg_esrb_game": ("title", "release_date"),
+    "bg_meta_game": ("title", "platform", "release_date"),
+    "bg_sales_game": ("title", "platform", "release_year", "publisher"),
+    "bg_sales_record": ("region",),
+}
+
+# Only rows from these sources are diffed; synthetic rows are never touched
+TABLE_SOURCES = {
+    "bg_esrb_game": makeCSVs.ESRB_SOURCE,
+    "bg_meta_game": makeCSVs.META_SOURCE,
+    "bg_sales_game": makeCSVs.SALES_SOURCE,
+    "bg_sales_record": makeCSVs.SALES_SOURCE,
+}
+
+
+def _key_part(v):
+    v = _norm_value(v)
+    return None if v is None else " ".join(str(v).split()).casefold()
+
+
+def natural_key(table, row, parent=None):
+    """Natural key of a bg_* row; parent is the game's key for bg_sales_record."""
+    cols = TABLE_COLUMNS[table]
+    key = tuple(_key_part(row[cols.index(c)]) for c in NATURAL_KEYS[table])
+    return (parent,) + key if table == "bg_sales_record" else key
+
+
+def fingerprint(table, row):
+    """Hash of everything but the ids (and, for records, the parent game id)."""
+    payload = row[2:] if table == "bg_sales_record" else row[1:]
+    return hashlib.md5(repr(tuple(_norm_value(v) for v in payload)).encode("utf-8")).digest()
+
+
+class TableDelta:
+    """
+    Source rows of one bg_* table matched to the loaded rows by natural key.
+    Rows sharing a natural key are told apart by order of appearance. A
+    matched row keeps its id (so app_* rows pointing at it stay put); a new
+    row gets the next free id.
+    """
+
+    def __init__(self, table, existing, next_id):
+        self.table = table
+        self.existing = existing        # natural key -> (id, fingerprint)
+        self.next_id = next_id
+        self.ids = {}                   # natural key -> id in the DB after the load
+        self.occurrences = {}
+        self.stats = {"insert": 0, "update": 0, "delete": 0, "unchanged": 0}
+
+    def key(self, row, parent=None):
+        base = natural_key(self.table, row, parent)
+        n = self.occurrences.get(base, 0)
+        self.occurrences[base] = n + 1
+        return base + (n,)
+
+    def classify(self, row, parent=None):
+        """Return (kind, row with its DB id, natural key); kind is "insert", "update" or None."""
+        nk = self.key(row, parent)
+        old = self.existing.get(nk)
+        if old is None:
+            row_id, kind = self.next_id, "insert"
+            self.next_id += 1
+        else:
+            row_id = old[0]
+            kind = None if old[1] == fingerprint(self.table, row) else "update"
+        self.ids[nk] = row_id
+        self.stats[kind or "unchanged"] += 1
+        return kind, (row_id,) + tuple(row[1:]), nk
+
+    def gone(self):
+        """Ids of loaded rows whose natural key is no longer in the source."""
+        ids = sorted(row_id for nk, (row_id, _) in self.existing.items() if nk not in self.ids)
+        self.stats["delete"] = len(ids)
+        return ids
+
+
+def loaded_rows(cur, table, parents=None):
+    """
+    Return ({natural key: (id, fingerprint)}, {id: natural key}) for the rows
+    of table that came from its Kaggle source. parents maps sales_game_id to
+    the game's natural key when reading bg_sales_record.
+    """
+    cols = TABLE_COLUMNS[table]
+    cur.execute(
+        f"SELECT {', '.join(cols)} FROM {table} WHERE source = %s ORDER BY {cols[0]}",
+        (TABLE_SOURCES[table],),
+    )
+    keyer = TableDelta(table, {}, 0)
+    out = {}
+    keys = {}
+    while True:
+        batch = cur.fetchmany(BATCH_SIZE)
+        if not batch:
+            return out, keys
+        for row in batch:
+            parent = None
+            if parents is not None:
+                parent = parents.get(row[1])
+                if parent is None:
+                    continue
+            nk = keyer.key(row, parent)
+            out[nk] = (row[0], fingerprint(table, row))
+            keys[row[0]] = nk
+
+
+def next_ids(cur):
+    out = {}
+    for table, cols in TABLE_COLUMNS.items():
+        cur.execute(f"SELECT COALESCE(MAX({cols[0]}), 0) + 1 FROM {table}")
+        out[table] = cur.fetchone()[0]
+    return out
+
+
+def upsert_sql(table):
+    cols = TABLE_COLUMNS[table]
+    updates = ", ".join(f"{c} = new.{c}" for c in cols[1:])
+    return f"{insert_sql(table)} AS new ON DUPLICATE KEY UPDATE {updates}"
+
+
+def plan_chunk(table, rows, deltas, source_game_keys):
+    """
+    Classify one source chunk. Returns (inserts, updates) with DB ids filled
+    in. source_game_keys collects positional sales_game_id -> natural key so
+    the records that follow can find their game.
+    """
+    delta = deltas[table]
+    inserts, updates = [], []
+    for row in rows:
+        source_id, parent = row[0], None
+        if table == "bg_sales_record":
+            parent = source_game_keys[row[1]]
+            row = (row[0], deltas["bg_sales_game"].ids[parent]) + tuple(row[2:])
+        kind, row, nk = delta.classify(row, parent)
+        if table == "bg_sales_game":
+            source_game_keys[source_id] = nk
+        if kind == "insert":
+            inserts.append(row)
+        elif kind == "update":
+            updates.append(row)
+    return inserts, updates
+
+
+def incremental_load(batch_size=BATCH_SIZE, chunk_rows=makeCSVs.CHUNK_ROWS, log=print):
+    """
+    Refresh the bg_* tables in place without touching any app_* data.
+    Source rows are matched to the loaded Kaggle rows by natural key
+    (NATURAL_KEYS) and fingerprinted; matched rows keep their ids, so
+    reviews, favorites and search history stay on the same game. Only new
+    or changed rows are written, one transaction per chunk: new rows with a
+    plain INSERT under fresh ids, changed rows as an upsert on their
+    existing id. Rows that left the source are deleted at the end, children
+    first. Synthetic rows are left alone. The bg_sales_record triggers keep
+    bg_sales_summary in sync, and app_game_link is relinked only when a
+    game table changed.
+    """
+    t0 = time.perf_counter()
+
+    conn = POOL.acquire()
+    broken = False
+    try:
+        with conn.cursor(buffered=False) as cur:
+            current = {}
+            game_keys = {}
+            for table in ("bg_esrb_game", "bg_meta_game", "bg_sales_game"):
+                current[table], keys = loaded_rows(cur, table)
+                if table == "bg_sales_game":
+                    game_keys = keys
+            current["bg_sales_record"], _ = loaded_rows(cur, "bg_sales_record", parents=game_keys)
+        with conn.cursor() as cur:
+            start_ids = next_ids(cur)
+        conn.commit()
+
+        deltas = {t: TableDelta(t, current[t], start_ids[t]) for t in TABLE_COLUMNS}
+        source_game_keys = {}
+        with conn.cursor() as cur:
+            for table, frame in source_frames(chunk_rows):
+                inserts, updates = plan_chunk(table, frame_rows(frame), deltas, source_game_keys)
+                for sql, rows in ((insert_sql(table), inserts), (upsert_sql(table), updates)):
+                    for start in range(0, len(rows), batch_size):
+                        cur.executemany(sql, rows[start:start + batch_size])
+                if inserts or updates:
+                    conn.commit()
+
+            for table in ("bg_sales_record", "bg_sales_game", "bg_esrb_game", "bg_meta_game"):
+                gone = deltas[table].gone()
+                pk = TABLE_COLUMNS[table][0]
+                for start in range(0, len(gone), batch_size):
+                    chunk = gone[start:start + batch_size]
+                    marks = ", ".join(["%s"] * len(chunk))
+                    cur.execute(f"DELETE FROM {table} WHERE {pk} IN ({marks})", chunk)
+                    conn.commit()
+    except BaseException:
+        try:
+            conn.rollback()
+        except Error:
+            broken = True
+        raise
+    finally:
+        POOL.release(conn, discard=broken)
+
+    stats = {t: d.stats for t, d in deltas.items()}
+    invalidate_cache(*TABLE_COLUMNS, "bg_sales_summary")
+    for table, s in stats.items():
+        log(f"  {table}: +{s['insert']} ~{s['update']} -{s['delete']} ({s['unchanged']} unchanged)")
+
+    sales_changed = any(
+        stats[t][k] for t in ("bg_sales_game", "bg_sales_record") for k in ("insert", "update", "delete")
+    )
+    games_changed = any(
+        stats[t][k] for t in ("bg_sales_game", "bg_esrb_game", "bg_meta_game") for k in ("insert", "update", "delete")
+    )
+    if games_changed:
+        log("Relinking games across datasets...")
+        build_links()
+    if sales_changed or games_changed:
+        log("Rebuilding bg_sales_cube...")
+        rebuild_sales_cube()
+    if sales_changed:
+        bump_data_version("sales")
+
+    stats["seconds"] = round(time.perf_counter() - t0, 2)
+    return stats
+
+
+def check_delta():
+    """
+    Offline check of the natural-key diff: a game inserted at the top of
+    the source shifts every positional id, yet must come out as exactly one
+    insert (plus its records) with every other row unchanged and on its old id.
+    """
+    src = makeCSVs.SALES_SOURCE
+    games = [
+        (1, "Wii Sports", "Wii", "Sports", "Nintendo", None, 2006, src),
+        (2, "Tetris", "GB", "Puzzle", "Nintendo", None, 1989, src),
+        (3, "Tetris", "NES", "Puzzle", "Nintendo", None, 1988, src),
+    ]
+    records = [(i, g[0], "NA_Sales", 1.5 * i, src) for i, g in enumerate(games, 1)]
+
+    current = {t: {} for t in TABLE_COLUMNS}
+    game_keys = {}
+    keyer = TableDelta("bg_sales_game", {}, 0)
+    for g in games:
+        nk = keyer.key(g)
+        current["bg_sales_game"][nk] = (g[0], fingerprint("bg_sales_game", g))
+        game_keys[g[0]] = nk
+    keyer = TableDelta("bg_sales_record", {}, 0)
+    for r in records:
+        current["bg_sales_record"][keyer.key(r, game_keys[r[1]])] = (r[0], fingerprint("bg_sales_record", r))
+
+    # Upstream gained one game at the top: makeCSVs renumbers everything
+    new_game = (1, "Mario Kart Wii", "Wii", "Racing", "Nintendo", None, 2008, src)
+    source_games = [new_game] + [(g[0] + 1,) + g[1:] for g in games]
+    source_records = [(1, 1, "NA_Sales", 15.0, src)] + [(r[0] + 1, r[1] + 1) + r[2:] for r in records]
+
+    deltas = {t: TableDelta(t, current[t], 4) for t in TABLE_COLUMNS}
+    source_game_keys = {}
+    game_ins, game_upd = plan_chunk("bg_sales_game", source_games, deltas, source_game_keys)
+    rec_ins, rec_upd = plan_chunk("bg_sales_record", source_records, deltas, source_game_keys)
+
+    problems = []
+    if len(game_ins) != 1 or game_upd or game_ins[0][1] != "Mario Kart Wii" or game_ins[0][0] != 4:
+        problems.append(f"games: inserts={game_ins} updates={game_upd}")
+    if len(rec_ins) != 1 or rec_upd or rec_ins[0][1] != 4:
+        problems.append(f"records: inserts={rec_ins} updates={rec_upd}")
+    kept = {nk: row_id for nk, row_id in deltas["bg_sales_game"].ids.items() if row_id != 4}
+    if sorted(kept.values()) != [1, 2, 3] or deltas["bg_sales_game"].gone():
+        problems.append(f"existing games moved: {kept}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the Kaggle CSVs straight into the bg_* tables.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"rows per executemany call (default {BATCH_SIZE})")
+    parser.add_argument("--chunk-rows", type=int, default=makeCSVs.CHUNK_ROWS,
+                        help=f"source rows per chunk / transaction (default {makeCSVs.CHUNK_ROWS})")
+    parser.add_argument("--keep-indexes", action="store_true",
+                        help="leave secondary indexes in place during the load")
+    parser.add_argument("--incremental", action="store_true",
+                        help="apply only inserted/changed/deleted rows; app_* tables are left intact")
+    parser.add_argument("--check-delta", action="store_true",
+                        help="check the incremental diff offline (no database needed) and exit")
+    args = parser.parse_args()
+
+    if args.check_delta:
+        problems = check_delta()
+        for p in problems:
+            print(f"[FAIL] {p}")
+        print("Incremental diff check: " + ("FAILED" if problems else "ok (1 insert, 0 updates)"))
+        sys.exit(1 if problems else 0)
+
+    try:
+        if args.incremental:
+            stats = incremental_load(args.batch_size, args.chunk_rows)
+            print(f"Incremental refresh complete in {stats['seconds']}s.")
+            return
+        counts = bulk_load(args.batch_size, args.chunk_rows, rebuild_indexes=not args.keep_indexes)
+    except Error as e:
+        print(f"[DB ERROR] {e}")
+        sys.exit(1)
+    print(f"Load complete in {counts.pop('seconds')}s: " + ", ".join(f"{t}={n}" for t, n in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+from mysql.connector import Error
+
+from dataAccess import (
+    LOGIN_SQL,
+    POOL,
+    QUERY_CACHE,
+    fetch_rows,
+    fetch_value,
+    pool_stats,
+    referenced_tables,
+    run_query,
+)
+from gameApp import (
+    add_favorite_item,
+    average_sales_by_esrb,
+    create_favorite_list,
+    create_review,
+    create_user,
+    delete_user,
+    list_top_global_sales,
+    print_table,
+    title_search_query,
+    update_review,
+    update_user_settings,
+)
+from GUIApp import build_search_query
+
+
+# Operation weights per workload mix
+MIXES = {
+    "browse": {
+        "cli_search": 30, "gui_search": 30, "top_sales": 15, "esrb_avg": 10, "login": 15,
+    },
+    "mixed": {
+        "cli_search": 20, "gui_search": 20, "top_sales": 10, "esrb_avg": 5, "login": 10,
+        "create_review": 15, "update_review": 5, "add_favorite": 10, "update_settings": 5,
+    },
+    "write": {
+        "gui_search": 10, "login": 5, "create_review": 35, "update_review": 15,
+        "add_favorite": 25, "update_settings": 10,
+    },
+}
+
+SEARCH_TERMS = ["mario", "zelda", "fifa", "call of duty", "pokemon", "halo", "lego", "star wars", "need for speed", "a"]
+PLATFORMS = [None, None, "Wii", "PS2", "X360", "PS3", "DS"]
+GENRES = [None, None, "Sports", "Action", "Shooter", "Racing", "Platform"]
+
+# MySQL lock errors, counted apart from other failures
+LOCK_ERRORS = {1205: "lock_wait_timeout", 1213: "deadlock"}
+
+_devnull = open(os.devnull, "w")
+
+
+class VirtualUser:
+    """One simulated client: its own app_user row, favorite list and reviews."""
+
+    def __init__(self, n, run_id, rng, game_ids):
+        self.rng = rng
+        self.game_ids = game_ids
+        self.username = f"loadtest_{run_id}_{n}"
+        self.user_id = None
+        self.list_id = None
+        self.reviews = []
+
+    def setup(self):
+        self.user_id = create_user(self.username, f"{self.username}@example.test", "loadtest")
+        create_favorite_list(self.user_id, "Load test")
+        self.list_id = fetch_value(
+            "SELECT favorite_list_id FROM app_favorite_list WHERE user_id = %s AND list_name = %s",
+            (self.user_id, "Load test"),
+        )
+
+    def teardown(self):
+        if self.user_id is not None:
+            delete_user(self.user_id)
+
+    # Operations: each drives the same function the CLI or GUI calls
+    def cli_search(self):
+        run_query(*title_search_query(self.rng.choice(SEARCH_TERMS)))
+
+    def gui_search(self):
+        run_query(*build_search_query(
+            title=self.rng.choice(SEARCH_TERMS + [None]),
+            platform=self.rng.choice(PLATFORMS),
+            genre=self.rng.choice(GENRES),
+        ))
+
+    def top_sales(self):
+        list_top_global_sales(limit=self.rng.choice((10, 25, 50)))
+
+    def esrb_avg(self):
+        average_sales_by_esrb()
+
+    def login(self):
+        run_query(LOGIN_SQL, (self.username,))
+
+    def create_review(self):
+        create_review(self.user_id, self.rng.randint(1, 10), "load test", sales_game_id=self.rng.choice(self.game_ids))
+        review_id = fetch_value("SELECT MAX(review_id) FROM app_game_review WHERE user_id = %s", (self.user_id,))
+        if review_id is not None:
+            self.reviews.append(review_id)
+
+    def update_review(self):
+        if not self.reviews:
+            return self.create_review()
+        update_review(self.rng.choice(self.reviews), rating=self.rng.randint(1, 10))
+
+    def add_favorite(self):
+        add_favorite_item(self.list_id, sales_game_id=self.rng.choice(self.game_ids))
+
+    def update_settings(self):
+        update_user_settings(self.user_id, self.rng.choice(PLATFORMS), self.rng.choice(GENRES))
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, op, seconds, error=None):
+        with self._lock:
+            if error is None:
+                self.latencies.setdefault(op, []).append(seconds)
+            else:
+                self.errors.setdefault(op, {}).setdefault(error, 0)
+                self.errors[op][error] += 1
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[i]
+
+
+def _error_name(e):
+    if isinstance(e, Error) and e.errno in LOCK_ERRORS:
+        return LOCK_ERRORS[e.errno]
+    return type(e).__name__
+
+
+def _vu_loop(vu, mix, recorder, stop, think_s):
+    ops, weights = zip(*mix.items())
+    while not stop.is_set():
+        op = vu.rng.choices(ops, weights=weights)[0]
+        t0 = time.perf_counter()
+        try:
+            getattr(vu, op)()
+            recorder.add(op, time.perf_counter() - t0)
+        except Exception as e:
+            recorder.add(op, time.perf_counter() - t0, _error_name(e))
+        if think_s:
+            stop.wait(vu.rng.expovariate(1 / think_s))
+
+
+def run_load(users=20, duration=30.0, mix="mixed", think_ms=100.0, ramp_s=2.0, seed=42, keep_users=False,
+             use_cache=True, log=print):
+    """
+    Run `users` virtual users against the shared pool for `duration`
+    seconds and return the report dict. Each user picks operations by the
+    mix weights, with exponential think time between them. Results go
+    through QUERY_CACHE only where the real functions use it (top_sales and
+    esrb_avg), and the report counts those cache hits; use_cache=False
+    sends every read to MySQL.
+    """
+    run_id = datetime.now().strftime("%H%M%S")
+    game_ids = [r[0] for r in fetch_rows("SELECT sales_game_id FROM bg_sales_game ORDER BY sales_game_id LIMIT 5000")]
+    if not game_ids:
+        raise RuntimeError("bg_sales_game is empty; load the data first")
+
+    rng = random.Random(seed)
+    vus = [VirtualUser(n, run_id, random.Random(rng.random()), game_ids) for n in range(users)]
+    log(f"Creating {users} virtual users...")
+    for vu in vus:
+        vu.setup()
+
+    QUERY_CACHE.clear()
+    QUERY_CACHE.enabled = use_cache
+    cache_before = QUERY_CACHE.snapshot()
+    pool_before = pool_stats()
+    recorder = Recorder()
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=_vu_loop, args=(vu, MIXES[mix], recorder, stop, think_ms / 1000),
+                         name=f"vu-{n}", daemon=True)
+        for n, vu in enumerate(vus)
+    ]
+
+    log(f"Running mix '{mix}' for {duration:g}s...")
+    t0 = time.perf_counter()
+    # The CLI analytics print their tables; keep them off the console
+    with contextlib.redirect_stdout(_devnull):
+        for t in threads:
+            t.start()
+            if ramp_s:
+                time.sleep(ramp_s / len(threads))
+        stop.wait(max(0.0, duration - (time.perf_counter() - t0)))
+        stop.set()
+        for t in threads:
+            t.join()
+    elapsed = time.perf_counter() - t0
+    pool_after = pool_stats()
+    cache_after = QUERY_CACHE.snapshot()
+    QUERY_CACHE.enabled = True
+
+    if not keep_users:
+        log("Removing virtual users...")
+        for vu in vus:
+            vu.teardown()
+
+    return build_report(recorder, elapsed, users, mix, pool_before, pool_after, cache_before, cache_after, use_cache)
+
+
+def build_report(recorder, elapsed, users, mix, pool_before, pool_after, cache_before, cache_after, use_cache=True):
+    ops = []
+    for op in sorted(set(recorder.latencies) | set(recorder.errors)):
+        lat = sorted(recorder.latencies.get(op, []))
+        errors = recorder.errors.get(op, {})
+        n_err = sum(errors.values())
+        total = len(lat) + n_err
+        ops.append({
+            "op": op,
+            "count": total,
+            "errors": n_err,
+            "error_pct": round(100 * n_err / total, 2) if total else 0.0,
+            "ops_per_s": round(total / elapsed, 2),
+            "p50_ms": round(1000 * _percentile(lat, 50), 2),
+            "p95_ms": round(1000 * _percentile(lat, 95), 2),
+            "p99_ms": round(1000 * _percentile(lat, 99), 2),
+            "max_ms": round(1000 * lat[-1], 2) if lat else 0.0,
+            "error_types": errors,
+        })
+
+    total = sum(o["count"] for o in ops)
+    all_lat = sorted(itertools.chain.from_iterable(recorder.latencies.values()))
+    waits = pool_after["waits"] - pool_before["waits"]
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "users": users,
+        "mix": mix,
+        "seconds": round(elapsed, 2),
+        "total_ops": total,
+        "ops_per_s": round(total / elapsed, 2),
+        "error_pct": round(100 * sum(o["errors"] for o in ops) / total, 2) if total else 0.0,
+        "p50_ms": round(1000 * _percentile(all_lat, 50), 2),
+        "p95_ms": round(1000 * _percentile(all_lat, 95), 2),
+        "p99_ms": round(1000 * _percentile(all_lat, 99), 2),
+        "pool": {
+            "size": POOL.max_size,
+            "waits": waits,
+            "avg_wait_ms": round(
+                1000 * (pool_after["wait_seconds"] - pool_before["wait_seconds"]) / waits, 2
+            ) if waits else 0.0,
+            "timeouts": pool_after["timeouts"] - pool_before["timeouts"],
+        },
+        # Reads answered from QUERY_CACHE never reached MySQL
+        "cache": {
+            "enabled": use_cache,
+            "hits": cache_after["hits"] - cache_before["hits"],
+            "misses": cache_after["misses"] - cache_before["misses"],
+        },
+        "ops": ops,
+    }
+
+
+class StubConnection:
+    """
+    Embedded stand-in for a MySQL connection, for sizing runs without a
+    server. Every statement sleeps for a lognormal latency around read_ms /
+    write_ms. Writes hold a per-table lock meanwhile, so contention on the
+    app_* tables shows up as queueing. SELECTs return ten single-column
+    integer rows.
+    """
+
+    read_ms = 2.0
+    write_ms = 5.0
+    _ids = itertools.count(1)
+    _table_locks = {}
+    _locks_guard = threading.Lock()
+
+    def __init__(self):
+        self.connection_id = next(self._ids)
+
+    @classmethod
+    def lock_for(cls, table):
+        with cls._locks_guard:
+            return cls._table_locks.setdefault(table, threading.Lock())
+
+    def cursor(self, **kwargs):
+        return StubCursor(self, dictionary=kwargs.get("dictionary", False))
+
+    def ping(self, reconnect=False):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class StubCursor:
+    def __init__(self, conn, dictionary=False):
+        self.conn = conn
+        self.dictionary = dictionary
+        self.description = None
+        self.column_names = ()
+        self.lastrowid = None
+        self.rowcount = -1
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, sql, params=None):
+        verb = sql.lstrip().split(None, 1)[0].lower()
+        if verb in ("select", "with", "explain"):
+            time.sleep(random.lognormvariate(0, 0.5) * StubConnection.read_ms / 1000)
+            self.column_names = ("value",)
+            self.description = [("value",)]
+            self._rows = [(i,) for i in range(1, 11)]
+            self.rowcount = len(self._rows)
+            return
+        self.description = None
+        self._rows = []
+        locks = [StubConnection.lock_for(t) for t in sorted(referenced_tables(sql))]
+        with contextlib.ExitStack() as stack:
+            for lock in locks:
+                stack.enter_context(lock)
+            time.sleep(random.lognormvariate(0, 0.5) * StubConnection.write_ms / 1000)
+        self.lastrowid = next(StubConnection._ids)
+        self.rowcount = 1
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        if self.dictionary:
+            return [dict(zip(self.column_names, r)) for r in rows]
+        return rows
+
+    def fetchone(self):
+        rows = self.fetchall()
+        return rows[0] if rows else None
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+def use_stub_backend(read_ms=2.0, write_ms=5.0):
+    """Point the shared pool at StubConnection instead of MySQL."""
+    POOL.close_all()
+    StubConnection.read_ms = read_ms
+    StubConnection.write_ms = write_ms
+    POOL.factory = StubConnection
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run concurrent virtual users against the app's data layer.")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users (default 20)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run (default 30)")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed", help="operation mix (default mixed)")
+    parser.add_argument("--think-ms", type=float, default=100.0,
+                        help="mean think time between operations per user (default 100)")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which users start (default 2)")
+    parser.add_argument("--pool-size", type=int, default=None, help="override POOL_CONFIG['max_size']")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", choices=("mysql", "stub"), default="mysql",
+                        help="mysql (DB_CONFIG) or stub, an in-process stand-in with simulated latency")
+    parser.add_argument("--stub-read-ms", type=float, default=2.0)
+    parser.add_argument("--stub-write-ms", type=float, default=5.0)
+    parser.add_argument("--keep-users", action="store_true", help="leave the loadtest_* users in app_user")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="bypass QUERY_CACHE so top_sales / esrb_avg hit MySQL every time")
+    parser.add_argument("--out", default=None, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    if args.backend == "stub":
+        use_stub_backend(args.stub_read_ms, args.stub_write_ms)
+    if args.pool_size:
+        POOL.max_size = args.pool_size
+
+    try:
+        report = run_load(args.users, args.duration, args.mix, args.think_ms, args.ramp, args.seed, args.keep_users,
+                          use_cache=not args.no_cache)
+    except (Error, RuntimeError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    finally:
+        POOL.close_all()
+
+    print()
+    print_table([{k: v for k, v in o.items() if k != "error_types"} for o in report["ops"]])
+    pool = report["pool"]
+    print(
+        f"\n{report['users']} users, mix '{report['mix']}': {report['total_ops']} ops in {report['seconds']}s "
+        f"({report['ops_per_s']} ops/s), p50 {report['p50_ms']} ms, p95 {report['p95_ms']} ms, "
+        f"p99 {report['p99_ms']} ms, {report['error_pct']}% errors"
+    )
+    print(f"Pool of {pool['size']}: {pool['waits']} waits (avg {pool['avg_wait_ms']} ms), {pool['timeouts']} timeouts")
+    cache = report["cache"]
+    if cache["enabled"]:
+        print(f"Query cache: {cache['hits']} hits, {cache['misses']} misses "
+              f"(top_sales / esrb_avg hits never reach MySQL; --no-cache to measure them)")
+    else:
+        print("Query cache: off")
+    for o in report["ops"]:
+        if o["error_types"]:
+            print(f"  {o['op']} errors: " + ", ".join(f"{k}={v}" for k, v in o["error_types"].items()))
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,9 @@
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
 
@@ -5,6 +11,24 @@ ESRB_IN  = "Video_games_esrb_rating.csv"
 META_IN  = "Games.csv"
 SALES_IN = "video_games_sales.csv"
 
+ESRB_OUT         = "bg_esrb_game.csv"
+META_OUT         = "bg_meta_game.csv"
+SALES_GAME_OUT   = "bg_sales_game.csv"
+SALES_RECORD_OUT = "bg_sales_record.csv"
+
+ESRB_SOURCE  = "kaggle:imohtn/video-games-rating-by-esrb"
+META_SOURCE  = "kaggle:mohamedhanyyy/video-games"
+SALES_SOURCE = "kaggle:ulrikthygepedersen/video-games-sales"
+
+REGION_NAMES = {
+    "na_sales", "eu_sales", "jp_sales", "other_sales", "global_sales",
+    "north_america", "europe", "japan", "other", "global",
+}
+
+# Rows per chunk; memory use is bounded by this, not by the input size.
+CHUNK_ROWS = 50_000
+
+
 def pick_col(df, options):
     """Return first matching column name from options (case-insensitive)."""
     lower = {c.lower(): c for c in df.columns}
@@ -14,97 +38,234 @@ def pick_col(df, options):
     return None
 
 
-esrb = pd.read_csv(ESRB_IN)
-
-title_c = pick_col(esrb, ["title", "name", "game", "game_title"])
-esrb_c  = pick_col(esrb, ["esrb", "rating", "esrb_rating"])
-dev_c   = pick_col(esrb, ["developer", "dev"])
-pub_c   = pick_col(esrb, ["publisher", "pub"])
-date_c  = pick_col(esrb, ["release_date", "released", "release", "date"])
-
-out_esrb = pd.DataFrame({
-    "esrb_game_id": range(1, len(esrb) + 1),
-    "title": esrb[title_c] if title_c else None,
-    "esrb": esrb[esrb_c] if esrb_c else None,
-    "developer": esrb[dev_c] if dev_c else None,
-    "publisher": esrb[pub_c] if pub_c else None,
-    "release_date": esrb[date_c] if date_c else None,
-    "source": "kaggle:imohtn/video-games-rating-by-esrb"
-})
-out_esrb.to_csv("bg_esrb_game.csv", index=False)
-
-
-meta = pd.read_csv(META_IN)
-
-title_c = pick_col(meta, ["title", "name", "game", "game_title"])
-plat_c  = pick_col(meta, ["platform", "platforms"])
-ms_c    = pick_col(meta, ["meta_score", "metascore", "metacritic", "critic_score"])
-us_c    = pick_col(meta, ["user_score", "userscore"])
-date_c  = pick_col(meta, ["release_date", "released", "release", "date"])
-dev_c   = pick_col(meta, ["developer", "dev"])
-pub_c   = pick_col(meta, ["publisher", "pub"])
-gen_c   = pick_col(meta, ["genre", "genres"])
-
-out_meta = pd.DataFrame({
-    "meta_game_id": range(1, len(meta) + 1),
-    "title": meta[title_c] if title_c else None,
-    "platform": meta[plat_c] if plat_c else None,
-    "meta_score": pd.to_numeric(meta[ms_c], errors="coerce") if ms_c else None,
-    "user_score": pd.to_numeric(meta[us_c], errors="coerce") if us_c else None,
-    "release_date": meta[date_c] if date_c else None,
-    "developer": meta[dev_c] if dev_c else None,
-    "publisher": meta[pub_c] if pub_c else None,
-    "genre": meta[gen_c] if gen_c else None,
-    "source": "kaggle:mohamedhanyyy/video-games"
-})
-out_meta.to_csv("bg_meta_game.csv", index=False)
-
-
-sales = pd.read_csv(SALES_IN)
-
-title_c = pick_col(sales, ["name", "title", "game", "game_title"])
-plat_c  = pick_col(sales, ["platform"])
-gen_c   = pick_col(sales, ["genre"])
-pub_c   = pick_col(sales, ["publisher"])
-dev_c   = pick_col(sales, ["developer"])
-year_c  = pick_col(sales, ["year", "release_year"])
-
-
-region_cols = [c for c in sales.columns if c.lower() in {
-    "na_sales","eu_sales","jp_sales","other_sales","global_sales",
-    "north_america","europe","japan","other","global"
-}]
-
-
-out_sales_game = pd.DataFrame({
-    "sales_game_id": range(1, len(sales) + 1),
-    "title": sales[title_c] if title_c else None,
-    "platform": sales[plat_c] if plat_c else None,
-    "genre": sales[gen_c] if gen_c else None,
-    "publisher": sales[pub_c] if pub_c else None,
-    "developer": sales[dev_c] if dev_c else None,
-    "release_year": pd.to_numeric(sales[year_c], errors="coerce") if year_c else None,
-    "source": "kaggle:ulrikthygepedersen/video-games-sales"
-})
-out_sales_game.to_csv("bg_sales_game.csv", index=False)
-
-
-records = []
-sales_id = 1
-for i in range(len(sales)):
-    game_id = i + 1
-    for col in region_cols:
-        val = sales.at[i, col]
-        if pd.isna(val):
-            continue
-      
-        records.append([sales_id, game_id, col, float(val), "kaggle:ulrikthygepedersen/video-games-sales"])
-        sales_id += 1
-
-out_sales_record = pd.DataFrame(records, columns=[
-    "sales_id", "sales_game_id", "region", "sales_millions", "source"
-])
-out_sales_record.to_csv("bg_sales_record.csv", index=False)
-
-print("Wrote: bg_esrb_game.csv, bg_meta_game.csv, bg_sales_game.csv, bg_sales_record.csv")
-print("Region columns used:", region_cols)
\ No newline at end of file
+def read_header(path):
+    return pd.read_csv(path, nrows=0)
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        yield chunk.reset_index(drop=True)
+
+
+def write_chunk(df, path, first):
+    df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+
+
+def esrb_columns(header):
+    return {
+        "title": pick_col(header, ["title", "name", "game", "game_title"]),
+        "esrb": pick_col(header, ["esrb", "rating", "esrb_rating"]),
+        "developer": pick_col(header, ["developer", "dev"]),
+        "publisher": pick_col(header, ["publisher", "pub"]),
+        "release_date": pick_col(header, ["release_date", "released", "release", "date"]),
+    }
+
+
+def meta_columns(header):
+    return {
+        "title": pick_col(header, ["title", "name", "game", "game_title"]),
+        "platform": pick_col(header, ["platform", "platforms"]),
+        "meta_score": pick_col(header, ["meta_score", "metascore", "metacritic", "critic_score"]),
+        "user_score": pick_col(header, ["user_score", "userscore"]),
+        "release_date": pick_col(header, ["release_date", "released", "release", "date"]),
+        "developer": pick_col(header, ["developer", "dev"]),
+        "publisher": pick_col(header, ["publisher", "pub"]),
+        "genre": pick_col(header, ["genre", "genres"]),
+    }
+
+
+def sales_columns(header):
+    return {
+        "title": pick_col(header, ["name", "title", "game", "game_title"]),
+        "platform": pick_col(header, ["platform"]),
+        "genre": pick_col(header, ["genre"]),
+        "publisher": pick_col(header, ["publisher"]),
+        "developer": pick_col(header, ["developer"]),
+        "release_year": pick_col(header, ["year", "release_year"]),
+        "regions": [c for c in header.columns if c.lower() in REGION_NAMES],
+    }
+
+
+def _col(chunk, name):
+    return chunk[name] if name else None
+
+
+def _num(chunk, name):
+    return pd.to_numeric(chunk[name], errors="coerce") if name else None
+
+
+def transform_esrb(chunk, cols, start_id):
+    return pd.DataFrame({
+        "esrb_game_id": range(start_id, start_id + len(chunk)),
+        "title": _col(chunk, cols["title"]),
+        "esrb": _col(chunk, cols["esrb"]),
+        "developer": _col(chunk, cols["developer"]),
+        "publisher": _col(chunk, cols["publisher"]),
+        "release_date": _col(chunk, cols["release_date"]),
+        "source": ESRB_SOURCE,
+    })
+
+
+def transform_meta(chunk, cols, start_id):
+    return pd.DataFrame({
+        "meta_game_id": range(start_id, start_id + len(chunk)),
+        "title": _col(chunk, cols["title"]),
+        "platform": _col(chunk, cols["platform"]),
+        "meta_score": _num(chunk, cols["meta_score"]),
+        "user_score": _num(chunk, cols["user_score"]),
+        "release_date": _col(chunk, cols["release_date"]),
+        "developer": _col(chunk, cols["developer"]),
+        "publisher": _col(chunk, cols["publisher"]),
+        "genre": _col(chunk, cols["genre"]),
+        "source": META_SOURCE,
+    })
+
+
+def transform_sales_games(chunk, cols, start_id):
+    return pd.DataFrame({
+        "sales_game_id": range(start_id, start_id + len(chunk)),
+        "title": _col(chunk, cols["title"]),
+        "platform": _col(chunk, cols["platform"]),
+        "genre": _col(chunk, cols["genre"]),
+        "publisher": _col(chunk, cols["publisher"]),
+        "developer": _col(chunk, cols["developer"]),
+        "release_year": _num(chunk, cols["release_year"]),
+        "source": SALES_SOURCE,
+    })
+
+
+def transform_sales_records(chunk, cols, start_game_id, start_sales_id):
+    """
+    Unpivot the region columns into one row per (game, region) with a value.
+    Row-major order over the region matrix keeps the numbering identical to
+    the old per-cell loop: game by game, regions in header order.
+    """
+    regions = cols["regions"]
+    values = chunk[regions].to_numpy(dtype=float)
+    n_games, n_regions = values.shape
+
+    flat = values.ravel()
+    keep = ~np.isnan(flat)
+    n_kept = int(keep.sum())
+
+    return pd.DataFrame({
+        "sales_id": np.arange(start_sales_id, start_sales_id + n_kept),
+        "sales_game_id": np.repeat(np.arange(start_game_id, start_game_id + n_games), n_regions)[keep],
+        "region": np.tile(np.array(regions, dtype=object), n_games)[keep],
+        "sales_millions": flat[keep],
+        "source": SALES_SOURCE,
+    })
+
+
+def convert_esrb(path_in=ESRB_IN, path_out=ESRB_OUT, chunk_rows=CHUNK_ROWS):
+    cols = esrb_columns(read_header(path_in))
+    next_id = 1
+    for chunk in read_chunks(path_in, chunk_rows):
+        write_chunk(transform_esrb(chunk, cols, next_id), path_out, first=next_id == 1)
+        next_id += len(chunk)
+    if next_id == 1:
+        write_chunk(transform_esrb(read_header(path_in), cols, 1), path_out, first=True)
+    return next_id - 1
+
+
+def convert_meta(path_in=META_IN, path_out=META_OUT, chunk_rows=CHUNK_ROWS):
+    cols = meta_columns(read_header(path_in))
+    next_id = 1
+    for chunk in read_chunks(path_in, chunk_rows):
+        write_chunk(transform_meta(chunk, cols, next_id), path_out, first=next_id == 1)
+        next_id += len(chunk)
+    if next_id == 1:
+        write_chunk(transform_meta(read_header(path_in), cols, 1), path_out, first=True)
+    return next_id - 1
+
+
+def convert_sales(path_in=SALES_IN, games_out=SALES_GAME_OUT, records_out=SALES_RECORD_OUT, chunk_rows=CHUNK_ROWS):
+    cols = sales_columns(read_header(path_in))
+    next_game_id = 1
+    next_sales_id = 1
+    for chunk in read_chunks(path_in, chunk_rows):
+        first = next_game_id == 1
+        records = transform_sales_records(chunk, cols, next_game_id, next_sales_id)
+        write_chunk(transform_sales_games(chunk, cols, next_game_id), games_out, first)
+        write_chunk(records, records_out, first)
+        next_game_id += len(chunk)
+        next_sales_id += len(records)
+    if next_game_id == 1:
+        empty = read_header(path_in)
+        write_chunk(transform_sales_games(empty, cols, 1), games_out, first=True)
+        write_chunk(transform_sales_records(empty, cols, 1, 1), records_out, first=True)
+    return next_game_id - 1, next_sales_id - 1, cols["regions"]
+
+
+def _sales_part(chunk, cols, start_game_id, start_sales_id):
+    """Worker side of the parallel sales ingest: transform one chunk and serialize it."""
+    games = transform_sales_games(chunk, cols, start_game_id)
+    records = transform_sales_records(chunk, cols, start_game_id, start_sales_id)
+    return games.to_csv(index=False, header=False), records.to_csv(index=False, header=False)
+
+
+def convert_sales_parallel(pool, workers, path_in=SALES_IN, games_out=SALES_GAME_OUT,
+                           records_out=SALES_RECORD_OUT, chunk_rows=CHUNK_ROWS):
+    """
+    Same output as convert_sales, with the per-chunk transform and CSV
+    serialization fanned out to the process pool. Ids are assigned here,
+    before dispatch (the record count of a chunk is just its non-null region
+    cells), and parts are written back in submission order, so numbering is
+    identical to a sequential run. At most 2 * workers chunks are in flight.
+    """
+    cols = sales_columns(read_header(path_in))
+    empty = read_header(path_in)
+    write_chunk(transform_sales_games(empty, cols, 1), games_out, first=True)
+    write_chunk(transform_sales_records(empty, cols, 1, 1), records_out, first=True)
+
+    next_game_id = 1
+    next_sales_id = 1
+    pending = deque()
+    with open(games_out, "a", newline="") as g_out, open(records_out, "a", newline="") as r_out:
+        def flush_one():
+            games_csv, records_csv = pending.popleft().result()
+            g_out.write(games_csv)
+            r_out.write(records_csv)
+
+        for chunk in read_chunks(path_in, chunk_rows):
+            n_records = int(chunk[cols["regions"]].notna().to_numpy().sum())
+            pending.append(pool.submit(_sales_part, chunk, cols, next_game_id, next_sales_id))
+            next_game_id += len(chunk)
+            next_sales_id += n_records
+            while len(pending) >= 2 * workers:
+                flush_one()
+        while pending:
+            flush_one()
+
+    return next_game_id - 1, next_sales_id - 1, cols["regions"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the Kaggle CSVs into bg_*.csv load files.")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS,
+                        help=f"rows read per chunk (default {CHUNK_ROWS})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes; 1 runs sequentially, 0 uses every core")
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    if workers > 1:
+        # ESRB and Metacritic each run in their own worker while the sales
+        # source is split chunk by chunk across the rest of the pool.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            esrb_job = pool.submit(convert_esrb, chunk_rows=args.chunk_rows)
+            meta_job = pool.submit(convert_meta, chunk_rows=args.chunk_rows)
+            _, _, region_cols = convert_sales_parallel(pool, workers, chunk_rows=args.chunk_rows)
+            esrb_job.result()
+            meta_job.result()
+    else:
+        convert_esrb(chunk_rows=args.chunk_rows)
+        convert_meta(chunk_rows=args.chunk_rows)
+        _, _, region_cols = convert_sales(chunk_rows=args.chunk_rows)
+
+    print("Wrote: bg_esrb_game.csv, bg_meta_game.csv, bg_sales_game.csv, bg_sales_record.csv")
+    print("Region columns used:", region_cols)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROW_LIST = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """
+    Normalized shape of a statement: literals and placeholders become ?,
+    IN lists and multi-row VALUES collapse, whitespace and case are folded.
+    Queries that differ only in their values share a fingerprint.
+    """
+    text = _STRING_LITERAL.sub("?", sql or "")
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _VALUE_LIST.sub("(...)", text)
+    text = _ROW_LIST.sub("(...)", text)
+    return _WHITESPACE.sub(" ", text).strip().rstrip(";").strip().lower()
+
+
+def fingerprint_id(fp):
+    return hashlib.md5(fp.encode("utf-8")).hexdigest()[:12]
+
+
+def _bucket(ms):
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+
+class _Timing:
+    """Accumulated stats for one fingerprint."""
+
+    __slots__ = ("fp", "calls", "errors", "cache_hits", "rows", "max_rows",
+                 "connect", "execute", "fetch", "total", "max_ms", "buckets", "last_explain", "explained_at")
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.calls = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.rows = 0
+        self.max_rows = 0
+        self.connect = 0.0
+        self.execute = 0.0
+        self.fetch = 0.0
+        self.total = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.last_explain = None
+        self.explained_at = None
+
+    def percentile(self, p):
+        """Upper bound (ms) of the bucket holding the p-th percentile call."""
+        if not self.calls:
+            return 0.0
+        target = p / 100.0 * self.calls
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target and n:
+                if i < len(LATENCY_BUCKETS_MS):
+                    return round(min(float(LATENCY_BUCKETS_MS[i]), self.max_ms), 2)
+                break
+        return round(self.max_ms, 2)
+
+
+class QueryStats:
+    """
+    Per-fingerprint latency histograms plus a bounded slow-query log.
+
+    record() is called once per statement with the time spent acquiring a
+    connection, executing and fetching (seconds). Calls at or above slow_ms
+    go to the slow log (and to slow_log_file as JSON lines when set).
+    explain_slow asks the caller to attach EXPLAIN FORMAT=JSON output; the
+    plan is captured at most once per explain_interval per fingerprint.
+    """
+
+    def __init__(self, enabled=True, slow_ms=200.0, explain_slow=False, explain_interval=300.0,
+                 slow_log_size=200, slow_log_file=None):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.explain_slow = explain_slow
+        self.explain_interval = explain_interval
+        self.slow_log_file = slow_log_file
+
+        self._by_fp = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+        self.since = datetime.now()
+
+    def _timing(self, sql):
+        fp = fingerprint(sql)
+        timing = self._by_fp.get(fp)
+        if timing is None:
+            timing = self._by_fp[fp] = _Timing(fp)
+        return timing
+
+    def record(self, sql, connect_s, execute_s, fetch_s, rows=0, error=None):
+        """Add one call; returns True when it was slow."""
+        if not self.enabled:
+            return False
+        total_ms = 1000 * (connect_s + execute_s + fetch_s)
+        with self._lock:
+            t = self._timing(sql)
+            t.calls += 1
+            t.connect += connect_s
+            t.execute += execute_s
+            t.fetch += fetch_s
+            t.total += total_ms / 1000
+            t.max_ms = max(t.max_ms, total_ms)
+            t.buckets[_bucket(total_ms)] += 1
+            t.rows += rows
+            t.max_rows = max(t.max_rows, rows)
+            if error is not None:
+                t.errors += 1
+        return total_ms >= self.slow_ms
+
+    def record_cache_hit(self, sql):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._timing(sql).cache_hits += 1
+
+    def wants_explain(self, sql):
+        """True if a slow call of sql should capture its plan now."""
+        if not (self.enabled and self.explain_slow):
+            return False
+        with self._lock:
+            t = self._timing(sql)
+            now = time.monotonic()
+            if t.explained_at is not None and now - t.explained_at < self.explain_interval:
+                return False
+            t.explained_at = now
+            return True
+
+    def log_slow(self, sql, params, connect_s, execute_s, fetch_s, rows, explain=None, error=None):
+        fp = fingerprint(sql)
+        entry = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "fingerprint": fingerprint_id(fp),
+            "total_ms": round(1000 * (connect_s + execute_s + fetch_s), 2),
+            "connect_ms": round(1000 * connect_s, 2),
+            "execute_ms": round(1000 * execute_s, 2),
+            "fetch_ms": round(1000 * fetch_s, 2),
+            "rows": rows,
+            "sql": _WHITESPACE.sub(" ", sql).strip(),
+            "params": [repr(p)[:80] for p in (params or ())],
+            "error": error,
+            "explain": explain,
+        }
+        with self._lock:
+            self._slow.append(entry)
+            if explain is not None:
+                self._timing(sql).last_explain = explain
+        if self.slow_log_file:
+            try:
+                with open(self.slow_log_file, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+            except OSError:
+                pass
+        return entry
+
+    def report(self, sort="total_ms", limit=None):
+        """One dict per fingerprint, heaviest first (by total time by default)."""
+        with self._lock:
+            rows = [
+                {
+                    "fingerprint": fingerprint_id(t.fp),
+                    "calls": t.calls,
+                    "errors": t.errors,
+                    "cache_hits": t.cache_hits,
+                    "total_ms": round(1000 * t.total, 1),
+                    "avg_ms": round(1000 * t.total / t.calls, 2) if t.calls else 0.0,
+                    "p50_ms": t.percentile(50),
+                    "p95_ms": t.percentile(95),
+                    "p99_ms": t.percentile(99),
+                    "max_ms": round(t.max_ms, 2),
+                    "connect_ms": round(1000 * t.connect, 1),
+                    "execute_ms": round(1000 * t.execute, 1),
+                    "fetch_ms": round(1000 * t.fetch, 1),
+                    "rows": t.rows,
+                    "max_rows": t.max_rows,
+                    "explained": t.last_explain is not None,
+                    "sql": t.fp,
+                }
+                for t in self._by_fp.values()
+            ]
+        rows.sort(key=lambda r: r[sort], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def histogram(self, fp_id):
+        """(bucket label, count) pairs for one fingerprint id."""
+        with self._lock:
+            for t in self._by_fp.values():
+                if fingerprint_id(t.fp) == fp_id:
+                    labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+                    return list(zip(labels, t.buckets))
+        return []
+
+    def explain_for(self, fp_id):
+        with self._lock:
+            for t in self._by_fp.values():
+                if fingerprint_id(t.fp) == fp_id:
+                    return t.last_explain
+        return None
+
+    def slow_log(self, limit=None):
+        """Most recent slow calls first."""
+        with self._lock:
+            entries = list(reversed(self._slow))
+        return entries[:limit] if limit else entries
+
+    def reset(self):
+        with self._lock:
+            self._by_fp.clear()
+            self._slow.clear()
+            self.since = datetime.now()
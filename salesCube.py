@@ -0,0 +1,204 @@
+import sys
+from itertools import combinations
+
+from mysql.connector import Error
+
+from dataAccess import run_query, transaction
+
+
+# Cube dimensions in bg_sales_cube column order. ALL marks a rolled-up
+# dimension; UNKNOWN stands in for NULL source values so every key is exact.
+CUBE_DIMENSIONS = ("release_year", "genre", "platform", "region", "esrb")
+ALL = "*"
+UNKNOWN = "unknown"
+UNRATED = "unrated"
+
+# Regions as in bg_sales_summary; Global_Sales records are left out so
+# rolling region up never double counts.
+CUBE_REGIONS = {
+    "na": ("na_sales", "north_america"),
+    "eu": ("eu_sales", "europe"),
+    "jp": ("jp_sales", "japan"),
+    "other": ("other_sales", "other"),
+}
+
+CUBE_COLUMNS = "release_year, genre, platform, region, esrb, sales_millions, num_games"
+
+
+def _region_case():
+    whens = " ".join(
+        f"WHEN LOWER(r.region) IN ({', '.join(repr(n) for n in names)}) THEN '{key}'"
+        for key, names in CUBE_REGIONS.items()
+    )
+    return f"CASE {whens} END"
+
+
+# One row per sales record with every dimension resolved
+CUBE_FACTS_SQL = f"""
+SELECT
+  COALESCE(CAST(g.release_year AS CHAR), '{UNKNOWN}') AS release_year,
+  COALESCE(g.genre, '{UNKNOWN}') AS genre,
+  COALESCE(g.platform, '{UNKNOWN}') AS platform,
+  {_region_case()} AS region,
+  COALESCE(e.esrb, '{UNRATED}') AS esrb,
+  g.sales_game_id,
+  r.sales_millions
+FROM bg_sales_record r
+JOIN bg_sales_game g ON g.sales_game_id = r.sales_game_id
+LEFT JOIN app_game_link l ON l.sales_game_id = g.sales_game_id
+LEFT JOIN bg_esrb_game e ON e.esrb_game_id = l.esrb_game_id
+"""
+
+
+def _base_sql(with_region):
+    """The two grouping sets read from the facts: every dimension, and every dimension but region."""
+    region = "f.region" if with_region else f"'{ALL}'"
+    group = "f.release_year, f.genre, f.platform, f.region, f.esrb" if with_region else \
+        "f.release_year, f.genre, f.platform, f.esrb"
+    return f"""
+    INSERT INTO bg_sales_cube ({CUBE_COLUMNS})
+    SELECT f.release_year, f.genre, f.platform, {region}, f.esrb,
+           COALESCE(SUM(f.sales_millions), 0), COUNT(DISTINCT f.sales_game_id)
+    FROM ({CUBE_FACTS_SQL}) f
+    WHERE f.region IS NOT NULL
+    GROUP BY {group}
+    """
+
+
+def _rollup_sql(dims):
+    """
+    Grouping set `dims`, rolled up from the finest cells already in the
+    cube. Sets that keep region add up the per-region cells; sets that roll
+    region up start from the region = ALL cells, so a game sold in several
+    regions is counted once in num_games.
+    """
+    select = ", ".join(d if d in dims else f"'{ALL}'" for d in CUBE_DIMENSIONS)
+    where = " AND ".join(
+        f"{d} = '{ALL}'" if d == "region" and "region" not in dims else f"{d} <> '{ALL}'"
+        for d in CUBE_DIMENSIONS
+    )
+    group = f"GROUP BY {', '.join(dims)}" if dims else "HAVING COUNT(*) > 0"
+    return f"""
+    INSERT INTO bg_sales_cube ({CUBE_COLUMNS})
+    SELECT {select}, SUM(sales_millions), SUM(num_games)
+    FROM bg_sales_cube
+    WHERE {where}
+    {group}
+    """
+
+
+def grouping_sets():
+    """All 32 subsets of CUBE_DIMENSIONS, finest first."""
+    return [
+        combo
+        for n in range(len(CUBE_DIMENSIONS), -1, -1)
+        for combo in combinations(CUBE_DIMENSIONS, n)
+    ]
+
+
+def rebuild_sales_cube():
+    """
+    Recompute bg_sales_cube (all 32 grouping sets) in one transaction. Run
+    after every load that changes bg_sales_* or app_game_link, since the
+    cube is not maintained by triggers.
+    """
+    finest = tuple(CUBE_DIMENSIONS)
+    no_region = tuple(d for d in CUBE_DIMENSIONS if d != "region")
+    with transaction(invalidates=("bg_sales_cube",)) as cur:
+        cur.execute("DELETE FROM bg_sales_cube")
+        cur.execute(_base_sql(with_region=True))
+        cur.execute(_base_sql(with_region=False))
+        for dims in grouping_sets():
+            if dims not in (finest, no_region):
+                cur.execute(_rollup_sql(dims))
+        cur.execute("SELECT COUNT(*) FROM bg_sales_cube")
+        return cur.fetchone()[0]
+
+
+def cube_slice_query(group_by=(), order_by_sales=False, limit=None, **filters):
+    """
+    Return (sql, params) for one slice of the cube. Dimensions in group_by
+    come back one row per value; dimensions in filters are fixed to a value
+    (or a list of values); every other dimension is rolled up. Each shape is
+    a lookup on one of the cube's indexes.
+    """
+    group_by = tuple(group_by)
+    unknown = (set(group_by) | set(filters)) - set(CUBE_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown cube dimension(s): {', '.join(sorted(unknown))}")
+
+    where = []
+    params = []
+    for d in CUBE_DIMENSIONS:
+        value = filters.get(d)
+        if value is not None:
+            values = [str(v) for v in value] if isinstance(value, (list, tuple, set)) else [str(value)]
+            where.append(f"{d} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+            if d not in group_by:
+                continue
+        if d in group_by:
+            where.append(f"{d} <> %s")
+        else:
+            where.append(f"{d} = %s")
+        params.append(ALL)
+
+    order = "sales_millions DESC" if order_by_sales or not group_by else ", ".join(group_by)
+    sql = f"""
+    SELECT {", ".join(group_by) + ", " if group_by else ""}sales_millions, num_games
+    FROM bg_sales_cube
+    WHERE {" AND ".join(where)}
+    ORDER BY {order}
+    """
+    if limit:
+        sql += "LIMIT %s"
+        params.append(limit)
+    return sql, tuple(params)
+
+
+def cube_slice(group_by=(), order_by_sales=False, limit=None, **filters):
+    return run_query(*cube_slice_query(group_by, order_by_sales, limit, **filters), cache=True)
+
+
+def cube_total(**filters):
+    """sales_millions and num_games for one cell (every unnamed dimension rolled up)."""
+    rows = cube_slice((), **filters)
+    return rows[0] if rows else {"sales_millions": 0, "num_games": 0}
+
+
+def trend_by_year(**filters):
+    """Sales and game counts per release year for a slice (e.g. genre="Sports")."""
+    return cube_slice(("release_year",), **filters)
+
+
+def genre_share_by_region(**filters):
+    """Each genre's share of every region's sales, as percentages."""
+    cells = cube_slice(("genre", "region"), **filters)
+    totals = {}
+    for c in cells:
+        totals[c["region"]] = totals.get(c["region"], 0) + float(c["sales_millions"] or 0)
+
+    share = {}
+    for c in cells:
+        row = share.setdefault(c["genre"], {"genre": c["genre"]})
+        total = totals.get(c["region"]) or 0
+        row[f"{c['region']}_share_pct"] = round(100 * float(c["sales_millions"] or 0) / total, 2) if total else 0.0
+    rows = list(share.values())
+    for row in rows:
+        for region in CUBE_REGIONS:
+            row.setdefault(f"{region}_share_pct", 0.0)
+    rows.sort(key=lambda r: sum(r[f"{k}_share_pct"] for k in CUBE_REGIONS), reverse=True)
+    return rows
+
+
+def main():
+    try:
+        cells = rebuild_sales_cube()
+    except Error as e:
+        print(f"[DB ERROR] {e}")
+        sys.exit(1)
+    print(f"Wrote {cells} bg_sales_cube cells ({len(grouping_sets())} grouping sets).")
+
+
+if __name__ == "__main__":
+    main()
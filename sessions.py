@@ -0,0 +1,233 @@
+import secrets
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from mysql.connector import Error
+
+from dataAccess import execute, fetch_one, login_lookup
+
+
+SESSION_CONFIG = {
+    "ttl_hours": 8,
+    "sweep_interval": 60.0,
+    "retention_days": 7,
+}
+
+Session = namedtuple("Session", "token user_id username expires_at")
+
+
+class AuthError(Exception):
+    pass
+
+
+class SessionStore:
+    """
+    Token sessions backed by app_session, with every live session also held
+    in memory. validate() and is_logged_in() are dictionary lookups; MySQL is
+    only asked about tokens this process has never seen.
+
+    Logouts and revocations take effect in memory at once. The matching
+    app_session updates are queued and written in bulk by a background
+    sweeper, which also drops expired sessions from memory and deletes rows
+    past the retention window.
+    """
+
+    def __init__(self, ttl_hours=8, sweep_interval=60.0, retention_days=7):
+        self.ttl = timedelta(hours=ttl_hours)
+        self.sweep_interval = sweep_interval
+        self.retention = timedelta(days=retention_days)
+
+        self._by_token = {}
+        self._by_user = {}
+        self._revoke_tokens = set()
+        self._revoke_users = {}         # user_id -> revoked at; sessions created later survive
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sweeper = None
+        self.stats = {"issued": 0, "memory_hits": 0, "db_lookups": 0, "revoked": 0, "expired": 0, "sweeps": 0}
+
+    # Issuing
+    def login(self, username, password_hash):
+        """Check credentials with one query and issue a session, or raise AuthError."""
+        row = login_lookup(username)
+        if row is None:
+            raise AuthError("User not found.")
+        user_id, db_username, stored_hash, is_active = row
+        if not is_active:
+            raise AuthError("This account is inactive.")
+        if not stored_hash or stored_hash != password_hash:
+            raise AuthError("Incorrect password.")
+        return self.issue(user_id, db_username)
+
+    def issue(self, user_id, username):
+        """Create a session for an already authenticated user."""
+        token = secrets.token_urlsafe(32)
+        # created_at on this clock, so it compares with revoke_user() times
+        created_at = datetime.now().replace(microsecond=0)
+        expires_at = created_at + self.ttl
+        execute(
+            "INSERT INTO app_session (user_id, token, created_at, expires_at) VALUES (%s, %s, %s, %s)",
+            (user_id, token, created_at, expires_at),
+        )
+        session = Session(token, user_id, username, expires_at)
+        self._remember(session)
+        with self._lock:
+            self.stats["issued"] += 1
+        self.start_sweeper()
+        return session
+
+    def _remember(self, session):
+        with self._lock:
+            self._by_token[session.token] = session
+            self._by_user.setdefault(session.user_id, set()).add(session.token)
+
+    def _forget(self, token):
+        session = self._by_token.pop(token, None)
+        if session is not None:
+            tokens = self._by_user.get(session.user_id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._by_user[session.user_id]
+        return session
+
+    # Checks
+    def validate(self, token):
+        """Return the live Session for token, or None if it is unknown, expired or revoked."""
+        if not token:
+            return None
+        with self._lock:
+            session = self._by_token.get(token)
+            if session is not None:
+                if session.expires_at > datetime.now():
+                    self.stats["memory_hits"] += 1
+                    return session
+                self._forget(token)
+                self.stats["expired"] += 1
+                return None
+            if token in self._revoke_tokens:
+                return None
+
+        # Issued by another process: look it up once, then serve it from memory
+        with self._lock:
+            self.stats["db_lookups"] += 1
+        row = fetch_one(
+            """
+            SELECT s.user_id, u.username, s.expires_at, s.created_at
+            FROM app_session s
+            JOIN app_user u ON u.user_id = s.user_id
+            WHERE s.token = %s AND s.revoked_at IS NULL AND s.expires_at > %s AND u.is_active = 1
+            """,
+            (token, datetime.now()),
+        )
+        if row is None:
+            return None
+        with self._lock:
+            revoked_at = self._revoke_users.get(row[0])
+        if revoked_at is not None and row[3] <= revoked_at:
+            return None
+        session = Session(token, *row[:3])
+        self._remember(session)
+        return session
+
+    def is_logged_in(self, user_id):
+        now = datetime.now()
+        with self._lock:
+            return any(self._by_token[t].expires_at > now for t in self._by_user.get(user_id, ()))
+
+    # Ending sessions
+    def logout(self, token):
+        if not token:
+            return
+        with self._lock:
+            self._forget(token)
+            self._revoke_tokens.add(token)
+            self.stats["revoked"] += 1
+
+    def revoke_user(self, user_id):
+        """
+        End every session of a user (deleted or deactivated accounts). Only
+        sessions created up to now are revoked in app_session, so a login
+        after the account is reactivated is not caught by the queued update.
+        """
+        now = datetime.now().replace(microsecond=0)
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._forget(token)
+            self._revoke_users[user_id] = now
+            self.stats["revoked"] += 1
+
+    # Sweeper
+    def start_sweeper(self):
+        if self._sweeper is not None:
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="gamesearch-sessions", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Error:
+                # Keep the queued revocations; the next sweep retries them
+                pass
+
+    def sweep(self):
+        """Expire sessions in memory and write queued revocations in bulk."""
+        now = datetime.now()
+        with self._lock:
+            for token in [t for t, s in self._by_token.items() if s.expires_at <= now]:
+                self._forget(token)
+                self.stats["expired"] += 1
+            tokens = sorted(self._revoke_tokens)
+            users = dict(self._revoke_users)
+            self._revoke_tokens.clear()
+            self._revoke_users.clear()
+
+        try:
+            for start in range(0, len(tokens), 500):
+                chunk = tokens[start:start + 500]
+                marks = ", ".join(["%s"] * len(chunk))
+                execute(
+                    f"UPDATE app_session SET revoked_at = %s WHERE revoked_at IS NULL AND token IN ({marks})",
+                    (now, *chunk),
+                )
+            for user_id, revoked_at in sorted(users.items()):
+                execute(
+                    "UPDATE app_session SET revoked_at = %s "
+                    "WHERE revoked_at IS NULL AND user_id = %s AND created_at <= %s",
+                    (now, user_id, revoked_at),
+                )
+        except Error:
+            with self._lock:
+                self._revoke_tokens.update(tokens)
+                for user_id, revoked_at in users.items():
+                    self._revoke_users[user_id] = max(revoked_at, self._revoke_users.get(user_id, revoked_at))
+            raise
+
+        execute("DELETE FROM app_session WHERE expires_at < %s", (now - self.retention,))
+        with self._lock:
+            self.stats["sweeps"] += 1
+
+    def stop(self):
+        """Stop the sweeper and flush queued revocations."""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+        try:
+            self.sweep()
+        except Error:
+            pass
+
+    def snapshot(self):
+        with self._lock:
+            snap = dict(self.stats)
+            snap["live"] = len(self._by_token)
+            snap["pending_revocations"] = len(self._revoke_tokens) + len(self._revoke_users)
+        return snap
+
+
+SESSIONS = SessionStore(**SESSION_CONFIG)
@@ -0,0 +1,373 @@
+import argparse
+import hashlib
+import random
+import sys
+import time
+from collections import Counter
+
+from mysql.connector import Error
+
+from dataAccess import POOL, bump_data_version, fetch_rows, fetch_value, invalidate_cache
+from gameApp import rebuild_sales_summary
+from linkGames import build_links
+from salesCube import rebuild_sales_cube
+from loadDB import TABLE_COLUMNS, add_secondary_indexes, drop_secondary_indexes, insert_sql
+
+
+BATCH_SIZE = 5000
+
+# Synthetic rows are tagged so they can be told apart from (and removed
+# without touching) the Kaggle data and real accounts.
+SYNTH_SOURCE = "synthetic"
+SYNTH_USER_PREFIX = "synth_"
+SYNTH_PASSWORD = "synthetic"
+
+# Families generated per insert round; bounds memory whatever the scale
+FAMILY_CHUNK = 20_000
+
+# Sales ids kept as review / favorite targets (sampled, weighted by sales)
+MAX_TARGETS = 200_000
+
+APP_COLUMNS = {
+    "app_user": ["user_id", "username", "email", "password_hash", "is_active"],
+    "app_game_review": ["review_id", "user_id", "sales_game_id", "rating", "review_text"],
+    "app_review_vote": ["review_id", "user_id", "vote_value"],
+    "app_favorite_list": ["favorite_list_id", "user_id", "list_name"],
+    "app_favorite_item": ["favorite_list_id", "sales_game_id", "notes"],
+}
+
+TITLE_SUFFIXES = ["", "", "", "", " 2", " 3", " II", " III", ": Remastered", " HD", " Online",
+                  " Legends", " Origins", " Returns", " Deluxe", " Reloaded", " Chronicles", " Evolution"]
+
+REVIEW_SNIPPETS = ["Great fun.", "Not for me.", "Solid sequel.", "Too short.", "Amazing soundtrack.",
+                   "Buggy at launch.", "Best in the series.", "Good with friends.", None, None]
+
+
+def app_insert_sql(table):
+    cols = APP_COLUMNS[table]
+    return f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join(['%s'] * len(cols))})"
+
+
+class Profile:
+    """
+    Empirical distributions read from the loaded Kaggle rows: each generated
+    game copies a real game's genre, year, publisher and regional sales mix
+    (scaled by a lognormal factor, which keeps the heavy sales tail), and
+    titles are built from the real title vocabulary.
+    """
+
+    def __init__(self):
+        games = fetch_rows(
+            """
+            SELECT sales_game_id, title, platform, genre, publisher, developer, release_year
+            FROM bg_sales_game
+            WHERE title IS NOT NULL AND (source IS NULL OR source <> %s)
+            """,
+            (SYNTH_SOURCE,),
+        )
+        if not games:
+            raise RuntimeError("bg_sales_game is empty; run loadDB.py before generating synthetic data")
+
+        sales = {}
+        for gid, region, value in fetch_rows(
+            "SELECT sales_game_id, region, sales_millions FROM bg_sales_record WHERE source IS NULL OR source <> %s",
+            (SYNTH_SOURCE,),
+        ):
+            sales.setdefault(gid, []).append((region, float(value or 0)))
+
+        self.templates = [g for g in games if g[0] in sales]
+        self.sales = sales
+        self.platforms = [g[2] for g in games if g[2]]
+        self.platforms_per_title = list(Counter(g[1] for g in games).values())
+        self.words = [w for g in games for w in g[1].split() if w.isalnum()]
+        self.title_lengths = [max(1, min(len(g[1].split()), 6)) for g in games]
+
+        self.esrb_ratings = [r[0] for r in fetch_rows(
+            "SELECT esrb FROM bg_esrb_game WHERE esrb IS NOT NULL AND (source IS NULL OR source <> %s)",
+            (SYNTH_SOURCE,),
+        )] or ["E", "T", "M"]
+        self.meta_scores = fetch_rows(
+            """
+            SELECT meta_score, user_score FROM bg_meta_game
+            WHERE meta_score IS NOT NULL AND (source IS NULL OR source <> %s)
+            """,
+            (SYNTH_SOURCE,),
+        ) or [(70, 7.0)]
+
+        n_titles = len(self.platforms_per_title)
+        self.esrb_rate = min(1.0, len(self.esrb_ratings) / n_titles)
+        self.meta_rate = min(1.0, len(self.meta_scores) / len(games))
+        self.base_games = len(games)
+
+
+def next_id(table, column):
+    return (fetch_value(f"SELECT COALESCE(MAX({column}), 0) FROM {table}") or 0) + 1
+
+
+def generate_families(profile, n_families, rng, ids):
+    """
+    Yield (sales_games, sales_records, esrb_games, meta_games, targets) per
+    FAMILY_CHUNK families. A family is one title released on one or more
+    platforms, so duplicate titles across platforms appear at the real rate.
+    """
+    for start in range(0, n_families, FAMILY_CHUNK):
+        games, records, esrb, meta, targets = [], [], [], [], []
+        for _ in range(min(FAMILY_CHUNK, n_families - start)):
+            tpl = rng.choice(profile.templates)
+            _, _, _, genre, publisher, developer, year = tpl
+            words = rng.choices(profile.words, k=rng.choice(profile.title_lengths))
+            title = (" ".join(words) + rng.choice(TITLE_SUFFIXES))[:250]
+
+            k = rng.choice(profile.platforms_per_title)
+            platforms = list(dict.fromkeys([tpl[2]] + rng.choices(profile.platforms, k=k - 1)))
+            for platform in platforms:
+                gid = ids["sales_game_id"]
+                ids["sales_game_id"] += 1
+                games.append((gid, title, platform, genre, publisher, developer, year, SYNTH_SOURCE))
+
+                factor = rng.lognormvariate(0.0, 0.6)
+                total = 0.0
+                for region, value in profile.sales[tpl[0]]:
+                    amount = round(value * factor, 2)
+                    records.append((ids["sales_id"], gid, region, amount, SYNTH_SOURCE))
+                    ids["sales_id"] += 1
+                    total = max(total, amount)
+                targets.append((gid, total))
+
+                if rng.random() < profile.meta_rate:
+                    score, user_score = rng.choice(profile.meta_scores)
+                    meta.append((ids["meta_game_id"], title, platform, score, user_score,
+                                 str(year) if year else None, developer, publisher, genre, SYNTH_SOURCE))
+                    ids["meta_game_id"] += 1
+
+            if rng.random() < profile.esrb_rate:
+                esrb.append((ids["esrb_game_id"], title, rng.choice(profile.esrb_ratings),
+                             developer, publisher, str(year) if year else None, SYNTH_SOURCE))
+                ids["esrb_game_id"] += 1
+        yield games, records, esrb, meta, targets
+
+
+def _insert(cur, sql, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        cur.executemany(sql, rows[start:start + batch_size])
+
+
+def generate_bg(scale, rng, batch_size=BATCH_SIZE, rebuild_indexes=True, log=print):
+    """
+    Add synthetic bg_* rows until the sales tables hold about scale times
+    the Kaggle data. Returns (row counts, [(sales_game_id, weight)]).
+    """
+    profile = Profile()
+    avg_platforms = sum(profile.platforms_per_title) / len(profile.platforms_per_title)
+    n_families = int(profile.base_games * max(scale - 1, 0) / avg_platforms)
+    counts = {t: 0 for t in TABLE_COLUMNS}
+    targets = []
+    keep_rate = min(1.0, MAX_TARGETS / max(1, n_families * avg_platforms))
+
+    ids = {
+        "sales_game_id": next_id("bg_sales_game", "sales_game_id"),
+        "sales_id": next_id("bg_sales_record", "sales_id"),
+        "esrb_game_id": next_id("bg_esrb_game", "esrb_game_id"),
+        "meta_game_id": next_id("bg_meta_game", "meta_game_id"),
+    }
+
+    log(f"Generating {n_families} title families (~{scale}x the Kaggle sales rows)...")
+    conn = POOL.acquire()
+    broken = False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET @skip_sales_summary = 1")
+            if rebuild_indexes:
+                drop_secondary_indexes(cur)
+            for games, records, esrb, meta, chunk_targets in generate_families(profile, n_families, rng, ids):
+                _insert(cur, insert_sql("bg_sales_game"), games, batch_size)
+                _insert(cur, insert_sql("bg_sales_record"), records, batch_size)
+                _insert(cur, insert_sql("bg_esrb_game"), esrb, batch_size)
+                _insert(cur, insert_sql("bg_meta_game"), meta, batch_size)
+                conn.commit()
+                counts["bg_sales_game"] += len(games)
+                counts["bg_sales_record"] += len(records)
+                counts["bg_esrb_game"] += len(esrb)
+                counts["bg_meta_game"] += len(meta)
+                targets.extend(t for t in chunk_targets if rng.random() < keep_rate)
+                log(f"  bg_sales_game: +{counts['bg_sales_game']} rows")
+            if rebuild_indexes:
+                log("Rebuilding secondary indexes...")
+                add_secondary_indexes(cur)
+    except BaseException:
+        try:
+            conn.rollback()
+        except Error:
+            broken = True
+        raise
+    finally:
+        if not broken:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SET @skip_sales_summary = NULL")
+            except Error:
+                broken = True
+        POOL.release(conn, discard=broken)
+
+    # Real games stay review targets too, weighted by their own sales
+    for gid, regions in profile.sales.items():
+        if rng.random() < keep_rate:
+            targets.append((gid, max(v for _, v in regions)))
+    return counts, targets
+
+
+def generate_app(n_users, targets, rng, batch_size=BATCH_SIZE, log=print):
+    """
+    Add synthetic users with reviews, votes and favorite lists. Activity per
+    user is Pareto-distributed (a few heavy reviewers, many lurkers) and
+    reviews/favorites go to games in proportion to their sales.
+    """
+    if not targets:
+        targets = [(r[0], float(r[1] or 0)) for r in fetch_rows(
+            "SELECT sales_game_id, global_sales_millions FROM bg_sales_summary"
+        )]
+    if not targets:
+        raise RuntimeError("no sales games to review; load bg_sales_game first")
+    game_ids = [t[0] for t in targets]
+    cum = []
+    acc = 0.0
+    for _, w in targets:
+        acc += w + 0.01
+        cum.append(acc)
+
+    user_id = next_id("app_user", "user_id")
+    review_id = next_id("app_game_review", "review_id")
+    list_id = next_id("app_favorite_list", "favorite_list_id")
+    pw = hashlib.sha256(SYNTH_PASSWORD.encode("utf-8")).hexdigest()
+    counts = {t: 0 for t in APP_COLUMNS}
+
+    first_user = user_id
+    for start in range(0, n_users, FAMILY_CHUNK):
+        rows = {t: [] for t in APP_COLUMNS}
+        n = min(FAMILY_CHUNK, n_users - start)
+        chunk_users = list(range(user_id, user_id + n))
+        for uid in chunk_users:
+            rows["app_user"].append((uid, f"{SYNTH_USER_PREFIX}{uid}", f"{SYNTH_USER_PREFIX}{uid}@example.test",
+                                     pw, 1 if rng.random() < 0.97 else 0))
+
+            n_reviews = min(int(rng.paretovariate(1.3)) - 1, 200)
+            for gid in set(rng.choices(game_ids, cum_weights=cum, k=n_reviews)):
+                rating = max(1, min(10, round(rng.gauss(7.2, 1.8))))
+                rows["app_game_review"].append((review_id, uid, gid, rating, rng.choice(REVIEW_SNIPPETS)))
+                n_votes = min(int(rng.paretovariate(1.1)) - 1, 50)
+                voters = {rng.randrange(first_user, user_id + n) for _ in range(n_votes)} - {uid}
+                for voter in voters:
+                    rows["app_review_vote"].append((review_id, voter, 1 if rng.random() < 0.8 else -1))
+                review_id += 1
+
+            for i in range(min(int(rng.paretovariate(2.0)) - 1, 5)):
+                rows["app_favorite_list"].append((list_id, uid, f"List {i + 1}"))
+                for gid in set(rng.choices(game_ids, cum_weights=cum, k=rng.randint(1, 20))):
+                    rows["app_favorite_item"].append((list_id, gid, None))
+                list_id += 1
+        user_id += n
+
+        conn = POOL.acquire()
+        broken = False
+        try:
+            with conn.cursor() as cur:
+                for table in APP_COLUMNS:
+                    _insert(cur, app_insert_sql(table), rows[table], batch_size)
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except Error:
+                broken = True
+            raise
+        finally:
+            POOL.release(conn, discard=broken)
+
+        for table, table_rows in rows.items():
+            counts[table] += len(table_rows)
+        log(f"  app_user: +{counts['app_user']} rows")
+
+    invalidate_cache(*APP_COLUMNS)
+    return counts
+
+
+def clear_synthetic(batch_size=50_000, log=print):
+    """Delete every synthetic row (children first); Kaggle rows and real users stay."""
+    statements = [
+        ("app_user", f"DELETE FROM app_user WHERE username LIKE %s LIMIT {batch_size}",
+         (SYNTH_USER_PREFIX.replace("_", "\\_") + "%",)),
+        ("bg_sales_record", f"DELETE FROM bg_sales_record WHERE source = %s LIMIT {batch_size}", (SYNTH_SOURCE,)),
+        ("bg_sales_game", f"DELETE FROM bg_sales_game WHERE source = %s LIMIT {batch_size}", (SYNTH_SOURCE,)),
+        ("bg_esrb_game", f"DELETE FROM bg_esrb_game WHERE source = %s LIMIT {batch_size}", (SYNTH_SOURCE,)),
+        ("bg_meta_game", f"DELETE FROM bg_meta_game WHERE source = %s LIMIT {batch_size}", (SYNTH_SOURCE,)),
+    ]
+    conn = POOL.acquire()
+    broken = False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET @skip_sales_summary = 1")
+            for table, sql, params in statements:
+                removed = 0
+                while True:
+                    cur.execute(sql, params)
+                    conn.commit()
+                    removed += cur.rowcount
+                    if cur.rowcount < batch_size:
+                        break
+                log(f"  {table}: -{removed} rows")
+            cur.execute("SET @skip_sales_summary = NULL")
+    except BaseException:
+        try:
+            conn.rollback()
+        except Error:
+            broken = True
+        raise
+    finally:
+        POOL.release(conn, discard=broken)
+    invalidate_cache()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Scale the bg_* and app_* tables with synthetic rows for benchmarking.",
+    )
+    parser.add_argument("--scale", type=float, default=10.0,
+                        help="target size of the sales tables as a multiple of the Kaggle data (default 10)")
+    parser.add_argument("--users", type=int, default=None,
+                        help="synthetic users to add (default 500 per unit of scale)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (default 42)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"rows per executemany call (default {BATCH_SIZE})")
+    parser.add_argument("--keep-indexes", action="store_true",
+                        help="leave secondary indexes in place while inserting")
+    parser.add_argument("--clear", action="store_true", help="remove all synthetic rows and exit")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    try:
+        if args.clear:
+            print("Removing synthetic rows...")
+            clear_synthetic()
+        else:
+            rng = random.Random(args.seed)
+            bg_counts, targets = generate_bg(args.scale, rng, args.batch_size, not args.keep_indexes)
+            users = args.users if args.users is not None else int(500 * args.scale)
+            print(f"Generating {users} users with reviews, votes and favorites...")
+            app_counts = generate_app(users, targets, rng, args.batch_size)
+            print(", ".join(f"{t}=+{n}" for t, n in {**bg_counts, **app_counts}.items()))
+
+        print("Rebuilding bg_sales_summary...")
+        rebuild_sales_summary()
+        print("Linking games across datasets...")
+        build_links()
+        print("Rebuilding bg_sales_cube...")
+        rebuild_sales_cube()
+        bump_data_version("sales")
+    except (Error, RuntimeError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    print(f"Done in {time.perf_counter() - t0:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()